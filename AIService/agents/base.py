@@ -1,13 +1,34 @@
 # AIService/agents/base.py
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Awaitable
 from dataclasses import dataclass
 from enum import Enum
+import asyncio
+import copy
 import logging
+import time
+
+from services.tracing import span
 
 logger = logging.getLogger(__name__)
 
+# Progress callback used for streaming partial results: (event name, JSON-serializable payload)
+EventCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# DocumentContext.metadata key holding sections already found during text extraction (PDF headings)
+LAYOUT_SECTIONS_KEY = "layout_sections"
+
+
+async def emit_event(callback: Optional[EventCallback], event: str, data: Dict[str, Any]) -> None:
+    """Invokes a progress callback; a failing listener must never break the analysis."""
+    if callback is None:
+        return
+    try:
+        await callback(event, data)
+    except Exception as e:
+        logger.warning(f"Event callback failed for '{event}': {e}")
+
 class AgentType(Enum):
     """Enumeration of available agent types for career-focused AI"""
     CLASSIFIER = "classifier" # Keep for input validation (Resume vs. JD)
@@ -16,6 +37,7 @@ class AgentType(Enum):
     JOB_MATCHER = "job_matcher" # New: For calculating match score
     RESUME_OPTIMIZER = "resume_optimizer" # New: For generating enhancement suggestions
     LAYOUT_ANALYZER = "layout_analyzer" # New: For analyzing document layout and structure
+    DOCUMENT_ANALYZER = "document_analyzer" # Classification, sections and entities of a short document in one call
 
 @dataclass
 class AgentResult:
@@ -27,6 +49,28 @@ class AgentResult:
     processing_time: float
     error: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form, used when results are persisted and reused."""
+        return {
+            "agent_type": self.agent_type.value,
+            "success": self.success,
+            "data": self.data,
+            "confidence": self.confidence,
+            "processing_time": self.processing_time,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "AgentResult":
+        return cls(
+            agent_type=AgentType(payload["agent_type"]),
+            success=payload.get("success", True),
+            data=payload.get("data") or {},
+            confidence=payload.get("confidence", 1.0),
+            processing_time=payload.get("processing_time", 0.0),
+            error=payload.get("error"),
+        )
+
 @dataclass
 class DocumentContext:
     """Context passed between agents during document processing"""
@@ -41,8 +85,104 @@ class DocumentContext:
         if self.previous_results is None:
             self.previous_results = {}
 
+@dataclass
+class AgentTask:
+    """
+    A unit of agent work for the orchestrator's scheduler. `run` receives a dict holding
+    exactly the named `inputs` and produces the value published under `name`.
+    """
+    name: str
+    inputs: List[str]
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    default: Any = None  # published instead if `run` fails, so dependents still start
+    event: Optional[str] = None  # event name the orchestrator streams this task's output under, if any
+    to_event: Optional[Callable[[Any], Dict[str, Any]]] = None  # builds the event payload
+
+class TaskScheduler:
+    """
+    Runs a graph of AgentTasks. Each task starts as soon as every input it declares is
+    available, whether that input was passed in up-front or is produced by another task,
+    so independent work never waits on an unrelated slower branch.
+
+    A failing task is logged and its `default` is published in its place, so dependents
+    still run (matching how agents already degrade per subtask).
+    """
+
+    def __init__(self, tasks: List[AgentTask]):
+        self.tasks: Dict[str, AgentTask] = {}
+        for task in tasks:
+            if task.name in self.tasks:
+                raise ValueError(f"Duplicate task name in graph: {task.name}")
+            self.tasks[task.name] = task
+        self._check_acyclic()
+        self.timings: Dict[str, float] = {}
+
+    def _check_acyclic(self) -> None:
+        visiting, done = set(), set()
+
+        def _visit(name: str, path: List[str]) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in task graph: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dep in self.tasks[name].inputs:
+                if dep in self.tasks:
+                    _visit(dep, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.tasks:
+            _visit(name, [])
+
+    async def run(
+        self,
+        initial: Dict[str, Any],
+        on_complete: Optional[Callable[[AgentTask, Any], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """Runs every task and returns {task name: output}. `on_complete` is awaited per task."""
+        for task in self.tasks.values():
+            missing = [dep for dep in task.inputs if dep not in initial and dep not in self.tasks]
+            if missing:
+                raise ValueError(f"Task '{task.name}' has unsatisfied inputs: {missing}")
+
+        loop = asyncio.get_running_loop()
+        values = dict(initial)
+        ready = {name: loop.create_future() for name in self.tasks}
+
+        async def _node(task: AgentTask) -> None:
+            for dep in task.inputs:
+                if dep in ready:
+                    await ready[dep]
+            start = time.time()
+            try:
+                with span(f"task.{task.name}"):
+                    output = await task.run({dep: values[dep] for dep in task.inputs})
+            except Exception as e:
+                logger.error(f"Task '{task.name}' failed, using its default: {e}", exc_info=True)
+                output = copy.deepcopy(task.default)
+            self.timings[task.name] = time.time() - start
+            values[task.name] = output
+            ready[task.name].set_result(None)  # release dependents before reporting
+            if on_complete:
+                await on_complete(task, output)
+
+        nodes = [asyncio.ensure_future(_node(task)) for task in self.tasks.values()]
+        try:
+            await asyncio.gather(*nodes)
+        except BaseException:
+            for node in nodes:
+                node.cancel()
+            await asyncio.gather(*nodes, return_exceptions=True)
+            raise
+        return {name: values[name] for name in self.tasks}
+
+
 class BaseAgent(ABC):
     """Abstract base class for all document analysis agents"""
+
+    # Bump when an agent's prompt or model changes so persisted results are invalidated
+    prompt_version: str = "1"
     
     def __init__(self, agent_type: AgentType):
         self.agent_type = agent_type
@@ -58,6 +198,41 @@ class BaseAgent(ABC):
         """Return agent capabilities and requirements"""
         pass
     
+    def local_result(self, context: DocumentContext) -> Optional[AgentResult]:
+        """
+        The agent's result if it can be produced without calling an LLM (declared metadata,
+        local heuristics), else None. process() of agents that have such a path tries it first.
+        It has no side effects, so callers that end up discarding the result can call it freely.
+        """
+        return None
+
+    def record_decision(self, result: AgentResult) -> None:
+        """Counts how a result from local_result() was decided, once the caller has used it."""
+        pass
+
+    def get_tasks(self, context: DocumentContext) -> List[AgentTask]:
+        """
+        Subtasks this agent exposes to the orchestrator's scheduler, with their declared
+        inputs. Agents that run as a single unit return [].
+        """
+        return []
+
+    def task_inputs(self, context: DocumentContext) -> Dict[str, Any]:
+        """Values from the context that this agent's tasks consume as graph inputs."""
+        return {}
+
+    def assemble(self, outputs: Dict[str, Any]) -> AgentResult:
+        """Builds the agent's result from the outputs of its tasks."""
+        raise NotImplementedError(f"{type(self).__name__} does not expose tasks")
+
+    async def _process_tasks(self, context: DocumentContext) -> AgentResult:
+        """
+        Runs this agent's own task graph; used by process() of task-based agents. Task
+        events are only streamed when the orchestrator runs the tasks in its graph.
+        """
+        outputs = await TaskScheduler(self.get_tasks(context)).run(self.task_inputs(context))
+        return self.assemble(outputs)
+
     def should_process(self, context: DocumentContext) -> bool:
         """Determine if this agent should process the document"""
         # Default implementation - can be overridden by specific agents
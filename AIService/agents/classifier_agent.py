@@ -4,29 +4,31 @@ import os
 import re
 import json
 import math
-import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+from services import metrics
 from services.utils import _safe_json
+from services.llm_gateway import llm_gateway
 
 from dotenv import load_dotenv
 load_dotenv()
 
-import google.generativeai as genai
-
 from agents.base import BaseAgent, AgentType, AgentResult, DocumentContext
 
 logger = logging.getLogger(__name__)
 
-# --- Configure the Gemini client at the module level ---
-try:
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise KeyError("GOOGLE_API_KEY not found in environment variables.")
-    genai.configure(api_key=api_key)
-except KeyError as e:
-    logger.warning(f"{e} The agent will not work.")
-    genai = None
+# keep the existing fast model
+MODEL_NAME = "gemini-2.5-flash-lite"
+
+# --- Tunables ---
+# Gated mode: trust a declared doc_type or a confident local score, and only ask the LLM otherwise
+CLASSIFIER_GATING_ENABLED = os.getenv("CLASSIFIER_GATING_ENABLED", "true").lower() == "true"
+# Local confidence at or above which the LLM call is skipped
+CLASSIFIER_LOCAL_THRESHOLD = float(os.getenv("CLASSIFIER_LOCAL_THRESHOLD", "0.8"))
+# How much of the document the local classifier reads; headers and contact details sit at the top
+CLASSIFIER_SAMPLE_CHARS = int(os.getenv("CLASSIFIER_SAMPLE_CHARS", "4096"))
+# Confidence reported for a type the caller declared (e.g. the JD in an analysis request)
+CLASSIFIER_DECLARED_CONFIDENCE = 0.9
 
 # --- Define standard safety settings ---
 GEMINI_SAFETY_SETTINGS = [
@@ -83,44 +85,205 @@ def _heuristic_classify(text: str) -> str:
         return "Resume"
     return "Other"
 
+# Local classifier signals, matched against the lowercased sample in a single pass over its lines.
+# Section headers only count on a line of their own, so "5+ years of experience" in a JD doesn't
+# read as a resume's EXPERIENCE section. Each distinct header or phrase counts once.
+_RESUME_HEADERS = {
+    "experience": 2.0, "work experience": 2.0, "professional experience": 2.0, "employment history": 2.0,
+    "work history": 2.0, "education": 1.5, "academic background": 1.5, "skills": 1.0, "technical skills": 1.0,
+    "core skills": 1.0, "technologies": 1.0, "summary": 1.0, "professional summary": 1.0, "profile": 1.0,
+    "objective": 1.0, "about me": 1.0, "projects": 0.5, "certifications": 0.5, "achievements": 0.5,
+    "awards": 0.5, "publications": 0.5,
+}
+_JD_HEADERS = {
+    "responsibilities": 2.0, "key responsibilities": 2.0, "what you'll do": 2.0, "what you will do": 2.0,
+    "the role": 2.0, "about the role": 2.0, "about the job": 2.0, "about the position": 2.0, "your role": 2.0,
+    "qualifications": 1.5, "minimum qualifications": 1.5, "basic qualifications": 1.5,
+    "preferred qualifications": 1.5, "requirements": 1.5, "what you'll bring": 1.5, "who you are": 1.5,
+    "must haves": 1.5, "nice to haves": 1.5, "nice to have": 1.5, "benefits": 1.0, "perks": 1.0,
+    "what we offer": 1.0, "compensation": 1.0, "about us": 1.0, "about the company": 1.0, "why join us": 1.0,
+}
+_RESUME_PHRASES = {"linkedin.com/in/": 0.5, "github.com/": 0.5}
+_JD_PHRASES = {
+    phrase: 1.0 for phrase in (
+        "we are looking for", "we're looking for", "we are seeking", "we're hiring", "we are hiring",
+        "the ideal candidate", "you will be", "join our team", "equal opportunity employer", "salary range",
+        "pay range", "apply now", "visa sponsorship", "job description", "job type",
+    )
+}
+# Lines (bullets or not) opening with a past-tense action verb, or with a requirement phrase
+_RESUME_LEADS = frozenset((
+    "led", "built", "designed", "developed", "implemented", "managed", "created", "migrated", "automated",
+    "optimized", "scaled", "owned", "launched", "reduced", "increased", "delivered",
+))
+_JD_LEADS = frozenset((
+    "experience with", "familiarity with", "proficiency in", "knowledge of", "ability to", "hands-on experience",
+    "strong", "excellent",
+))
+_DEGREE_LEADS = frozenset(("bachelor", "bachelor's", "master", "master's", "b.s.", "b.s", "bs", "bsc", "b.sc.",
+                           "m.s.", "m.s", "ms", "msc", "m.sc.", "b.a.", "ba", "mba", "ph.d.", "phd"))
+_LEAD_WEIGHT, _LEAD_CAP = 0.25, 6
+_BULLET_CHARS = " \t-•*▪◦–"
+# (pattern, weight, max hits counted); all start on a literal or a digit so they scan fast
+_RESUME_PATTERNS = [
+    (re.compile(r"\w@[\w-]+\.[a-z]"), 1.0, 1),
+    (re.compile(r"\d{3}\)?[\s.-]\d{3,4}[\s.-]?\d{4}\b"), 0.5, 1),
+    # Employment date ranges: "2019-2021", "jan 2020 - present", "03/2018 – 06/2020"
+    (re.compile(r"(?:19|20)\d{2}\s*(?:-|–|—|to)\s*(?:(?:19|20)\d{2}|present|current|now)\b"), 0.75, 4),
+]
+_JD_PATTERNS = [
+    (re.compile(r"\d\+ years"), 0.75, 2),
+]
+
+
+def _score(sample: str) -> Tuple[float, int, float, int]:
+    """(resume score, distinct resume signals, JD score, distinct JD signals) for a lowercased sample."""
+    resume, jd = [0.0, 0], [0.0, 0]
+
+    def _add(side, weight, hits=1):
+        if hits:
+            side[0] += weight * hits
+            side[1] += 1
+
+    resume_leads = jd_leads = 0
+    degree = False
+    headers = set()
+    for line in sample.splitlines():
+        header = line.strip().rstrip(":").strip()
+        if header in _RESUME_HEADERS or header in _JD_HEADERS:
+            if header not in headers:
+                headers.add(header)
+                if header in _RESUME_HEADERS:
+                    _add(resume, _RESUME_HEADERS[header])
+                else:
+                    _add(jd, _JD_HEADERS[header])
+            continue
+        words = line.lstrip(_BULLET_CHARS).split(None, 2)
+        if not words:
+            continue
+        if words[0] in _RESUME_LEADS:
+            resume_leads += 1
+        elif words[0] in _JD_LEADS or " ".join(words[:2]) in _JD_LEADS:
+            jd_leads += 1
+        elif words[0].rstrip(",") in _DEGREE_LEADS:
+            degree = True
+    _add(resume, _LEAD_WEIGHT, min(_LEAD_CAP, resume_leads))
+    _add(jd, _LEAD_WEIGHT, min(_LEAD_CAP, jd_leads))
+    _add(resume, 0.5, int(degree))
+
+    for phrases, side in ((_RESUME_PHRASES, resume), (_JD_PHRASES, jd)):
+        for phrase, weight in phrases.items():
+            _add(side, weight, int(phrase in sample))
+    for patterns, side in ((_RESUME_PATTERNS, resume), (_JD_PATTERNS, jd)):
+        for pattern, weight, cap in patterns:
+            hits = 0
+            for _ in pattern.finditer(sample):
+                hits += 1
+                if hits == cap:
+                    break
+            _add(side, weight, hits)
+    return resume[0], resume[1], jd[0], jd[1]
+
+
+def _local_classify(text: str, sample_chars: int = CLASSIFIER_SAMPLE_CHARS) -> Tuple[str, float, str]:
+    """
+    Scores the first `sample_chars` of a document for resume and JD signals (section headers,
+    contact details, date ranges, recruiting phrases). Returns (label, confidence, reasoning).
+    Confidence grows with the winning side's share of the evidence and with how much evidence
+    there is, so a short or ambiguous sample stays below the gating threshold.
+    """
+    sample = (text or "")[:sample_chars].lower()
+    resume_score, resume_kinds, jd_score, jd_kinds = _score(sample)
+    if resume_score == jd_score:
+        return "Other", 0.0, f"No clear local signal (resume {resume_score:.2f} vs JD {jd_score:.2f})."
+
+    label, winner, loser, kinds = (
+        ("Resume", resume_score, jd_score, resume_kinds) if resume_score > jd_score
+        else ("Job Description", jd_score, resume_score, jd_kinds)
+    )
+    share = winner / (winner + loser)
+    # Saturates around 6 points of evidence; a lone signal can't carry a document
+    support = 1.0 - math.exp(-winner / 2.5) if kinds >= 2 else 0.3
+    confidence = round(share * support, 3)
+    reasoning = (f"Local classifier: {label} signals {winner:.2f} vs {loser:.2f} "
+                 f"in the first {len(sample)} characters.")
+    return label, confidence, reasoning
+
+
 class DocumentClassifierAgent(BaseAgent):
     """
     Agent responsible for classifying document types using Google Gemini.
     """
     def __init__(self):
         super().__init__(AgentType.CLASSIFIER)
-        if genai:
-            # keep your existing fast model
-            self.llm_model = genai.GenerativeModel("gemini-2.5-flash-lite")
-        else:
-            self.llm_model = None
         self.supported_doc_types = SUPPORTED
 
     async def _call_llm(self, system_prompt: str, user_prompt: str, retries: int = 2) -> Any:
         """
-        Call Gemini with small exponential backoff. Keeps your MIME type = JSON.
+        Call Gemini through the gateway (jittered backoff on transient errors). Keeps your MIME type = JSON.
         """
-        last_err = None
-        for attempt in range(retries + 1):
-            try:
-                return await self.llm_model.generate_content_async(
-                    [system_prompt, user_prompt],
-                    generation_config={
-                        "response_mime_type": "application/json",
-                        "temperature": 0.0,
-                        "max_output_tokens": 1024
-                    },
-                    safety_settings=GEMINI_SAFETY_SETTINGS
+        return await llm_gateway.gemini(
+            MODEL_NAME,
+            [system_prompt, user_prompt],
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0.0,
+                "max_output_tokens": 1024
+            },
+            safety_settings=GEMINI_SAFETY_SETTINGS,
+            task="classify",
+            prompt_version=self.prompt_version,
+            retries=retries,
+        )
+
+    def _local_result(self, context: DocumentContext, label: str, confidence: float, reasoning: str, source: str) -> AgentResult:
+        return AgentResult(
+            agent_type=self.agent_type,
+            success=True,
+            data={
+                "primary_classification": label,
+                "confidence": confidence,
+                "reasoning": reasoning,
+                "file_type": getattr(context, "file_type", None),
+                "llm_model_used": source,
+            },
+            confidence=confidence,
+            processing_time=0.0
+        )
+
+    def record_decision(self, result: AgentResult) -> None:
+        metrics.CLASSIFIER_DECISIONS.labels(source=result.data["llm_model_used"]).inc()
+
+    def local_result(self, context: DocumentContext) -> Optional[AgentResult]:
+        """
+        Classifies without the LLM when it can: a type the caller declared in metadata wins
+        unless the text confidently says otherwise, then a confident local score. None means
+        the LLM should decide.
+        """
+        if not CLASSIFIER_GATING_ENABLED or not context.content or len(context.content.strip()) < 50:
+            return None
+        label, confidence, reasoning = _local_classify(context.content)
+        declared = _normalize_label((context.metadata or {}).get("doc_type") or "")
+        if declared != "Other":
+            if label == declared or confidence < CLASSIFIER_LOCAL_THRESHOLD:
+                return self._local_result(
+                    context, declared, max(CLASSIFIER_DECLARED_CONFIDENCE, confidence if label == declared else 0.0),
+                    f"Document type declared by the caller. {reasoning}", "declared",
                 )
-            except Exception as e:
-                last_err = e
-                # small backoff: 0.2s, 0.4s, 0.8s
-                await asyncio.sleep(0.2 * (2 ** attempt))
-        raise last_err
+            self.logger.warning(f"Declared doc_type '{declared}' contradicts local classification '{label}'; asking the LLM.")
+            return None
+        if confidence >= CLASSIFIER_LOCAL_THRESHOLD:
+            return self._local_result(context, label, confidence, reasoning, "local")
+        return None
 
     async def process(self, context: DocumentContext) -> AgentResult:
-        """Classify the document using Gemini based on its content."""
-        if not self.llm_model:
+        """Classify the document from declared metadata or local signals, falling back to Gemini."""
+        gated = self.local_result(context)
+        if gated is not None:
+            self.record_decision(gated)
+            return gated
+
+        if not llm_gateway.gemini_available:
             raise RuntimeError("Gemini client not initialized. Check GOOGLE_API_KEY.")
 
         try:
@@ -134,7 +297,7 @@ class DocumentClassifierAgent(BaseAgent):
                           "confidence": 0.15,
                           "reasoning": "Input content was empty or too short.",
                           "file_type": getattr(context, "file_type", None),
-                          "llm_model_used": "gemini-2.5-flash-lite"},
+                          "llm_model_used": MODEL_NAME},
                     confidence=1,
                     processing_time=0.0
                 )
@@ -171,6 +334,7 @@ class DocumentClassifierAgent(BaseAgent):
                 # fallback: heuristic classification instead of failing
                 self.logger.warning(f"LLM JSON parse failed, using heuristic fallback: {parse_err}")
                 guessed = _heuristic_classify(context.content)
+                metrics.CLASSIFIER_DECISIONS.labels(source="fallback").inc()
                 return AgentResult(
                     agent_type=self.agent_type,
                     success=True,
@@ -179,7 +343,7 @@ class DocumentClassifierAgent(BaseAgent):
                         "confidence": 0.35 if guessed != "Other" else 0.25,
                         "reasoning": "LLM returned non-JSON. Applied heuristic fallback based on document cues.",
                         "file_type": getattr(context, "file_type", None),
-                        "llm_model_used": "gemini-2.5-flash-lite",
+                        "llm_model_used": MODEL_NAME,
                         "raw_llm_output": raw_text[:2000],  # truncated for debug
                     },
                     confidence=0.35 if guessed != "Other" else 0.25,
@@ -202,6 +366,7 @@ class DocumentClassifierAgent(BaseAgent):
 
             reasoning = llm_output.get("reasoning", "")
 
+            metrics.CLASSIFIER_DECISIONS.labels(source="llm").inc()
             return AgentResult(
                 agent_type=self.agent_type,
                 success=True,
@@ -210,7 +375,7 @@ class DocumentClassifierAgent(BaseAgent):
                     "confidence": confidence,
                     "reasoning": reasoning,
                     "file_type": getattr(context, "file_type", None),
-                    "llm_model_used": "gemini-2.5-flash-lite"
+                    "llm_model_used": MODEL_NAME
                 },
                 confidence=confidence,
                 processing_time=0.0
@@ -221,6 +386,7 @@ class DocumentClassifierAgent(BaseAgent):
             self.logger.error(f"Gemini-based classification failed: {str(e)}", exc_info=True)
             # Soft-land with heuristic to avoid breaking downstream agents
             guessed = _heuristic_classify(getattr(context, "content", "") or "")
+            metrics.CLASSIFIER_DECISIONS.labels(source="fallback").inc()
             return AgentResult(
                 agent_type=self.agent_type,
                 success=True,  # keep pipeline moving
@@ -229,7 +395,7 @@ class DocumentClassifierAgent(BaseAgent):
                     "confidence": 0.25,
                     "reasoning": f"Fallback due to error: {e}",
                     "file_type": getattr(context, "file_type", None),
-                    "llm_model_used": "gemini-2.5-flash-lite"
+                    "llm_model_used": MODEL_NAME
                 },
                 confidence=0.25,
                 processing_time=0.0
@@ -238,10 +404,12 @@ class DocumentClassifierAgent(BaseAgent):
     def get_capabilities(self) -> Dict[str, Any]:
         return {
             "name": "LLM-Powered Document Classifier (Gemini)",
-            "description": "Classifies documents into predefined categories using advanced LLM semantic understanding.",
+            "description": "Classifies documents into predefined categories, using Gemini only when the declared "
+                           "type and local signals aren't conclusive.",
             "supported_types": self.supported_doc_types,
             "features": [
                 "LLM-based semantic classification",
+                "Local gating on declared doc_type and header/contact/date signals",
                 "Confidence scoring (LLM-derived)",
                 "Transparent reasoning from LLM",
                 "Flexible classification across diverse document types"
@@ -0,0 +1,193 @@
+# AIService/agents/combined_analysis_agent.py
+
+import os
+import logging
+from typing import Dict, Any
+
+from agents.base import BaseAgent, AgentType, AgentResult, DocumentContext
+from agents.classifier_agent import SUPPORTED, _normalize_label
+from agents.entity_extractor_agent import ENTITY_SCHEMA, _coerce_entities, _entity_summary
+from services import metrics
+from services.utils import _safe_json
+from services.llm_gateway import llm_gateway
+from services.prompt_builder import compact_json, estimate_tokens
+from services.section_splitter import split_on_headers
+
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-2.5-flash-lite"
+
+GEMINI_SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+]
+
+# --- Tunables ---
+DOCUMENT_FAST_PATH_ENABLED = os.getenv("DOCUMENT_FAST_PATH_ENABLED", "true").lower() == "true"
+# Documents estimated at or under this many tokens (about two resume pages) take the single-call path
+DOCUMENT_FAST_PATH_MAX_TOKENS = int(os.getenv("DOCUMENT_FAST_PATH_MAX_TOKENS", "3000"))
+# A model classification below this confidence counts as ambiguous and goes to the multi-agent path
+DOCUMENT_FAST_PATH_MIN_CONFIDENCE = float(os.getenv("DOCUMENT_FAST_PATH_MIN_CONFIDENCE", "0.6"))
+
+
+class CombinedAnalysisAgent(BaseAgent):
+    """
+    Classifies a short document, finds its sections and extracts its entities with at most
+    one LLM call. Whatever the classifier and layout agents can decide locally (declared
+    type, confident heuristics, PDF headings, header rules) is taken from them; the call
+    asks only for the rest, and for sections it asks for the header lines rather than the
+    section text, which is then split locally.
+
+    The result's data holds the classifier, layout and entity results under "results", or
+    a "fallback_reason" when the document should go through the multi-agent path instead
+    (too long, ambiguous classification, unusable output).
+    """
+
+    def __init__(self, classifier: BaseAgent, layout: BaseAgent):
+        super().__init__(AgentType.DOCUMENT_ANALYZER)
+        self.classifier = classifier
+        self.layout = layout
+
+    def should_process(self, context: DocumentContext) -> bool:
+        return DOCUMENT_FAST_PATH_ENABLED and 0 < estimate_tokens(context.content) <= DOCUMENT_FAST_PATH_MAX_TOKENS
+
+    async def _call_llm(self, system_prompt: str, user_prompt: str, retries: int = 2):
+        """Call Gemini through the gateway, which retries transient 500s."""
+        return await llm_gateway.gemini(
+            MODEL_NAME,
+            [system_prompt, user_prompt],
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0.0,
+                "max_output_tokens": 2048,
+            },
+            safety_settings=GEMINI_SAFETY_SETTINGS,
+            task="analyze_document",
+            prompt_version=self.prompt_version,
+            validate=lambda output: isinstance(output, dict),
+            retries=retries,
+        )
+
+    def _prompts(self, context: DocumentContext, need_classification: bool, need_sections: bool, doc_type: str):
+        fields = []
+        if need_classification:
+            fields.append(
+                f'"primary_classification": one of {", ".join(SUPPORTED)}; "confidence": float between 0.0 and 1.0'
+            )
+        if need_sections:
+            fields.append(
+                '"section_headers": the section header lines exactly as they appear in the document, in order '
+                "(headers only, never the section text)"
+            )
+        fields.append(f'"entities": an object following this schema:\n{compact_json(ENTITY_SCHEMA)}')
+
+        system_prompt = (
+            "You are an expert document analysis AI for resumes and job descriptions. "
+            "Return ONLY one valid JSON object; no code fences, no explanations."
+        )
+        job_title = context.metadata.get("job_title")
+        if doc_type == "Job Description" and job_title:
+            company_name = context.metadata.get("company_name", "the company")
+            system_prompt += f" You are analyzing a job description for the role '{job_title}' at '{company_name}'."
+
+        user_prompt = (
+            "Analyze the following document. "
+            "If it's a resume, focus entities on experiences, skills, projects, education. "
+            "If it's a job description, focus on required skills, responsibilities, and company details. "
+            "Return a JSON object with these keys:\n- " + "\n- ".join(fields) +
+            f"\n\nDocument content:\n```\n{context.content}\n```"
+        )
+        return system_prompt, user_prompt
+
+    def _fallback(self, reason: str) -> AgentResult:
+        self.logger.info(f"Single-call analysis not used: {reason}")
+        metrics.DOCUMENT_FAST_PATH.labels(outcome="fallback").inc()
+        return AgentResult(
+            agent_type=self.agent_type, success=True, data={"results": [], "fallback_reason": reason},
+            confidence=0.0, processing_time=0.0,
+        )
+
+    async def process(self, context: DocumentContext) -> AgentResult:
+        classification = self.classifier.local_result(context)
+        layout = self.layout.local_result(context)
+        decided_locally = [(agent, result) for agent, result in
+                           ((self.classifier, classification), (self.layout, layout)) if result is not None]
+        if not llm_gateway.gemini_available:
+            return self._fallback("Gemini client not initialized")
+
+        doc_type = (classification.data["primary_classification"] if classification
+                    else context.metadata.get("doc_type", "professional document"))
+        system_prompt, user_prompt = self._prompts(context, classification is None, layout is None, doc_type)
+        response = await self._call_llm(system_prompt, user_prompt, retries=2)
+
+        raw_text = getattr(response, "text", "") or ""
+        try:
+            output = _safe_json(raw_text)
+        except Exception as e:
+            return self._fallback(f"unparseable model output ({e})")
+        if not isinstance(output, dict):
+            return self._fallback("model output is not a JSON object")
+
+        if classification is None:
+            try:
+                confidence = max(0.0, min(1.0, float(output.get("confidence", 0.0))))
+            except (TypeError, ValueError):
+                confidence = 0.0
+            label = _normalize_label(output.get("primary_classification") or "")
+            if confidence < DOCUMENT_FAST_PATH_MIN_CONFIDENCE:
+                return self._fallback(f"ambiguous classification ({label}, {confidence:.2f})")
+            metrics.CLASSIFIER_DECISIONS.labels(source="llm").inc()
+            classification = AgentResult(
+                agent_type=AgentType.CLASSIFIER, success=True,
+                data={"primary_classification": label, "confidence": confidence,
+                      "reasoning": "Classified together with sections and entities in a single call.",
+                      "file_type": context.file_type, "llm_model_used": MODEL_NAME},
+                confidence=confidence, processing_time=0.0,
+            )
+
+        if layout is None:
+            headers = output.get("section_headers")
+            sections = split_on_headers(context.content, headers if isinstance(headers, list) else [])
+            if len(sections) < 2:
+                return self._fallback("section headers not found in the document")
+            metrics.LAYOUT_DECISIONS.labels(source="llm").inc()
+            layout = AgentResult(
+                agent_type=AgentType.LAYOUT_ANALYZER, success=True,
+                data={"sections": sections, "llm_model_used": MODEL_NAME}, confidence=1.0, processing_time=0.0,
+            )
+
+        entities = _coerce_entities(output.get("entities"))
+        if not any(entities.values()):
+            return self._fallback("no entities extracted")
+        extraction = AgentResult(
+            agent_type=AgentType.ENTITY_EXTRACTOR, success=True,
+            data={"entities": entities, "summary": _entity_summary(entities),
+                  "document_classification": classification.data.get("primary_classification"),
+                  "llm_model_used": MODEL_NAME},
+            confidence=0.95, processing_time=0.0,
+        )
+
+        for agent, result in decided_locally:
+            agent.record_decision(result)
+        metrics.DOCUMENT_FAST_PATH.labels(outcome="used").inc()
+        return AgentResult(
+            agent_type=self.agent_type, success=True,
+            data={"results": [classification.to_dict(), layout.to_dict(), extraction.to_dict()]},
+            confidence=min(classification.confidence, layout.confidence, extraction.confidence),
+            processing_time=0.0,
+        )
+
+    def get_capabilities(self) -> Dict[str, Any]:
+        return {
+            "name": "Single-Call Document Analyzer",
+            "description": "Classification, sections and entities of a short document from one structured LLM "
+                           "call, reusing whatever the classifier and layout agents can decide locally.",
+            "input_requirements": [f"Documents up to ~{DOCUMENT_FAST_PATH_MAX_TOKENS} tokens"],
+            "output_format": "Classifier, layout and entity extractor results",
+            "model": MODEL_NAME,
+        }
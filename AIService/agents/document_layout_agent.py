@@ -4,21 +4,26 @@ import os
 import json
 import logging
 import re
-import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
-import google.generativeai as genai
-from agents.base import BaseAgent, AgentType, AgentResult, DocumentContext
-from services.utils import _safe_json
+from agents.base import BaseAgent, AgentType, AgentResult, DocumentContext, LAYOUT_SECTIONS_KEY
+from services import metrics
+from services.utils import _safe_json, gather_bounded
+from services.llm_gateway import llm_gateway
+from services.section_splitter import split_sections
 
 logger = logging.getLogger(__name__)
 
-# --- Standard Gemini Configuration ---
-try:
-    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
-except KeyError:
-    logger.warning("GOOGLE_API_KEY not found. The agent will not work.")
-    genai = None
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+# Split on recognized header lines first and only ask the LLM for layouts the rules can't read
+LAYOUT_RULES_ENABLED = os.getenv("LAYOUT_RULES_ENABLED", "true").lower() == "true"
+# Rule-based split confidence at or above which the LLM call is skipped
+LAYOUT_RULES_THRESHOLD = float(os.getenv("LAYOUT_RULES_THRESHOLD", "0.7"))
+# Chunks of a long document sent to the LLM at once (the gateway's limiters still apply)
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "4"))
 
 GEMINI_SAFETY_SETTINGS = [
     {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
@@ -60,35 +65,29 @@ def _merge_sections(a: Dict[str, str], b: Dict[str, str]) -> Dict[str, str]:
 
 class DocumentLayoutAgent(BaseAgent):
     """
-    Identifies logical sections of a document using a fast LLM.
+    Identifies logical sections of a document: from PDF headings found during text
+    extraction, else by header rules when they are confident, else with a fast LLM.
     Robust to transient 500s and non-JSON outputs.
     """
 
     def __init__(self):
         super().__init__(AgentType.LAYOUT_ANALYZER)
-        if genai:
-            self.llm_model = genai.GenerativeModel(MODEL_NAME)
-        else:
-            self.llm_model = None
 
     async def _call_llm(self, system_prompt: str, user_prompt: str, retries: int = 2):
-        """Call Gemini with small exponential backoff to ride out sporadic 500s."""
-        last_err = None
-        for attempt in range(retries + 1):
-            try:
-                return await self.llm_model.generate_content_async(
-                    [system_prompt, user_prompt],
-                    generation_config={
-                        "response_mime_type": "application/json",
-                        "temperature": 0.0,
-                        "max_output_tokens": 2048,  # keep reasonable; large values can trigger 500s
-                    },
-                    safety_settings=GEMINI_SAFETY_SETTINGS,
-                )
-            except Exception as e:
-                last_err = e
-                await asyncio.sleep(0.25 * (2 ** attempt))  # 250ms, 500ms
-        raise last_err
+        """Call Gemini through the gateway, which retries sporadic 500s with backoff."""
+        return await llm_gateway.gemini(
+            MODEL_NAME,
+            [system_prompt, user_prompt],
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0.0,
+                "max_output_tokens": 2048,  # keep reasonable; large values can trigger 500s
+            },
+            safety_settings=GEMINI_SAFETY_SETTINGS,
+            task="layout_sections",
+            prompt_version=self.prompt_version,
+            retries=retries,
+        )
 
     async def _analyze_one(self, content: str) -> Dict[str, str]:
         system_prompt = (
@@ -119,22 +118,61 @@ class DocumentLayoutAgent(BaseAgent):
         normalized = {str(k): (str(v) if v is not None else "") for k, v in sections.items()}
         return normalized
 
+    def record_decision(self, result: AgentResult) -> None:
+        source = "extraction" if result.data.get("llm_model_used") == "pdf-layout" else "rules"
+        metrics.LAYOUT_DECISIONS.labels(source=source).inc()
+
+    def local_result(self, context: DocumentContext) -> Optional[AgentResult]:
+        """Sections from the PDF's headings found during extraction, else from confident header rules; None otherwise."""
+        extracted = (context.metadata or {}).get(LAYOUT_SECTIONS_KEY)
+        if extracted and len(extracted) > 1:
+            # Sections rebuilt from the PDF's own headings during text extraction
+            return AgentResult(
+                agent_type=self.agent_type,
+                success=True,
+                data={"sections": dict(extracted), "llm_model_used": "pdf-layout"},
+                confidence=1.0,
+                processing_time=0.0,
+            )
+
+        if LAYOUT_RULES_ENABLED:
+            split = split_sections(context.content or "")
+            if split.confidence >= LAYOUT_RULES_THRESHOLD and len(split.sections) > 1:
+                return AgentResult(
+                    agent_type=self.agent_type,
+                    success=True,
+                    data={"sections": split.sections, "llm_model_used": "rules", "rules_confidence": split.confidence},
+                    confidence=split.confidence,
+                    processing_time=0.0,
+                )
+            self.logger.info(
+                f"Rule-based split not confident ({split.confidence:.2f}, {split.known_headers} known / "
+                f"{split.shape_headers} unrecognized headers); using the LLM."
+            )
+        return None
+
     async def process(self, context: DocumentContext) -> AgentResult:
-        if not self.llm_model:
+        local = self.local_result(context)
+        if local is not None:
+            self.record_decision(local)
+            return local
+
+        if not llm_gateway.gemini_available:
             raise RuntimeError("Gemini API key not configured.")
 
         try:
             content = context.content or ""
             chunks = _chunk(content, max_chars=9000)
 
+            # Chunks run concurrently; merging in document order keeps section text in sequence
             merged_sections: Dict[str, str] = {}
-            for ch in chunks:
-                part = await self._analyze_one(ch)
+            for part in await gather_bounded(self._analyze_one, chunks, CHUNK_CONCURRENCY):
                 merged_sections = _merge_sections(merged_sections, part)
 
             if not merged_sections:
                 merged_sections = {"full_content": content}
 
+            metrics.LAYOUT_DECISIONS.labels(source="llm" if set(merged_sections) != {"full_content"} else "fallback").inc()
             return AgentResult(
                 agent_type=self.agent_type,
                 success=True,
@@ -144,6 +182,7 @@ class DocumentLayoutAgent(BaseAgent):
             )
         except Exception as e:
             self.logger.error(f"Document layout analysis failed: {e}", exc_info=True)
+            metrics.LAYOUT_DECISIONS.labels(source="fallback").inc()
             return AgentResult(
                 agent_type=self.agent_type,
                 success=True,  # keep pipeline moving with a safe fallback
@@ -155,7 +194,8 @@ class DocumentLayoutAgent(BaseAgent):
     def get_capabilities(self) -> Dict[str, Any]:
         return {
             "name": "LLM-Powered Document Layout Analyzer",
-            "description": "Intelligently splits a document into logical sections using a fast LLM.",
+            "description": "Splits a document into logical sections on recognized headers, falling back to a "
+                           "fast LLM for unusual layouts.",
             "input_requirements": ["Full text content of a document"],
             "output_format": "JSON object of document sections",
             "model": MODEL_NAME,
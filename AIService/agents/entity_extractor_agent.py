@@ -2,29 +2,22 @@
 
 from typing import Dict, Any, List
 from agents.base import BaseAgent, AgentType, AgentResult, DocumentContext
-from services.utils import _safe_json
+from services.utils import _safe_json, gather_bounded
+from services.llm_gateway import llm_gateway
+from services.prompt_builder import compact_json
 import os
-import json
 import logging
-import asyncio
 
 from dotenv import load_dotenv
 load_dotenv()
 
-# Google Generative AI client
-import google.generativeai as genai
-
 logger = logging.getLogger(__name__)
 
-# --- Init Gemini ---
-try:
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise KeyError("GOOGLE_API_KEY not found in environment variables.")
-    genai.configure(api_key=api_key)
-except KeyError as e:
-    logger.warning(f"{e} The agent will not work.")
-    genai = None
+MODEL_NAME = "gemini-2.5-flash-lite"
+
+# --- Tunables ---
+# Chunks of a long document sent to the LLM at once (the gateway's limiters still apply)
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "4"))
 
 # --- Safety settings (unchanged) ---
 GEMINI_SAFETY_SETTINGS = [
@@ -72,6 +65,26 @@ def _merge_entities(base: Dict[str, Any], add: Dict[str, Any]) -> Dict[str, Any]
         merged[k] = _dedup_list((merged.get(k, []) or []) + (add.get(k, []) or []))
     return merged
 
+def _coerce_entities(obj: Any) -> Dict[str, Any]:
+    """A well-formed, deduplicated entity dict from parsed model output (missing or bad keys become [])."""
+    out = _blank_entities()
+    if not isinstance(obj, dict):
+        return out
+    for k in DEFAULT_KEYS:
+        v = obj.get(k, [])
+        out[k] = _dedup_list(v) if isinstance(v, list) else []
+    return out
+
+def _entity_summary(entities: Dict[str, Any]) -> Dict[str, Any]:
+    counted = [k for k in DEFAULT_KEYS if k not in ["achievements", "requirements"]]
+    return {
+        "total_extracted_entities": sum(len(entities[k]) for k in counted),
+        "entity_counts": {k: len(entities[k]) for k in counted},
+        "technical_skills_found": len(entities.get("skills", [])) > 0,
+        "achievements_found": len(entities.get("achievements", [])) > 0,
+        "requirements_found": len(entities.get("requirements", [])) > 0,
+    }
+
 def _chunk(text: str, max_chars: int = 9000) -> List[str]:
     """Split very long docs into chunks on paragraph boundaries to avoid model limits."""
     if not text or len(text) <= max_chars:
@@ -88,32 +101,27 @@ def _chunk(text: str, max_chars: int = 9000) -> List[str]:
 class EntityExtractorAgent(BaseAgent):
     """LLM-based entity extraction with robust JSON handling & retries."""
 
+    prompt_version = "2"  # compact schema JSON
+
     def __init__(self):
         super().__init__(AgentType.ENTITY_EXTRACTOR)
-        if genai:
-            self.llm_model = genai.GenerativeModel("gemini-2.5-flash-lite")
-        else:
-            self.llm_model = None
 
     async def _call_llm(self, system_prompt: str, user_prompt: str, retries: int = 2):
-        """Call Gemini with a couple of short retries to ride out 500s."""
-        last_err = None
-        for attempt in range(retries + 1):
-            try:
-                return await self.llm_model.generate_content_async(
-                    [system_prompt, user_prompt],
-                    generation_config={
-                        "response_mime_type": "application/json",
-                        "temperature": 0.0,
-                        # Keep this reasonable; huge limits can trigger server errors
-                        "max_output_tokens": 2048,
-                    },
-                    safety_settings=GEMINI_SAFETY_SETTINGS
-                )
-            except Exception as e:
-                last_err = e
-                await asyncio.sleep(0.25 * (2 ** attempt))  # 250ms, 500ms
-        raise last_err
+        """Call Gemini through the gateway, which retries transient 500s."""
+        return await llm_gateway.gemini(
+            MODEL_NAME,
+            [system_prompt, user_prompt],
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0.0,
+                # Keep this reasonable; huge limits can trigger server errors
+                "max_output_tokens": 2048,
+            },
+            safety_settings=GEMINI_SAFETY_SETTINGS,
+            task="extract_entities",
+            prompt_version=self.prompt_version,
+            retries=retries,
+        )
 
     async def _extract_one(self, content: str, doc_type: str, job_title: str, company_name: str) -> Dict[str, Any]:
         system_prompt = (
@@ -129,7 +137,7 @@ class EntityExtractorAgent(BaseAgent):
             "If it's a resume, focus on experiences, skills, projects, education. "
             "If it's a job description, focus on required skills, responsibilities, and company details. "
             "Provide a JSON object that follows this schema:\n"
-            f"{json.dumps(ENTITY_SCHEMA, indent=2)}\n\n"
+            f"{compact_json(ENTITY_SCHEMA)}\n\n"
             f"Document content:\n```\n{content}\n```"
         )
 
@@ -154,18 +162,11 @@ class EntityExtractorAgent(BaseAgent):
             logger.warning(f"Entity extractor: JSON parse failed, returning empty set. Err={e}")
             return _blank_entities()
 
-        # Fill missing keys as empty lists
-        out = _blank_entities()
-        for k in DEFAULT_KEYS:
-            v = obj.get(k, [])
-            out[k] = v if isinstance(v, list) else []
-        # Dedup each list
-        for k in DEFAULT_KEYS:
-            out[k] = _dedup_list(out[k])
-        return out
+        # Fill missing keys as empty lists and dedup each list
+        return _coerce_entities(obj)
 
     async def process(self, context: DocumentContext) -> AgentResult:
-        if not self.llm_model:
+        if not llm_gateway.gemini_available:
             raise RuntimeError("Gemini client not initialized. Check GOOGLE_API_KEY.")
 
         try:
@@ -177,13 +178,13 @@ class EntityExtractorAgent(BaseAgent):
             # Chunk long docs to reduce 500s; merge results deterministically
             chunks = _chunk(content, max_chars=9000)
 
+            parts = await gather_bounded(
+                lambda chunk: self._extract_one(chunk, doc_type, job_title, company_name), chunks, CHUNK_CONCURRENCY
+            )
             merged = _blank_entities()
-            for chunk in chunks:
-                part = await self._extract_one(chunk, doc_type, job_title, company_name)
+            for part in parts:
                 merged = _merge_entities(merged, part)
 
-            # Basic counts
-            total_entities = sum(len(merged[k]) for k in DEFAULT_KEYS if k not in ["achievements", "requirements"])
             doc_classification = None
             if AgentType.CLASSIFIER in context.previous_results:
                 doc_classification = context.previous_results[AgentType.CLASSIFIER].data.get("primary_classification")
@@ -193,15 +194,9 @@ class EntityExtractorAgent(BaseAgent):
                 success=True,
                 data={
                     "entities": merged,
-                    "summary": {
-                        "total_extracted_entities": total_entities,
-                        "entity_counts": {k: len(merged[k]) for k in DEFAULT_KEYS if k not in ["achievements", "requirements"]},
-                        "technical_skills_found": len(merged.get("skills", [])) > 0,
-                        "achievements_found": len(merged.get("achievements", [])) > 0,
-                        "requirements_found": len(merged.get("requirements", [])) > 0,
-                    },
+                    "summary": _entity_summary(merged),
                     "document_classification": doc_classification,
-                    "llm_model_used": "gemini-2.5-flash-lite",
+                    "llm_model_used": MODEL_NAME,
                 },
                 confidence=0.95,
                 processing_time=0.0
@@ -224,7 +219,7 @@ class EntityExtractorAgent(BaseAgent):
                         "requirements_found": False
                     },
                     "document_classification": None,
-                    "llm_model_used": "gemini-2.5-flash-lite"
+                    "llm_model_used": MODEL_NAME
                 },
                 confidence=1.0,
                 processing_time=0.0
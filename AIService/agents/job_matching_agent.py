@@ -1,25 +1,24 @@
 # AIService/agents/job_matching_agent_optimized.py
 
-import os
 import json
 import logging
-import asyncio
 from typing import Dict, Any, List, Union
-import google.generativeai as genai
-from anthropic import AsyncAnthropic
-from agents.base import BaseAgent, AgentType, AgentResult, DocumentContext
+from agents.base import BaseAgent, AgentType, AgentResult, AgentTask, DocumentContext
 from services.utils import _safe_json
+from services.llm_gateway import llm_gateway
+from services.prompt_builder import compact_json, project
+from services.hedging import hedged, hedge_after
 
 logger = logging.getLogger(__name__)
 
-# Configure API clients
-try:
-    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
-    anthropic_client = AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-except KeyError as e:
-    logger.warning(f"API key not found: {e}")
-    genai = None
-    anthropic_client = None
+MODEL_NAMES = {
+    # Fast models for scoring and strengths
+    "gemini_flash_lite": "gemini-2.5-flash-lite",
+    "gemini_flash": "gemini-2.5-flash",
+    # Higher quality for improvement analysis
+    "gemini_pro": "gemini-2.5-pro",
+    "claude_sonnet": "claude-4-sonnet-20250514",
+}
 
 GEMINI_SAFETY_SETTINGS = [
     {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
@@ -32,33 +31,29 @@ class JobMatchingAgent(BaseAgent):
     Optimized JobMatching agent using different models for different tasks in parallel.
     """
 
+    prompt_version = "3"  # compact JSON; the strength summary only gets the map keys it reads
+
+    # Relationship map keys the strength summary is written from. The score prompt gets the whole map,
+    # empty lists included: no gaps, or no mapped skills, is evidence the score depends on.
+    STRENGTH_SUMMARY_FIELDS = ("strong_points_in_resume", "matched_experience_to_responsibilities")
+
     def __init__(self):
         super().__init__(AgentType.JOB_MATCHER)
-        
-        if genai and anthropic_client:
-            self.models = {
-                # Fast models for scoring and strengths
-                "gemini_flash_lite": genai.GenerativeModel(
-                    "gemini-2.5-flash-lite",
-                    safety_settings=GEMINI_SAFETY_SETTINGS
-                ),
-                # Higher quality for improvement analysis
-                "gemini_pro": genai.GenerativeModel(
-                    "gemini-2.5-pro", 
-                    safety_settings=GEMINI_SAFETY_SETTINGS
-                ),
-                "anthropic_client": anthropic_client
-            }
-            
-            # Task assignments
-            self.task_models = {
-                "calculate_match_score": "claude_sonnet",      # Fast scoring
-                "generate_strength_summary": "gemini_flash_lite",  # Fast strengths summary
-            }
-        else:
-            self.models = None
-            self.task_models = None
-            
+
+        # Task assignments; clients live in the shared LLM gateway
+        self.task_models = {
+            "calculate_match_score": "claude_sonnet",      # Fast scoring
+            "generate_strength_summary": "gemini_flash_lite",  # Fast strengths summary
+        }
+        # Past the soft deadline (seconds), race an alternate model from the other provider
+        self.hedge_models = {
+            "calculate_match_score": ("gemini_flash", 6.0),
+            "generate_strength_summary": ("claude_sonnet", 4.0),
+        }
+
+    @property
+    def models_available(self) -> bool:
+        return llm_gateway.gemini_available and llm_gateway.anthropic_available
 
     def _normalize_response_data(self, data: Any) -> Union[List, Dict, float, str]:
         """Ensure data is in expected format"""
@@ -66,21 +61,23 @@ class JobMatchingAgent(BaseAgent):
             return []
         return data
 
-    async def _call_gemini_model(self, model_name: str, prompt: str) -> Any:
+    async def _call_gemini_model(self, model_name: str, prompt: str, task: str = None) -> Any:
         """Call Gemini models with error handling"""
-        print(f"[DEBUG] Gemini model {model_name} started")
+        self.logger.debug(f"Gemini model {model_name} started")
         try:
-            model = self.models[model_name]
-            response = await model.generate_content_async(
+            response = await llm_gateway.gemini(
+                MODEL_NAMES[model_name],
                 prompt,
                 generation_config={
                     "response_mime_type": "application/json",
                     "temperature": 0.0,
                     "max_output_tokens": 1000
                 },
-                safety_settings=GEMINI_SAFETY_SETTINGS
+                safety_settings=GEMINI_SAFETY_SETTINGS,
+                task=task,
+                prompt_version=self.prompt_version,
             )
-            print(f"[DEBUG] Gemini model {model_name} finished")
+            self.logger.debug(f"Gemini model {model_name} finished")
             # Handle safety blocks
             if hasattr(response, 'candidates') and response.candidates:
                 candidate = response.candidates[0]
@@ -93,27 +90,25 @@ class JobMatchingAgent(BaseAgent):
                 self.logger.warning(f"No text in Gemini response for {model_name}")
                 return {}
         except Exception as e:
-            print(f"[DEBUG] Gemini model {model_name} failed: {e}")
             self.logger.error(f"Gemini model {model_name} failed: {e}")
             return {}
 
-    async def _call_claude_model(self, model_type: str, prompt: str) -> Any:
+    async def _call_claude_model(self, model_type: str, prompt: str, task: str = None) -> Any:
         """Call Claude models with error handling"""
-        print(f"[DEBUG] Claude model {model_type} started")
+        self.logger.debug(f"Claude model {model_type} started")
         try:
-            client = self.models["anthropic_client"]
-            # Use Claude Sonnet
-            model_name = "claude-4-sonnet-20250514"
-            response = await client.messages.create(
-                model=model_name,
-                max_tokens=1000,
-                temperature=0.0,
-                messages=[{
+            response = await llm_gateway.claude(
+                MODEL_NAMES[model_type],
+                [{
                     "role": "user",
                     "content": prompt + "\n\nRespond ONLY with valid JSON. No markdown, no explanations."
-                }]
+                }],
+                max_tokens=1000,
+                temperature=0.0,
+                task=task,
+                prompt_version=self.prompt_version,
             )
-            print(f"[DEBUG] Claude model {model_type} finished")
+            self.logger.debug(f"Claude model {model_type} finished")
             response_text = response.content[0].text.strip()
             # Clean response
             if response_text.startswith('```'):
@@ -135,22 +130,29 @@ class JobMatchingAgent(BaseAgent):
                 else:
                     return {}
         except Exception as e:
-            print(f"[DEBUG] Claude model {model_type} failed: {e}")
             self.logger.error(f"Claude model {model_type} failed: {e}")
             return {}
 
-    async def _dispatch_to_model(self, task_name: str, prompt: str) -> Any:
-        """Route task to appropriate model"""
-        model_assignment = self.task_models.get(task_name)
-        
-        if model_assignment in ["gemini_flash_lite", "gemini_pro"]:
-            return await self._call_gemini_model(model_assignment, prompt)
+    async def _call_model(self, model_assignment: str, task_name: str, prompt: str) -> Any:
+        if model_assignment in ["gemini_flash", "gemini_flash_lite", "gemini_pro"]:
+            return await self._call_gemini_model(model_assignment, prompt, task=task_name)
         elif model_assignment == "claude_sonnet":
-            return await self._call_claude_model("claude_sonnet", prompt)
+            return await self._call_claude_model("claude_sonnet", prompt, task=task_name)
         else:
             self.logger.error(f"Unknown model assignment for task: {task_name}")
             return {}
 
+    async def _dispatch_to_model(self, task_name: str, prompt: str) -> Any:
+        """Route task to appropriate model, hedging to an alternate one if it's slow or fails"""
+        alternate, after = self.hedge_models.get(task_name, (None, None))
+        return await hedged(
+            lambda: self._call_model(self.task_models.get(task_name), task_name, prompt),
+            (lambda: self._call_model(alternate, task_name, prompt)) if alternate else None,
+            hedge_after(task_name, after),
+            is_valid=bool,  # the model callers return {} on failure
+            task=task_name,
+        )
+
     async def _calculate_match_score(self, resume_content, jd_content, relationship_map: Dict) -> float:
         """Calculate match percentage using fast model"""
 
@@ -174,7 +176,7 @@ class JobMatchingAgent(BaseAgent):
 
             f"--- Resume Content ---\n{resume_content[:5000]}\n\n"
             f"--- Job Description ---\n{jd_content[:5000]}\n\n"
-            f"--- Relationship Map ---\n{json.dumps(relationship_map, indent=2)}\n\n"
+            f"--- Relationship Map ---\n{compact_json(relationship_map)}\n\n"
 
             "Return a valid JSON object with exactly one key 'match_percentage' as an integer from 0 to 100. "
             "No text before or after."
@@ -189,7 +191,7 @@ class JobMatchingAgent(BaseAgent):
         
         prompt = (
             "You are a professional resume writer. Your ONLY task is to write a concise, encouraging 2-3 sentence summary of the candidate's strengths based on the 'strong_points_in_resume' and 'matched_experience_to_responsibilities' from the relationship map.\n\n"
-            f"--- Relationship Map ---\n{json.dumps(relationship_map, indent=2)}\n\n"
+            f"--- Relationship Map ---\n{compact_json(project(relationship_map, self.STRENGTH_SUMMARY_FIELDS))}\n\n"
             "Return ONLY a JSON object with a single key: 'strength_summary'."
         )
 
@@ -197,60 +199,85 @@ class JobMatchingAgent(BaseAgent):
         return result.get("strength_summary", "") if isinstance(result, dict) else ""
 
 
-    # In job_matching_agent.py
+    @staticmethod
+    def _as_percentage(score: Any) -> int:
+        try:
+            return int(round(float(score)))
+        except (TypeError, ValueError):
+            return 0
+
+    def task_inputs(self, context: DocumentContext) -> Dict[str, Any]:
+        inputs = {
+            "resume_content": context.content,  # The original resume content
+            "jd_content": context.metadata.get('job_description', {}).get('content', 'Job Description content not available.'),
+        }
+        # Standalone run: the relationship map comes from an earlier RELATIONSHIP_MAPPER result.
+        # In the combined graph these keys are produced by the mapper's own tasks instead.
+        previous = context.previous_results.get(AgentType.RELATIONSHIP_MAPPER)
+        if previous is not None:
+            relationship_map = previous.data.get("relationship_map", {})
+            if not relationship_map:
+                raise ValueError("Missing relationship map for job matching.")
+            inputs["relationship_map"] = relationship_map
+            inputs["identify_strong_points"] = relationship_map.get("strong_points_in_resume", [])
+            inputs["map_experience"] = relationship_map.get("matched_experience_to_responsibilities", [])
+        return inputs
+
+    def get_tasks(self, context: DocumentContext) -> List[AgentTask]:
+        if not self.models_available:
+            raise RuntimeError("API keys not configured for job matching.")
+
+        async def _score(inputs: Dict[str, Any]) -> int:
+            if not inputs["relationship_map"]:
+                raise ValueError("Missing relationship map for job matching.")
+            score = await self._calculate_match_score(
+                inputs["resume_content"], inputs["jd_content"], inputs["relationship_map"]
+            )
+            return self._as_percentage(score)
+
+        async def _summary(inputs: Dict[str, Any]) -> str:
+            # The summary only reads these two sections, so it doesn't wait for the full map
+            summary = await self._generate_strength_summary({
+                "strong_points_in_resume": inputs["identify_strong_points"],
+                "matched_experience_to_responsibilities": inputs["map_experience"],
+            })
+            return summary if isinstance(summary, str) else ""
+
+        return [
+            AgentTask(
+                name="calculate_match_score", inputs=["resume_content", "jd_content", "relationship_map"],
+                run=_score, default=0, event="match_score",
+                to_event=lambda score: {"overall_match_percentage": score},
+            ),
+            AgentTask(
+                name="generate_strength_summary", inputs=["identify_strong_points", "map_experience"],
+                run=_summary, default="", event="strength_summary",
+                to_event=lambda summary: {"strength_summary": summary},
+            ),
+        ]
+
+    def assemble(self, outputs: Dict[str, Any]) -> AgentResult:
+        # This is the final JSON object your frontend expects
+        return AgentResult(
+            agent_type=self.agent_type,
+            success=True,
+            data={
+                "match_analysis": {"strength_summary": outputs["generate_strength_summary"]},
+                "overall_match_percentage": outputs["calculate_match_score"]
+            },
+            confidence=1.0,
+            processing_time=0  # Placeholder for actual processing time
+        )
 
     async def process(self, context: DocumentContext) -> AgentResult:
-        if not self.models:
+        if not self.models_available:
             raise RuntimeError("API keys not configured for job matching.")
 
         try:
-            resume_content = context.content # The original resume content
-            jd_content = context.metadata.get('job_description', {}).get('content', 'Job Description content not available.')
-            
-            relationship_map = context.previous_results[AgentType.RELATIONSHIP_MAPPER].data.get("relationship_map", {})
-            if not relationship_map:
+            if AgentType.RELATIONSHIP_MAPPER not in context.previous_results:
                 raise ValueError("Missing relationship map for job matching.")
-            
-            # Execute the two required tasks in parallel
-            tasks = [
-                self._calculate_match_score(resume_content, jd_content, relationship_map),
-                self._generate_strength_summary(relationship_map)
-            ]
-
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # --- CORRECTED RESULT HANDLING ---
-            match_percentage = 0
-            strength_summary = ""
-
-            # Process the result for the first task (match_percentage)
-            if not isinstance(results[0], Exception):
-                match_percentage = int(round(float(results[0])))
-            else:
-                self.logger.error(f"Match score task failed: {results[0]}")
-
-            # Process the result for the second task (strength_summary)
-            if not isinstance(results[1], Exception):
-                strength_summary = results[1] if isinstance(results[1], str) else ""
-            else:
-                self.logger.error(f"Strength summary task failed: {results[1]}")
-            
-            # This is the final JSON object your frontend expects
-            final_analysis_output = {
-                "strength_summary": strength_summary
-            }
-            # --- END OF CORRECTION ---
-            
-            return AgentResult(
-                agent_type=self.agent_type,
-                success=True,
-                data={
-                    "match_analysis": final_analysis_output,
-                    "overall_match_percentage": match_percentage
-                },
-                confidence=1.0,
-                processing_time=0  # Placeholder for actual processing time
-            )
+            # Score and summary run in parallel; a failed task falls back to its default
+            return await self._process_tasks(context)
 
         except Exception as e:
             self.logger.error(f"Job matching analysis failed: {e}", exc_info=True)
@@ -268,6 +295,6 @@ class JobMatchingAgent(BaseAgent):
         return {
             "name": "Optimized Parallel Job Matching Agent",
             "description": "Uses different models for scoring, strengths, and improvement analysis in parallel",
-            "models": self.task_models if self.task_models else {},
+            "models": self.task_models,
             "expected_latency": "4-6 seconds"
         }
@@ -1,26 +1,34 @@
 # AIService/agents/orchestrator.py
 
 import logging
-import os, docx
-import uuid, json
-import fitz # PyMuPDF for PDF text extraction
+import os
+import uuid, json, copy
 import asyncio # For async operations - parallel processing
-import io
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 # Add imports for making HTTP requests and handling S3
 import httpx  # A modern, async-friendly HTTP client
-import boto3
 from botocore.exceptions import ClientError
 
-from agents.base import AgentType, DocumentContext, BaseAgent, AgentResult
+from agents.base import (
+    AgentType, DocumentContext, BaseAgent, AgentResult, AgentTask, TaskScheduler,
+    EventCallback, emit_event, LAYOUT_SECTIONS_KEY,
+)
 from agents.classifier_agent import DocumentClassifierAgent
 from agents.entity_extractor_agent import EntityExtractorAgent
 from agents.job_matching_agent import JobMatchingAgent
 from agents.relationship_mapper_agent import RelationshipMapperAgent
 from agents.resume_optimizer_agent import ResumeOptimizerAgent
 from agents.document_layout_agent import DocumentLayoutAgent
+from agents.combined_analysis_agent import CombinedAnalysisAgent
+from services.s3_async import AsyncS3Client
+from services.text_extraction import TextExtractionService
+from services.resume_cache import ResumeCache
+from services.artifact_store import ArtifactStore, content_hash
+from services.jd_cache import JDCache
+from services.tracing import span, propagation_headers
+from services import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +38,10 @@ load_dotenv()
 
 FILES_API_URL = os.getenv("FILES_API_URL") 
 
+# Per-document agents whose results depend only on the document text, so they can be reused
+DOCUMENT_ARTIFACT_AGENTS = (AgentType.CLASSIFIER, AgentType.LAYOUT_ANALYZER, AgentType.ENTITY_EXTRACTOR)
+# Agents whose prompt versions key those results: the single-call analyzer can produce all three
+DOCUMENT_VERSION_AGENTS = DOCUMENT_ARTIFACT_AGENTS + (AgentType.DOCUMENT_ANALYZER,)
 
 
 class DocumentAnalysisOrchestrator:
@@ -43,10 +55,44 @@ class DocumentAnalysisOrchestrator:
         self._initialize_agents()
         # Initialize an async HTTP client to communicate with FileService
         self.http_client = httpx.AsyncClient()
-        # Initialize S3 client for downloading
-        self.s3_client = boto3.client("s3")
+        # Pooled, executor-backed S3 client so downloads never block the event loop
+        self.s3 = AsyncS3Client()
+        # CPU-bound PDF/DOCX parsing runs in a bounded process pool
+        self.text_extractor = TextExtractionService()
+        # FileService metadata + extracted text, revalidated by S3 ETag
+        self.resume_cache = ResumeCache()
+        # Persisted resume-side agent results, keyed by resume text hash + agent versions
+        self.resume_artifacts = ArtifactStore(self.s3, kind="resumes")
+        # Global JD artifacts (exact text, job URL and near-duplicate lookups)
+        self.jd_cache = JDCache(ArtifactStore(self.s3, kind="jds"), ArtifactStore(self.s3, kind="jd_urls"))
+        self._jd_inflight: Dict[str, asyncio.Task] = {}
+        self._background_tasks = set()
         self.logger = logging.getLogger(f"{__name__}.Orchestrator")
 
+    def _spawn(self, coro) -> asyncio.Task:
+        """Fire-and-forget helper that keeps a reference until the task finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def close(self):
+        """Releases the HTTP client and the S3 / extraction worker pools."""
+        await self.http_client.aclose()
+        self.s3.close()
+        self.text_extractor.close()
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters of the orchestrator's caches, keyed by cache name."""
+        jd = self.jd_cache.stats()
+        return {
+            "resume_metadata": self.resume_cache.details.stats(),
+            "resume_text": self.resume_cache.texts.stats(),
+            "resume_artifacts": self.resume_artifacts.memory.stats(),
+            "jd_artifacts": self.jd_cache.store.memory.stats(),
+            "jd_analysis": {"hits": sum(jd["hits"].values()), "misses": jd["misses"]},
+        }
+
     def _initialize_agents(self):
         """Initializes all available agents."""
         self.agents[AgentType.CLASSIFIER] = DocumentClassifierAgent()
@@ -55,38 +101,16 @@ class DocumentAnalysisOrchestrator:
         self.agents[AgentType.RELATIONSHIP_MAPPER] = RelationshipMapperAgent()
         self.agents[AgentType.JOB_MATCHER] = JobMatchingAgent()
         self.agents[AgentType.RESUME_OPTIMIZER] = ResumeOptimizerAgent()
+        self.agents[AgentType.DOCUMENT_ANALYZER] = CombinedAnalysisAgent(
+            self.agents[AgentType.CLASSIFIER], self.agents[AgentType.LAYOUT_ANALYZER]
+        )
 
-    def _extract_text_from_content(self, file_content: bytes, mime_type: str) -> str:
+    async def _extract_text_from_content(self, file_content: bytes, mime_type: str) -> str:
         """
         Extracts plain text from file content (bytes) based on its MIME type.
-        Supports PDF and DOCX.
+        Supports PDF and DOCX. Parsing runs in the extraction process pool.
         """
-        if "pdf" in mime_type:
-            try:
-                pdf_document = fitz.open(stream=io.BytesIO(file_content), filetype="pdf")
-                text = "".join(page.get_text() for page in pdf_document)
-                pdf_document.close()
-                return text
-            except Exception as e:
-                self.logger.error(f"Failed to extract text from PDF: {e}")
-                raise ValueError("Could not extract text from the provided PDF file.")
-
-        elif "wordprocessingml" in mime_type or mime_type.endswith("msword") or mime_type.endswith("vnd.openxmlformats-officedocument.wordprocessingml.document"):
-            try:
-                doc = docx.Document(io.BytesIO(file_content))
-                text = "\n".join([para.text for para in doc.paragraphs])
-                return text
-            except Exception as e:
-                self.logger.error(f"Failed to extract text from DOCX: {e}")
-                raise ValueError("Could not extract text from the provided DOCX file.")
-
-        else:
-            # Try assuming it's plain UTF-8 text
-            try:
-                return file_content.decode('utf-8')
-            except UnicodeDecodeError:
-                self.logger.warning("Could not decode content as UTF-8. Returning raw str().")
-                return str(file_content)
+        return await self.text_extractor.extract(file_content, mime_type)
 
 
     async def _get_resume_details(self, user_id: str, resume_id: str, auth_token: str) -> Dict[str, Any]:
@@ -101,8 +125,12 @@ class DocumentAnalysisOrchestrator:
                 "Authorization": f"Bearer {auth_token}"
             }
             
-            response = await self.http_client.get(file_service_url, headers=headers, timeout=10.0)
-            response.raise_for_status()
+            with span("fileservice.s3-link", resume_id=resume_id) as s:
+                # Carries the request ID so FileService logs and traces line up with ours
+                headers.update(propagation_headers())
+                response = await self.http_client.get(file_service_url, headers=headers, timeout=10.0)
+                s.set_attribute("http.status_code", response.status_code)
+                response.raise_for_status()
             return response.json()
         except httpx.HTTPStatusError as e:
             self.logger.error(f"FileService returned an error: {e.response.status_code} {e.response.text}")
@@ -116,13 +144,18 @@ class DocumentAnalysisOrchestrator:
 
 # ... (inside the DocumentAnalysisOrchestrator class)
 
-    def _download_resume_from_s3(self, bucket_name: str, key: str) -> str:
+    async def _download_resume_from_s3(
+        self, bucket_name: str, key: str, etag: Optional[str] = None
+    ) -> Tuple[Optional[bytes], Optional[str]]:
         """
         Downloads the resume content from S3 given its bucket and key.
+        With a cached `etag` this is a conditional GET that returns (None, etag) if unchanged.
         """
         try:
-            response = self.s3_client.get_object(Bucket=bucket_name, Key=key)
-            return response['Body'].read()
+            return await self.s3.download_if_changed(bucket_name, key, etag)
+        except asyncio.TimeoutError:
+            self.logger.error(f"Timed out downloading s3://{bucket_name}/{key}")
+            raise TimeoutError(f"Timed out downloading resume from S3 path: s3://{bucket_name}/{key}")
         except ClientError as e:
             self.logger.error(f"S3 ClientError downloading s3://{bucket_name}/{key}: {e}")
             raise FileNotFoundError(f"Could not download resume from S3 path: s3://{bucket_name}/{key}")
@@ -130,6 +163,90 @@ class DocumentAnalysisOrchestrator:
             self.logger.error(f"Unexpected error downloading from S3: {e}")
             raise
 
+    async def _fetch_resume_content(
+        self, user_id: str, resume_id: str, auth_token: str, use_cached_details: bool = True
+    ) -> Tuple[Dict[str, Any], str, Optional[Dict[str, str]]]:
+        """
+        Resolves the resume through FileService, downloads it from S3 and extracts its text.
+        Returns the FileService resume details, the extracted text and the sections found
+        from the PDF's headings during extraction (None if there were none).
+
+        FileService metadata and extracted text are cached; the text is revalidated
+        against the S3 ETag on every call, so only changed resumes are re-downloaded.
+        """
+        resume_details = self.resume_cache.get_details(user_id, resume_id) if use_cached_details else None
+        details_from_cache = resume_details is not None
+        if not details_from_cache:
+            resume_details = await self._get_resume_details(user_id, resume_id, auth_token)
+
+        resume_s3_bucket = resume_details.get("s3_bucket")
+        resume_s3_key = resume_details.get("s3_path")
+        resume_mime_type = resume_details.get("mime_type", "application/pdf")
+
+        if not resume_s3_bucket or not resume_s3_key:
+            raise ValueError("Missing S3 bucket or key from FileService response.")
+        self.resume_cache.put_details(user_id, resume_id, resume_details)
+
+        cached = await self.resume_cache.get_text(user_id, resume_id)
+        cached_etag = cached["etag"] if cached and cached.get("mime_type") == resume_mime_type else None
+
+        try:
+            resume_binary_content, etag = await self._download_resume_from_s3(
+                resume_s3_bucket, resume_s3_key, cached_etag
+            )
+        except FileNotFoundError:
+            # The resume may have been deleted or re-uploaded since its metadata was cached
+            await self.resume_cache.invalidate(user_id, resume_id)
+            if details_from_cache:
+                return await self._fetch_resume_content(user_id, resume_id, auth_token, use_cached_details=False)
+            raise
+
+        if resume_binary_content is None:
+            self.logger.info(f"Resume {resume_id} unchanged (ETag {etag}); using cached text")
+            return resume_details, cached["text"], cached.get("sections")
+
+        # Extract text (and, for PDFs in layout mode, sections) from the binary content
+        document = await self.text_extractor.extract_document(resume_binary_content, resume_mime_type)
+        await self.resume_cache.put_text(
+            user_id, resume_id, etag, resume_mime_type, document.text, sections=document.sections
+        )
+        return resume_details, document.text, document.sections
+
+    @staticmethod
+    def _prefixed(on_event: Optional[EventCallback], prefix: str) -> Optional[EventCallback]:
+        """Wraps an event callback so per-document events are namespaced ('resume_...', 'jd_...')."""
+        if on_event is None:
+            return None
+
+        async def _callback(event: str, data: Dict[str, Any]) -> None:
+            await on_event(f"{prefix}_{event}", data)
+        return _callback
+
+    @staticmethod
+    async def _emit_document_results(on_event: Optional[EventCallback], context: DocumentContext) -> None:
+        """Reports a processed document's classification and entities in one go (cache hits)."""
+        await emit_event(on_event, "classification", context.previous_results[AgentType.CLASSIFIER].data)
+        await emit_event(on_event, "entities", context.previous_results[AgentType.ENTITY_EXTRACTOR].data)
+
+    @staticmethod
+    async def _cancel_task(task: asyncio.Task) -> None:
+        """Cancels a background task and waits for it, swallowing its outcome."""
+        if task.done():
+            if not task.cancelled():
+                task.exception()  # mark a failure as retrieved so asyncio doesn't warn
+            return
+        task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+
+    @staticmethod
+    async def _traced(name: str, coro, **attributes: Any) -> Any:
+        """Awaits `coro` inside a tracing span (used for work started as a separate task)."""
+        with span(name, **attributes):
+            return await coro
+
     # --- REFACTORED: Main orchestration method for parallel running of the agents---
     # Need to add console logging to track the response times of each agent
     async def orchestrate_initial_analysis(
@@ -140,72 +257,77 @@ class DocumentAnalysisOrchestrator:
         jd_content: str,
         auth_token: str,
         company_name: Optional[str] = None,
+        job_url: Optional[str] = None,
+        on_event: Optional[EventCallback] = None,
     ) -> Dict[str, Any]:
         """
         Main orchestration method that now fetches the resume internally.
+        If `on_event` is given, partial results are reported through it as each phase completes.
         """
         final_results = {}
-        
-        # --- PHASE 1: Resume Processing ---
-        response_time = time.time()
-        print(f"\n📄 PHASE 1: RESUME PROCESSING")
-        print(f"{'─'*40}")
 
-        # --- PHASE 2: Process Resume and JD in Parallel ---
-        # Get resume details first
-        resume_details = await self._get_resume_details(user_id, resume_id, auth_token)
-        resume_s3_bucket = resume_details.get("s3_bucket")
-        resume_s3_key = resume_details.get("s3_path")
-        resume_file_id = resume_details.get("resume_id")
-        resume_mime_type = resume_details.get("mime_type", "application/pdf")
-        
-        if not resume_s3_bucket or not resume_s3_key:
-            raise ValueError("Missing S3 bucket or key from FileService response.")
-        
-        # Download the raw binary content from S3
-        resume_binary_content = self._download_resume_from_s3(resume_s3_bucket, resume_s3_key)
-
-        print("Resume details fetched successfully. Time: ",  response_time)
-
-        # --- NEW: Extract text from the binary content ---
-        resume_content = self._extract_text_from_content(resume_binary_content, resume_mime_type)
-
-        # Process resume and JD in parallel
-        print(f"\n🔄 PHASE 2: PARALLEL PROCESSING")
-        print(f"{'─'*40}")
-        
-        # Now that we have the resume content, proceed with analysis
-        resume_task = asyncio.create_task(self.process_document_for_analysis(
-            user_id=user_id,
-            file_id=resume_file_id,
-            content=resume_content,
-            file_type=resume_details.get("mime_type", "application/pdf")
-        ))
-        
-        # Process JD now
+        # Validate the JD up-front so its processing can start immediately
         if not jd_content:
             raise ValueError("Job Description content is missing or could not be scraped.")
-        
+
         jd_doc_id = f"jd-text-{uuid.uuid4()}"
-        
+
         jd_metadata = {
             "job_title": job_title,
             "company_name": company_name,
             "doc_type": "Job Description"
         }
 
-        jd_task = asyncio.create_task(self.process_document_for_analysis(
+        # --- PHASE 1: JD processing starts right away ---
+        # The JD side is several LLM round-trips, so it runs concurrently with the
+        # FileService lookup, S3 download and text extraction for the resume.
+        start_time = time.perf_counter()
+        print(f"\n📄 PHASE 1: RESUME FETCH + JD PROCESSING (PIPELINED)")
+        print(f"{'─'*40}")
+
+        jd_task = asyncio.create_task(self._traced("analysis.jd", self.process_jd_for_analysis(
             user_id=user_id,
             file_id=jd_doc_id,
             content=jd_content,
-            file_type="text",
-            initial_metadata=jd_metadata # <-- Pass the metadata here
-        ))
+            initial_metadata=jd_metadata, # <-- Pass the metadata here
+            job_url=job_url,
+            on_event=self._prefixed(on_event, "jd")
+        )))
+        resume_task: Optional[asyncio.Task] = None
 
-        # Run both tasks concurrently
-        resume_context, jd_context = await asyncio.gather(resume_task, jd_task)
-        
-        print("parallel processing completed. Time: ", response_time)
+        try:
+            with span("resume.fetch", resume_id=resume_id):
+                resume_details, resume_content, resume_sections = await self._fetch_resume_content(
+                    user_id, resume_id, auth_token
+                )
+            resume_file_id = resume_details.get("resume_id")
+            resume_mime_type = resume_details.get("mime_type", "application/pdf")
+
+            print(f"Resume details fetched successfully. Elapsed: {time.perf_counter() - start_time:.2f}s")
+
+            # --- PHASE 2: Resume analysis joins the already-running JD analysis ---
+            print(f"\n🔄 PHASE 2: PARALLEL PROCESSING")
+            print(f"{'─'*40}")
+
+            resume_task = asyncio.create_task(self._traced("analysis.resume", self.process_resume_for_analysis(
+                user_id=user_id,
+                file_id=resume_file_id,
+                content=resume_content,
+                file_type=resume_mime_type,
+                sections=resume_sections,
+                on_event=self._prefixed(on_event, "resume")
+            )))
+
+            resume_context, jd_context = await asyncio.gather(resume_task, jd_task)
+        except BaseException:
+            # gather() doesn't cancel the other side when one fails, so stop both here
+            # (a shared JD analysis keeps running for its other callers and still gets cached)
+            if resume_task is not None:
+                await self._cancel_task(resume_task)
+            await self._cancel_task(jd_task)
+            raise
+
+        print(f"parallel processing completed. Elapsed: {time.perf_counter() - start_time:.2f}s")
         
         final_results["resume_classification"] = resume_context.previous_results[AgentType.CLASSIFIER].data
         final_results["resume_entities"] = resume_context.previous_results[AgentType.ENTITY_EXTRACTOR].data
@@ -224,19 +346,27 @@ class DocumentAnalysisOrchestrator:
         # --- PHASE 3: Cross-Document Analysis ---
         print(f"\n🔗 PHASE 3: CROSS-DOCUMENT ANALYSIS")
         print(f"{'─'*40}")
-        relationship_map_result = await self._run_agent(AgentType.RELATIONSHIP_MAPPER, resume_context)
-        final_results["relationship_map"] = relationship_map_result.data
-        
-        print("Relationship mapping completed. Time: ", response_time)
-        
-        
-        job_match_result = await self._run_agent(AgentType.JOB_MATCHER, resume_context)
+        # Relationship mapping and job matching run as one task graph: each subtask starts
+        # as soon as its inputs exist and is streamed to `on_event` when it finishes.
+        agent_events = {AgentType.RELATIONSHIP_MAPPER: "relationship_map", AgentType.JOB_MATCHER: "job_match"}
+
+        async def _report_agent(result: AgentResult) -> None:
+            await emit_event(on_event, agent_events[result.agent_type], result.data)
+
+        with span("analysis.cross_document"):
+            cross_results = await self._run_agent_graph(
+                [AgentType.RELATIONSHIP_MAPPER, AgentType.JOB_MATCHER], resume_context,
+                on_event=on_event, on_result=_report_agent
+            )
+        final_results["relationship_map"] = cross_results[AgentType.RELATIONSHIP_MAPPER].data
+
+        job_match_result = cross_results[AgentType.JOB_MATCHER]
         final_results["job_match_analysis"] = job_match_result.data
         final_results["overall_match_percentage"] = job_match_result.data.get("overall_match_percentage")
         
         final_results["resume content"] = resume_content  # Store the resume content for later use
         
-        print("Job matching completed. Time: ", response_time)
+        print(f"Job matching completed. Elapsed: {time.perf_counter() - start_time:.2f}s")
         
         # --- ADD THESE LINES ---
         # Add the necessary IDs and content to the final results so they can be
@@ -297,8 +427,14 @@ class DocumentAnalysisOrchestrator:
         if not agent:
             raise ValueError(f"Agent of type {agent_type.value} not found.")
         
-        result = await agent._execute_with_timing(context)
-        
+        with span(f"agent.{agent_type.value}", file_id=context.file_id) as s:
+            result = await agent._execute_with_timing(context)
+            s.set_attribute("success", result.success)
+        return self._record_result(agent_type, context, result)
+
+    def _record_result(self, agent_type: AgentType, context: DocumentContext, result: AgentResult) -> AgentResult:
+        """Checks an agent's result, stores it on the context and raises if the agent failed."""
+        metrics.observe_agent(agent_type.value, result.processing_time, result.success)
         # --- NEW: Add a debugging check here ---
         try:
             # We try to serialize the agent's data immediately.
@@ -317,6 +453,78 @@ class DocumentAnalysisOrchestrator:
             raise RuntimeError(f"Agent {agent_type.value} failed: {result.error}")
             
         return result
+
+    async def _run_agent_graph(
+        self,
+        agent_types: List[AgentType],
+        context: DocumentContext,
+        on_event: Optional[EventCallback] = None,
+        on_result: Optional[Callable[[AgentResult], Awaitable[None]]] = None,
+    ) -> Dict[AgentType, AgentResult]:
+        """
+        Runs several task-based agents as one dependency graph instead of one after another.
+        Each agent's tasks start as soon as their declared inputs exist (including outputs of
+        another agent's tasks). An agent's result is assembled and recorded, and `on_result`
+        awaited, as soon as its last task finishes.
+        """
+        start_time = time.time()
+        tasks: List[AgentTask] = []
+        initial: Dict[str, Any] = {}
+        owner: Dict[str, AgentType] = {}
+        pending: Dict[AgentType, set] = {}
+        agents: Dict[AgentType, BaseAgent] = {}
+
+        for agent_type in agent_types:
+            agent = self.agents.get(agent_type)
+            if not agent:
+                raise ValueError(f"Agent of type {agent_type.value} not found.")
+            try:
+                agent_tasks = agent.get_tasks(context)
+                agent_inputs = agent.task_inputs(context)
+            except Exception as e:
+                self.logger.error(f"Agent {agent_type.value} failed: {str(e)}", exc_info=True)
+                # Records the failure and raises, as _run_agent would
+                self._record_result(agent_type, context, AgentResult(
+                    agent_type=agent_type, success=False, data={}, confidence=0.0,
+                    processing_time=time.time() - start_time, error=str(e)
+                ))
+            agents[agent_type] = agent
+            pending[agent_type] = {task.name for task in agent_tasks}
+            for task in agent_tasks:
+                owner[task.name] = agent_type
+            tasks.extend(agent_tasks)
+            initial.update(agent_inputs)
+
+        # Values produced inside the graph always come from their task
+        initial = {key: value for key, value in initial.items() if key not in owner}
+        scheduler = TaskScheduler(tasks)
+        outputs: Dict[str, Any] = {}
+        results: Dict[AgentType, AgentResult] = {}
+
+        async def _on_complete(task: AgentTask, output: Any) -> None:
+            if task.event:
+                await emit_event(on_event, task.event, task.to_event(output) if task.to_event else output)
+            outputs[task.name] = output
+            agent_type = owner[task.name]
+            pending[agent_type].discard(task.name)
+            if pending[agent_type]:
+                return
+            agent = agents[agent_type]
+            try:
+                result = agent.assemble({name: outputs[name] for name in outputs if owner[name] == agent_type})
+            except Exception as e:
+                self.logger.error(f"Agent {agent_type.value} failed: {str(e)}", exc_info=True)
+                result = AgentResult(
+                    agent_type=agent_type, success=False, data={}, confidence=0.0, processing_time=0.0, error=str(e),
+                )
+            result.processing_time = time.time() - start_time
+            results[agent_type] = result = self._record_result(agent_type, context, result)
+            print(f"   ✓ {agent_type.value} completed in {result.processing_time:.2f}s")
+            if on_result:
+                await on_result(result)
+
+        await scheduler.run(initial, on_complete=_on_complete)
+        return results
     
     # Comment this method for now
     """async def process_document_for_analysis(self, user_id: str, file_id: str, content: str, file_type: str, initial_metadata: Dict[str, Any] = None) -> DocumentContext:
@@ -342,13 +550,180 @@ class DocumentAnalysisOrchestrator:
         
         # In orchestrator.py, replace the entire method with this one
 
-    async def process_document_for_analysis(self, user_id: str, file_id: str, content: str, file_type: str, initial_metadata: Dict[str, Any] = None) -> DocumentContext:
+    def _artifact_version(self, agent_types) -> str:
+        """Identifies the agents (and their prompt versions) that produced a set of artifacts."""
+        return "|".join(
+            f"{t.value}:{type(self.agents[t]).__name__}:{self.agents[t].prompt_version}" for t in agent_types
+        )
+
+    @staticmethod
+    def _is_reusable(context: DocumentContext) -> bool:
+        """Only persist results that didn't come from an agent's degraded fallback path."""
+        results = context.previous_results
+        if any(t not in results or not results[t].success for t in DOCUMENT_ARTIFACT_AGENTS):
+            return False
+        if results[AgentType.CLASSIFIER].confidence <= 0.35:
+            return False
+        if set(results[AgentType.LAYOUT_ANALYZER].data.get("sections", {})) == {"full_content"}:
+            return False
+        entities = results[AgentType.ENTITY_EXTRACTOR].data.get("entities", {})
+        return any(entities.values())
+
+    async def process_resume_for_analysis(
+        self, user_id: str, file_id: str, content: str, file_type: str,
+        sections: Optional[Dict[str, str]] = None, on_event: Optional[EventCallback] = None
+    ) -> DocumentContext:
+        """
+        Same as process_document_for_analysis for a resume, but reuses the persisted
+        classifier/layout/entity results when this exact resume text was analyzed before.
+        `sections` found during text extraction are handed to the layout agent.
+        """
+        doc_hash = content_hash(content)
+        version = self._artifact_version(DOCUMENT_VERSION_AGENTS)
+
+        artifacts = await self.resume_artifacts.get(doc_hash, version)
+        context = self._context_from_artifacts(user_id, file_id, content, file_type, {}, artifacts)
+        if context:
+            print(f"♻️  Reusing stored resume analysis ({doc_hash[:12]})")
+            await self._emit_document_results(on_event, context)
+            return context
+
+        context = await self.process_document_for_analysis(
+            user_id=user_id, file_id=file_id, content=content, file_type=file_type,
+            initial_metadata={LAYOUT_SECTIONS_KEY: sections} if sections else None, on_event=on_event
+        )
+        if self._is_reusable(context):
+            # Persisting shouldn't add latency to this analysis
+            self._spawn(self.resume_artifacts.put(doc_hash, version, self._artifacts_from_context(context)))
+        return context
+
+    async def process_jd_for_analysis(
+        self, user_id: str, file_id: str, content: str, initial_metadata: Dict[str, Any],
+        job_url: Optional[str] = None, on_event: Optional[EventCallback] = None
+    ) -> DocumentContext:
+        """
+        Processes a job description, reusing the global JD cache (exact text, job URL or
+        near-duplicate text). Concurrent requests for the same posting share one analysis.
+        """
+        version = self._artifact_version(DOCUMENT_VERSION_AGENTS)
+
+        artifacts = await self.jd_cache.lookup(content, version, job_url)
+        context = self._context_from_artifacts(user_id, file_id, content, "text", initial_metadata, artifacts)
+        if context:
+            print(f"♻️  Reusing cached JD analysis")
+            await self._emit_document_results(on_event, context)
+            return context
+
+        key = f"{self.jd_cache.key_for(content)}:{version}"
+        task = self._jd_inflight.get(key)
+        joined_existing = task is not None
+        if task is None:
+            # The caller that starts the analysis gets its events streamed as they happen
+            task = self._spawn(self._analyze_jd(user_id, file_id, content, initial_metadata, job_url, version, on_event))
+            self._jd_inflight[key] = task
+            task.add_done_callback(lambda _: self._jd_inflight.pop(key, None))
+
+        # Shielded so one caller giving up doesn't cancel the analysis other callers are waiting on
+        artifacts = await asyncio.shield(task)
+        context = self._context_from_artifacts(
+            user_id, file_id, content, "text", initial_metadata, copy.deepcopy(artifacts)
+        )
+        if joined_existing:
+            await self._emit_document_results(on_event, context)
+        return context
+
+    async def _analyze_jd(
+        self, user_id: str, file_id: str, content: str, initial_metadata: Dict[str, Any],
+        job_url: Optional[str], version: str, on_event: Optional[EventCallback] = None
+    ) -> Dict[str, Any]:
+        context = await self.process_document_for_analysis(
+            user_id=user_id, file_id=file_id, content=content, file_type="text",
+            initial_metadata=initial_metadata, on_event=on_event
+        )
+        artifacts = self._artifacts_from_context(context)
+        if self._is_reusable(context):
+            self._spawn(self.jd_cache.put(content, version, copy.deepcopy(artifacts), job_url))
+        return artifacts
+
+    @staticmethod
+    def _artifacts_from_context(context: DocumentContext) -> Dict[str, Any]:
+        return {
+            "results": [
+                context.previous_results[t].to_dict() for t in DOCUMENT_ARTIFACT_AGENTS if t in context.previous_results
+            ]
+        }
+
+    @staticmethod
+    def _context_from_artifacts(
+        user_id: str, file_id: str, content: str, file_type: str,
+        metadata: Dict[str, Any], artifacts: Optional[Dict[str, Any]]
+    ) -> Optional[DocumentContext]:
+        """Rebuilds a processed DocumentContext from stored results, or None if any are missing."""
+        previous_results = {}
+        for payload in (artifacts or {}).get("results", []):
+            result = AgentResult.from_dict(payload)
+            previous_results[result.agent_type] = result
+        if not all(t in previous_results for t in DOCUMENT_ARTIFACT_AGENTS):
+            return None
+        return DocumentContext(
+            user_id=user_id, file_id=file_id, content=content, file_type=file_type,
+            metadata=metadata, previous_results=previous_results
+        )
+
+    @staticmethod
+    def _merge_entities(results: List[AgentResult]) -> Dict[str, List[Any]]:
+        """Union of the entity lists of successful extraction results, deduplicated and sorted."""
+        merged_entities: Dict[str, List[Any]] = {}
+        for result in results:
+            if result.success:
+                entities = result.data.get("entities", {})
+                for key, value_list in entities.items():
+                    if key not in merged_entities:
+                        merged_entities[key] = []
+                    if isinstance(value_list, list):
+                        merged_entities[key].extend(value_list)
+
+        # Deduplicate the merged lists
+        for key in merged_entities:
+            merged_entities[key] = sorted(list(set(item for item in merged_entities[key] if item)))
+        return merged_entities
+
+    async def _analyze_in_one_call(self, context: DocumentContext, on_event: Optional[EventCallback] = None) -> bool:
+        """
+        Runs the single-call analyzer on a short document. On success its classifier, layout
+        and (merged) entity results are recorded on the context, the usual events are emitted
+        and True is returned; False means the caller should run the multi-agent path.
+        """
+        agent = self.agents.get(AgentType.DOCUMENT_ANALYZER)
+        if not agent or not agent.should_process(context):
+            return False
+        with span(f"agent.{AgentType.DOCUMENT_ANALYZER.value}", file_id=context.file_id) as s:
+            result = await agent._execute_with_timing(context)
+            s.set_attribute("success", result.success)
+        metrics.observe_agent(AgentType.DOCUMENT_ANALYZER.value, result.processing_time, result.success)
+        payloads = result.data.get("results", []) if result.success else []
+        if not payloads:
+            return False
+
+        for payload in payloads:
+            agent_result = AgentResult.from_dict(payload)
+            if agent_result.agent_type == AgentType.ENTITY_EXTRACTOR:
+                agent_result.data["entities"] = self._merge_entities([agent_result])
+            context.previous_results[agent_result.agent_type] = agent_result
+        await emit_event(on_event, "classification", context.previous_results[AgentType.CLASSIFIER].data)
+        await emit_event(on_event, "entities", {"entities": context.previous_results[AgentType.ENTITY_EXTRACTOR].data["entities"]})
+        return True
+
+    async def process_document_for_analysis(self, user_id: str, file_id: str, content: str, file_type: str, initial_metadata: Dict[str, Any] = None, on_event: Optional[EventCallback] = None) -> DocumentContext:
         """
         Processes a single document:
         1. Classifies the document.
         2. Analyzes the layout to find sections.
         3. Runs entity extraction on each section in parallel.
         4. Merges the results.
+        Short documents first try the single-call path (CombinedAnalysisAgent), which produces
+        all three results at once; steps 1-4 run only if it declines the document.
+        Classification and merged entities are reported through `on_event` as they complete.
         """
         if initial_metadata is None:
             initial_metadata = {}
@@ -358,8 +733,12 @@ class DocumentAnalysisOrchestrator:
             metadata=initial_metadata, previous_results={}
         )
 
+        if await self._analyze_in_one_call(context, on_event):
+            return context
+
         # Step 1: Classify the full document (fast)
-        await self._run_agent(AgentType.CLASSIFIER, context)
+        classifier_result = await self._run_agent(AgentType.CLASSIFIER, context)
+        await emit_event(on_event, "classification", classifier_result.data)
 
         # --- NEW: Step 2: Use the LayoutAgent to intelligently split the document ---
         layout_result = await self._run_agent(AgentType.LAYOUT_ANALYZER, context)
@@ -377,25 +756,12 @@ class DocumentAnalysisOrchestrator:
         section_results = await asyncio.gather(*tasks)
 
         # --- Step 4: Merge the results from all parallel tasks ---
-        merged_entities = {}
-        for result in section_results:
-            if result.success:
-                entities = result.data.get("entities", {})
-                for key, value_list in entities.items():
-                    if key not in merged_entities:
-                        merged_entities[key] = []
-                    if isinstance(value_list, list):
-                        merged_entities[key].extend(value_list)
-        
-        # Deduplicate the merged lists
-        for key in merged_entities:
-            merged_entities[key] = sorted(list(set(item for item in merged_entities[key] if item)))
-
+        merged_result_data = {"entities": self._merge_entities(section_results)}
         # Add the final merged result to the main context
-        merged_result_data = {"entities": merged_entities}
         context.previous_results[AgentType.ENTITY_EXTRACTOR] = AgentResult(
             agent_type=AgentType.ENTITY_EXTRACTOR, success=True, data=merged_result_data, confidence=1.0,
                     processing_time=0.0
         )
+        await emit_event(on_event, "entities", merged_result_data)
         
         return context
\ No newline at end of file
@@ -2,26 +2,19 @@
 
 from typing import Dict, Any, List, Optional
 from agents.base import BaseAgent, AgentType, AgentResult, DocumentContext
-import os
 import json
 import logging
-import google.generativeai as genai
 from services.utils import _safe_json
+from services.llm_gateway import llm_gateway
+from services.prompt_builder import compact_json, project
 
 logger = logging.getLogger(__name__)
 
 from dotenv import load_dotenv
 load_dotenv()
 
-try:
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise KeyError("GOOGLE_API_KEY not found in environment variables.")
-    genai.configure(api_key=api_key)
-except KeyError as e:
-    logger.warning(f"{e} The agent will not work.")
-    genai = None
-    
+MODEL_NAME = "gemini-2.5-pro"
+
 # --- Define standard safety settings ---
 GEMINI_SAFETY_SETTINGS = [
     {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
@@ -30,20 +23,22 @@ GEMINI_SAFETY_SETTINGS = [
     {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
 ]
 
+def _has_suggestions(output: Any) -> bool:
+    """The shape process() accepts; anything else is not worth caching."""
+    return isinstance(output, dict) and isinstance(output.get("suggestions"), list)
+
+
 class ResumeOptimizerAgent(BaseAgent):
     """
     Agent responsible for generating specific, actionable, and contextualized
     suggestions to enhance a resume for a given job description.
     This includes quantification, explanations, and company-specific tailoring.
     """
+
+    prompt_version = "3"  # compact JSON without empty entity fields; analysis results sent whole
     
     def __init__(self):
         super().__init__(AgentType.RESUME_OPTIMIZER)
-        
-        if genai:
-            self.llm_model = genai.GenerativeModel("gemini-2.5-pro")
-        else:
-            self.llm_model = None
 
     async def process(self, context: DocumentContext) -> AgentResult:
         """
@@ -152,20 +147,24 @@ class ResumeOptimizerAgent(BaseAgent):
                 f"Optimize the following resume for the given job description:\n\n"
                 f"--- Original Resume (Partial) ---\n{resume_content[:5000]}\n\n"
                 f"--- Job Description ---\n{jd_content[:5000]}\n\n"
-                f"--- Resume's Extracted Entities ---\n{json.dumps(resume_entities, indent=2)}\n\n"
-                f"--- Job Description's Extracted Entities ---\n{json.dumps(jd_entities, indent=2)}\n\n"
-                f"--- Resume-JD Relationship Map ---\n{json.dumps(relationship_map, indent=2)}\n\n"
-                f"--- Job Match Analysis ---\n{json.dumps(match_analysis, indent=2)}\n\n"
+                f"--- Resume's Extracted Entities ---\n{compact_json(project(resume_entities))}\n\n"
+                f"--- Job Description's Extracted Entities ---\n{compact_json(project(jd_entities))}\n\n"
+                f"--- Resume-JD Relationship Map ---\n{compact_json(relationship_map)}\n\n"
+                f"--- Job Match Analysis ---\n{compact_json(match_analysis)}\n\n"
                 f"--- initial match percentage (from job match analysis) ---\n{overall_match_percentage}\n\n"
                 f"Provide your enhancement suggestions as a JSON object strictly following this schema:\n"
-                f"{json.dumps(enhancement_schema, indent=2)}"
+                f"{compact_json(enhancement_schema)}"
             )
             
             # Make the LLM API call
-            response = await self.llm_model.generate_content_async(
+            response = await llm_gateway.gemini(
+                MODEL_NAME,
                 [system_prompt, user_prompt],
                 generation_config={"response_mime_type": "application/json", "temperature": 0.0},
-                safety_settings=GEMINI_SAFETY_SETTINGS
+                safety_settings=GEMINI_SAFETY_SETTINGS,
+                task="optimize_resume",
+                prompt_version=self.prompt_version,
+                validate=_has_suggestions,
             )
             
             # --- NEW: Robust JSON Parsing Logic ---
@@ -182,15 +181,19 @@ class ResumeOptimizerAgent(BaseAgent):
                     f"--- BROKEN TEXT ---\n{response.text}\n--- END BROKEN TEXT ---"
                 )
                 
-                correction_response = await self.llm_model.generate_content_async(
+                correction_response = await llm_gateway.gemini(
+                    MODEL_NAME,
                     fix_prompt,
                     generation_config={"response_mime_type": "application/json", "temperature": 0.0},
-                    safety_settings=GEMINI_SAFETY_SETTINGS
+                    safety_settings=GEMINI_SAFETY_SETTINGS,
+                    task="json_repair",
+                    prompt_version=self.prompt_version,
+                    validate=_has_suggestions,
                 )
                 llm_output = _safe_json(correction_response.text) # Try parsing the fixed version
                 
             
-            if not isinstance(llm_output, dict) or "suggestions" not in llm_output or not isinstance(llm_output["suggestions"], list):
+            if not _has_suggestions(llm_output):
                 raise ValueError("LLM returned invalid or incomplete JSON for resume suggestions.")
             
             # Confidence can be based on the number/quality of suggestions or an LLM-derived score
@@ -203,7 +206,7 @@ class ResumeOptimizerAgent(BaseAgent):
                     "enhancement_suggestions": llm_output["suggestions"],
                     "overall_feedback": llm_output.get("overall_feedback", ""),
                     "match_after_enhancement": llm_output.get("match_after_enhancement", None),
-                    "llm_model_used": "gemini-2.5-pro"
+                    "llm_model_used": MODEL_NAME
                 },
                 confidence=1.0,
                 processing_time=0.0 # Will be updated by _execute_with_timing
@@ -231,6 +234,6 @@ class ResumeOptimizerAgent(BaseAgent):
                 "Optional: Company info from Web Scraper Agent"
             ],
             "output_format": "Structured JSON with specific suggestions, proposed text, reasoning, and priority",
-            "model": self.llm_model,
+            "model": MODEL_NAME,
             "confidence_level": 0.9 # Reflects expected LLM performance
         }
\ No newline at end of file
@@ -0,0 +1,226 @@
+# AIService/benchmarks/backends.py
+
+import re
+import json
+import time
+import uuid
+import socket
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import httpx
+import uvicorn
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+RESUME_BUCKET = "bench-resumes"
+
+
+def _client_error(code: str, status: int, operation: str, message: str) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": code, "Message": message}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        operation,
+    )
+
+
+class _Body:
+    """The slice of botocore's StreamingBody the services use."""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def iter_chunks(self, chunk_size: int = 1024) -> Iterator[bytes]:
+        for start in range(0, len(self._data), chunk_size):
+            yield self._data[start:start + chunk_size]
+
+    def read(self) -> bytes:
+        return self._data
+
+    def close(self) -> None:
+        pass
+
+
+class FakeS3:
+    """
+    Stand-in for a boto3 S3 client, backed by a dict. Like the real client, every call
+    blocks its thread for a round trip plus the transfer time at `bandwidth_mbps`, so
+    it can sit behind `AsyncS3Client` (which runs it on its thread pool) as well as
+    behind code that calls boto3 directly on the event loop.
+    """
+
+    def __init__(self, latency: float = 0.02, bandwidth_mbps: float = 100.0):
+        self.latency = latency
+        self.bandwidth = bandwidth_mbps * 1024 * 1024 / 8  # bytes per second
+        self.objects: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+        self.counts = {"get": 0, "not_modified": 0, "put": 0}
+        self._lock = threading.Lock()
+
+    def _round_trip(self, size: int = 0) -> None:
+        time.sleep(self.latency + size / self.bandwidth)
+
+    def seed(self, bucket: str, key: str, body: bytes) -> str:
+        """Stores an object without simulated latency; returns its ETag."""
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        with self._lock:
+            self.objects[(bucket, key)] = (body, etag)
+        return etag
+
+    def get_object(self, Bucket: str, Key: str, IfNoneMatch: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            self.counts["get"] += 1
+            stored = self.objects.get((Bucket, Key))
+        if stored is None:
+            self._round_trip()
+            raise _client_error("NoSuchKey", 404, "GetObject", f"s3://{Bucket}/{Key} does not exist")
+        body, etag = stored
+        if IfNoneMatch and IfNoneMatch == etag:
+            with self._lock:
+                self.counts["not_modified"] += 1
+            self._round_trip()
+            raise _client_error("304", 304, "GetObject", "Not Modified")
+        self._round_trip(len(body))
+        return {"Body": _Body(body), "ETag": etag, "ContentLength": len(body)}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            self.counts["put"] += 1
+        self._round_trip(len(Body))
+        return {"ETag": self.seed(Bucket, Key, Body)}
+
+    def generate_presigned_url(self, operation: str, Params: Dict[str, Any], ExpiresIn: int = 3600) -> str:
+        return f"https://{Params['Bucket']}.s3.bench/{Params['Key']}?expires={ExpiresIn}"
+
+
+_ROUTES = [
+    ("GET", re.compile(r"/users/(?P<user_id>[^/]+)/resume/(?P<resume_id>[^/]+)/s3-link$"), "_s3_link"),
+    ("POST", re.compile(r"/analyses$"), "_create_analysis"),
+    ("PATCH", re.compile(r"/analyses/(?P<analysis_id>[^/]+)$"), "_update_analysis"),
+    ("GET", re.compile(r"/analyses/(?P<analysis_id>[^/]+)$"), "_get_analysis"),
+    ("GET", re.compile(r"/resumes/(?P<resume_id>[^/]+)/parsed-json$"), "_parsed_json"),
+]
+
+
+class FakeFileService:
+    """
+    The FileService endpoints AIService calls (resume S3 links, analysis records and
+    parsed resume JSON), backed by dicts, with a fixed per-request latency. Reachable
+    through an `httpx.MockTransport` (`transport`) or over real HTTP (`serve`).
+    """
+
+    def __init__(self, s3: FakeS3, latency: float = 0.01):
+        self.s3 = s3
+        self.latency = latency
+        self.resumes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.parsed: Dict[str, Dict[str, Any]] = {}
+        self.analyses: Dict[str, Dict[str, Any]] = {}
+        self.requests = 0
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def add_resume(
+        self, user_id: str, resume_id: str, content: bytes,
+        mime_type: str = "application/pdf", parsed_json: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        key = f"resumes/{user_id}/{resume_id}.pdf"
+        self.s3.seed(RESUME_BUCKET, key, content)
+        self.resumes[(user_id, resume_id)] = {
+            "resume_id": resume_id, "user_id": user_id, "s3_bucket": RESUME_BUCKET,
+            "s3_path": key, "mime_type": mime_type,
+        }
+        if parsed_json is not None:
+            self.parsed[resume_id] = parsed_json
+
+    # --- Endpoints ---
+    def _s3_link(self, body: Dict[str, Any], user_id: str, resume_id: str) -> Tuple[int, Any]:
+        details = self.resumes.get((user_id, resume_id))
+        return (200, details) if details else (404, {"detail": "Resume not found"})
+
+    def _create_analysis(self, body: Dict[str, Any]) -> Tuple[int, Any]:
+        analysis_id = body.get("analysis_id") or str(uuid.uuid4())
+        self.analyses[analysis_id] = dict(body, analysis_id=analysis_id)
+        return 200, self.analyses[analysis_id]
+
+    def _update_analysis(self, body: Dict[str, Any], analysis_id: str) -> Tuple[int, Any]:
+        if analysis_id not in self.analyses:
+            return 404, {"detail": "Analysis not found"}
+        self.analyses[analysis_id].update(body)
+        return 200, self.analyses[analysis_id]
+
+    def _get_analysis(self, body: Dict[str, Any], analysis_id: str) -> Tuple[int, Any]:
+        analysis = self.analyses.get(analysis_id)
+        return (200, analysis) if analysis else (404, {"detail": "Analysis not found"})
+
+    def _parsed_json(self, body: Dict[str, Any], resume_id: str) -> Tuple[int, Any]:
+        parsed = self.parsed.get(resume_id)
+        return (200, parsed) if parsed else (404, {"detail": "Parsed JSON not found"})
+
+    async def respond(self, method: str, path: str, raw_body: bytes) -> Tuple[int, Any]:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        body = json.loads(raw_body) if raw_body else {}
+        for route_method, pattern, handler in _ROUTES:
+            match = pattern.search(path)
+            if match and route_method == method:
+                return getattr(self, handler)(body, **match.groupdict())
+        return 404, {"detail": f"No route for {method} {path}"}
+
+    # --- Transports ---
+    def transport(self) -> httpx.MockTransport:
+        async def _handle(request: httpx.Request) -> httpx.Response:
+            status, payload = await self.respond(request.method, request.url.path, await request.aread())
+            return httpx.Response(status, json=payload)
+        return httpx.MockTransport(_handle)
+
+    async def asgi(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope["type"] != "http":
+            return
+        raw_body, more = b"", True
+        while more:
+            message = await receive()
+            raw_body += message.get("body", b"")
+            more = message.get("more_body", False)
+        status, payload = await self.respond(scope["method"], scope["path"], raw_body)
+        data = json.dumps(payload).encode("utf-8")
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())]})
+        await send({"type": "http.response.body", "body": data})
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serves the fake over HTTP on a background thread (its own event loop); returns the base URL."""
+        if not port:
+            with socket.socket() as probe:
+                probe.bind((host, 0))
+                port = probe.getsockname()[1]
+        config = uvicorn.Config(self.asgi, host=host, port=port, interface="asgi3", lifespan="off",
+                                log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="fake-fileservice", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake FileService failed to start")
+            time.sleep(0.01)
+        return f"http://{host}:{port}"
+
+    def shutdown(self) -> None:
+        if self._server:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+            self._server = self._thread = None
+
+
+async def wire_orchestrator(orchestrator, s3: FakeS3, file_service: Optional[FakeFileService] = None) -> None:
+    """
+    Puts the fake S3 client behind the orchestrator's `AsyncS3Client` (shared by its
+    artifact stores) and, if given, routes its FileService client to `file_service`
+    in-process. Without `file_service` the client keeps calling FILES_API_URL.
+    """
+    orchestrator.s3._client = s3
+    if file_service is not None:
+        await orchestrator.http_client.aclose()
+        orchestrator.http_client = httpx.AsyncClient(transport=file_service.transport())
@@ -0,0 +1,122 @@
+# AIService/benchmarks/documents.py
+
+import random
+from typing import Any, Dict, List, Tuple
+
+import fitz  # PyMuPDF
+
+# Vocabulary the synthetic documents are drawn from; seeded, so every run builds the same corpus
+SKILLS = [
+    "Python", "Java", "Go", "TypeScript", "React", "FastAPI", "Django", "Spring Boot", "PostgreSQL",
+    "MySQL", "Redis", "Kafka", "RabbitMQ", "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Terraform",
+    "GraphQL", "gRPC", "Elasticsearch", "Spark", "Airflow", "Snowflake", "CI/CD", "GitHub Actions",
+    "Prometheus", "Grafana", "Linux", "Microservices", "REST APIs", "Distributed Systems", "Node.js",
+]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Cyberdyne"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Backend Engineer", "Staff Engineer", "Platform Engineer"]
+VERBS = ["Led", "Built", "Designed", "Migrated", "Automated", "Optimized", "Scaled", "Owned", "Launched", "Reduced"]
+OBJECTS = [
+    "the billing pipeline", "a multi-tenant API gateway", "the search indexing service", "CI/CD for 40 services",
+    "the data ingestion platform", "observability tooling", "the payments reconciliation job", "a feature-flag service",
+]
+OUTCOMES = [
+    "cutting p95 latency by 40%", "saving $120k/year in compute", "serving 2M requests/day",
+    "reducing on-call pages by 60%", "improving deploy frequency 5x", "with zero downtime",
+]
+
+LINES_PER_PAGE = 58
+
+
+def resume_lines(pages: int, seed: int) -> List[str]:
+    """About `pages` pages of resume text: contact, summary, skills, education, then as many roles as fit."""
+    rng = random.Random(seed)
+    lines = [
+        f"Candidate {seed}",
+        f"candidate{seed}@example.com | +1 555 {seed % 10000:04d} | Seattle, WA",
+        "",
+        "SUMMARY",
+        f"Engineer with {rng.randint(3, 15)} years of experience building {rng.choice(OBJECTS)} and distributed services.",
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(SKILLS, 14)),
+        "",
+        "EDUCATION",
+        f"B.S. Computer Science, State University, {rng.randint(2005, 2020)}",
+        "",
+        "EXPERIENCE",
+    ]
+    year = 2025
+    while len(lines) < pages * LINES_PER_PAGE:
+        start = year - rng.randint(1, 4)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start}-{year})")
+        for _ in range(rng.randint(4, 7)):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}, {rng.choice(OUTCOMES)}")
+        lines.append("")
+        year = start
+    return lines[: pages * LINES_PER_PAGE]
+
+
+def resume_pdf(pages: int, seed: int) -> Tuple[bytes, str]:
+    """Renders a synthetic resume to a PDF; returns (pdf bytes, the text written into it)."""
+    lines = resume_lines(pages, seed)
+    document = fitz.open()
+    try:
+        for start in range(0, len(lines), LINES_PER_PAGE):
+            page = document.new_page()
+            for offset, line in enumerate(lines[start:start + LINES_PER_PAGE]):
+                page.insert_text((50, 50 + offset * 12.5), line, fontsize=9)
+        return document.tobytes(), "\n".join(lines)
+    finally:
+        document.close()
+
+
+def job_description(seed: int) -> str:
+    """A synthetic job description; different seeds differ enough not to hit the near-duplicate JD cache."""
+    rng = random.Random(f"jd-{seed}")
+    required = rng.sample(SKILLS, 8)
+    preferred = rng.sample([s for s in SKILLS if s not in required], 5)
+    duties = [f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(OUTCOMES)}." for _ in range(6)]
+    return "\n".join([
+        f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} (requisition {seed})",
+        "",
+        "What you'll do",
+        *duties,
+        "",
+        "Minimum qualifications",
+        f"{rng.randint(2, 8)}+ years of professional software development experience.",
+        *[f"Hands-on experience with {skill}." for skill in required],
+        "",
+        "Preferred qualifications",
+        *[f"Familiarity with {skill}." for skill in preferred],
+    ])
+
+
+def resume_json(seed: int, roles: int = 3) -> Dict[str, Any]:
+    """A synthetic resume in FileService's parsed-JSON shape (what the Word generator consumes)."""
+    rng = random.Random(f"parsed-{seed}")
+    year = 2025
+    experience = []
+    for _ in range(roles):
+        start = year - rng.randint(1, 4)
+        experience.append({
+            "role": rng.choice(TITLES), "company": rng.choice(COMPANIES), "location": "Seattle, WA",
+            "start": {"month": "Jan", "year": str(start)},
+            "end": {"month": "Present", "year": ""} if year == 2025 else {"month": "Dec", "year": str(year)},
+            "bullets": [f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}, {rng.choice(OUTCOMES)}."
+                        for _ in range(rng.randint(3, 5))],
+        })
+        year = start
+    return {
+        "contactInfo": {
+            "name": f"Candidate {seed}", "email": f"candidate{seed}@example.com", "phone": "555-0100",
+            "links": [{"label": "GitHub", "url": f"github.com/candidate{seed}"}],
+        },
+        "summary": f"Engineer with {rng.randint(3, 15)} years of experience building {rng.choice(OBJECTS)}.",
+        "skills": {"Languages": rng.sample(SKILLS[:4], 3), "Tools": rng.sample(SKILLS[4:], 8)},
+        "experience": experience,
+        "education": [{
+            "school": "State University", "degree": "B.S. Computer Science", "location": "Seattle, WA",
+            "start": {"month": "Aug", "year": "2014"}, "end": {"month": "May", "year": "2018"},
+        }],
+        "projects": [],
+    }
@@ -0,0 +1,109 @@
+# AIService/benchmarks/extraction_modes.py
+"""
+Microbenchmark of the PDF text extraction modes in services/text_extraction.py.
+
+For each sample PDF (the resumes checked in at the repository root by default, plus
+synthetic resumes of a few sizes) it times "plain" (`page.get_text()`) against "layout"
+(`get_text("dict")` spans, then heading/bullet reconstruction), in-process so only the
+parsing is measured. It also reports what each mode leaves for the layout step: the
+sections layout mode found from font metadata, and the confidence of the rule-based
+splitter on each mode's text (below LAYOUT_RULES_THRESHOLD the LLM would be called).
+
+Run from AIService/:
+    python -m benchmarks.extraction_modes
+    python -m benchmarks.extraction_modes --files ../Veeresh_Resume.pdf --iterations 50
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.documents import resume_pdf
+from benchmarks.measure import summarize
+from services.section_splitter import split_sections
+from services.text_extraction import _assemble_layout, _extract_pdf_layout_pages, _extract_pdf_pages
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _time(fn: Callable[[], Any], iterations: int) -> Tuple[List[float], Any]:
+    """Per-call wall times in ms for `iterations` calls of `fn`, plus its last result."""
+    samples, result = [], None
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, result
+
+
+def _layout(data: bytes):
+    lines, _ = _extract_pdf_layout_pages(data, 0, None)
+    return _assemble_layout(lines)
+
+
+def measure(name: str, data: bytes, iterations: int) -> Dict[str, Any]:
+    _time(lambda: _extract_pdf_pages(data, 0, None), 1)  # warm the font and page caches
+    plain_ms, (plain_text, pages) = _time(lambda: _extract_pdf_pages(data, 0, None), iterations)
+    layout_ms, document = _time(lambda: _layout(data), iterations)
+    plain_split = split_sections(plain_text)
+    layout_split = split_sections(document.text)
+    return {
+        "name": name,
+        "pages": pages,
+        "plain": {"ms": summarize(plain_ms), "chars": len(plain_text), "rules_confidence": plain_split.confidence},
+        "layout": {
+            "ms": summarize(layout_ms), "chars": len(document.text), "rules_confidence": layout_split.confidence,
+            "sections": list(document.sections or {}),
+        },
+    }
+
+
+def samples(files: List[str], synthetic_pages: List[int]) -> List[Tuple[str, bytes]]:
+    docs = []
+    for path in files:
+        with open(path, "rb") as f:
+            docs.append((os.path.relpath(path, REPO_ROOT), f.read()))
+    for pages in synthetic_pages:
+        docs.append((f"synthetic-{pages}p", resume_pdf(pages, seed=pages)[0]))
+    return docs
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'document':<32} {'pages':>5} {'plain p50':>10} {'layout p50':>11} {'ratio':>6} "
+          f"{'rules conf plain/layout':>24}  sections from layout")
+    for r in results:
+        plain, layout = r["plain"], r["layout"]
+        ratio = layout["ms"]["p50"] / plain["ms"]["p50"] if plain["ms"]["p50"] else 0.0
+        sections = ", ".join(layout["sections"]) or "-"
+        print(f"{r['name']:<32} {r['pages']:>5} {plain['ms']['p50']:>8.2f}ms {layout['ms']['p50']:>9.2f}ms "
+              f"{ratio:>5.1f}x {plain['rules_confidence']:>11.2f} / {layout['rules_confidence']:<10.2f}  {sections}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", nargs="*", default=None,
+                        help="PDFs to measure (default: the *.pdf files at the repository root)")
+    parser.add_argument("--synthetic-pages", default="1,4,12", help="sizes of synthetic resumes to add ('' for none)")
+    parser.add_argument("--iterations", type=int, default=20, help="timed runs per document and mode")
+    parser.add_argument("--output", default=None, help="also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    files = args.files if args.files is not None else sorted(glob.glob(os.path.join(REPO_ROOT, "*.pdf")))
+    synthetic = [int(p) for p in args.synthetic_pages.split(",") if p.strip()]
+    results = [measure(name, data, args.iterations) for name, data in samples(files, synthetic)]
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
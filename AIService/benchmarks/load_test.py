@@ -0,0 +1,249 @@
+# AIService/benchmarks/load_test.py
+"""
+In-process load test of the FastAPI app that reports event-loop lag and what blocked it.
+
+N simulated users each run analyze -> optimize -> download flows against `main.app`
+through httpx's ASGI transport. LLM calls are answered by the gateway's replay provider,
+S3 is a fake boto3 client that blocks like the real one (behind `AsyncS3Client` and in
+`analysis_storage`), and FileService is a fake served over HTTP on a background thread.
+A `LoopLagMonitor` runs alongside; the report lists per-endpoint latencies, loop lag
+percentiles and the call sites the loop was blocked in, most expensive first.
+
+Run from AIService/:
+    python -m benchmarks.load_test --users 20 --iterations 2
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import contextlib
+import importlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+from jose import jwt
+
+from benchmarks.backends import FakeFileService, FakeS3, wire_orchestrator
+from benchmarks.documents import job_description, resume_json, resume_pdf
+from benchmarks.measure import summarize
+
+logger = logging.getLogger(__name__)
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class LoadTest:
+    """Seeds the fakes, drives the user flows and collects per-endpoint samples."""
+
+    def __init__(self, file_service: FakeFileService, secret: str, args: argparse.Namespace):
+        self.file_service = file_service
+        self.secret = secret
+        self.args = args
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, List[str]] = defaultdict(list)
+        self.flow_latencies: List[float] = []
+        self.failed_flows = 0
+
+    def add_user(self, index: int) -> Dict[str, str]:
+        user_id, resume_id = f"load-user-{index}", f"load-resume-{index}"
+        content, _ = resume_pdf(self.args.pages, index)
+        self.file_service.add_resume(user_id, resume_id, content, parsed_json=resume_json(index))
+        return {
+            "user_id": user_id,
+            "resume_id": resume_id,
+            "token": jwt.encode({"sub": user_id}, self.secret, algorithm="HS256"),
+            "jd": job_description(index),
+        }
+
+    async def _call(self, client: httpx.AsyncClient, name: str, user: Dict[str, str], **kwargs: Any) -> Optional[httpx.Response]:
+        self.requests[name] += 1
+        started = time.perf_counter()
+        try:
+            response = await client.post(name.split(" ", 1)[1], headers={"Authorization": f"Bearer {user['token']}"}, **kwargs)
+        except Exception as e:
+            self.errors[name].append(f"{type(e).__name__}: {e}")
+            return None
+        self.samples[name].append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            self.errors[name].append(f"HTTP {response.status_code}: {response.text[:120]}")
+            return None
+        return response
+
+    async def flow(self, client: httpx.AsyncClient, user: Dict[str, str]) -> bool:
+        """analyze -> optimize -> download for one user; False if any step failed."""
+        started = time.perf_counter()
+        analyzed = await self._call(client, "POST /analyze-application", user, json={
+            "job_title": "Software Engineer", "company_name": "Bench Corp",
+            "job_description_text": user["jd"], "resume_id": user["resume_id"],
+        })
+        if analyzed is None:
+            return False
+        analysis = analyzed.json()
+        await asyncio.sleep(self.args.think_time)
+
+        optimized = await self._call(client, "POST /optimize-resume", user, json={
+            "user_id": analysis["user_id"], "analysis_id": analysis["analysis_id"], "job_title": "Software Engineer",
+            "resume_id": analysis["resume_id"], "resume_content": analysis["resume_content"],
+            "job_description": analysis["job_description"], "relationship_map": analysis["relationship_map"],
+            "job_match_analysis": analysis["job_match_analysis"],
+        })
+        if optimized is None:
+            return False
+        # The analysis record is updated in the background; users read suggestions before downloading
+        await asyncio.sleep(self.args.think_time)
+
+        downloaded = await self._call(client, "POST /download-enhanced-resume", user,
+                                      params={"analysis_id": analysis["analysis_id"]})
+        if downloaded is None:
+            return False
+        self.flow_latencies.append((time.perf_counter() - started) * 1000)
+        return True
+
+    async def user(self, client: httpx.AsyncClient, user: Dict[str, str], delay: float) -> None:
+        await asyncio.sleep(delay)
+        for _ in range(self.args.iterations):
+            if not await self.flow(client, user):
+                self.failed_flows += 1
+
+    def endpoint_report(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "requests": self.requests[name], "errors": len(self.errors[name]),
+                "latency_ms": summarize(self.samples[name]), "error_samples": sorted(set(self.errors[name]))[:3],
+            }
+            for name in sorted(self.requests)
+        }
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    s3 = FakeS3(latency=args.s3_latency)
+    file_service = FakeFileService(s3, latency=args.fileservice_latency)
+    # FILES_API_URL and the JWT secret are read when main is imported, so they're set first
+    os.environ["FILES_API_URL"] = file_service.serve()
+    os.environ.setdefault("NEXTAUTH_SECRET", "load-test-secret")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    app_module = importlib.import_module("main")
+    from services import analysis_storage
+    from services.fake_llm import FakeLLMProvider
+    from services.llm_gateway import llm_gateway, REPLAY
+    from services.loop_monitor import LoopLagMonitor
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    if not args.verbose:
+        logging.getLogger("services.loop_monitor").setLevel(logging.ERROR)
+
+    llm_gateway.use_fake(FakeLLMProvider(latency=args.llm_latency, latency_by_model={}, seed=args.seed), mode=REPLAY)
+    await wire_orchestrator(app_module.orchestrator, s3)
+    analysis_storage.s3_client = s3  # it calls boto3 directly, so blocking here is blocking in production
+
+    monitor = LoopLagMonitor(
+        interval=args.monitor_interval, block_threshold=args.block_threshold, ignored_paths=(BENCHMARKS_DIR,)
+    )
+    load = LoadTest(file_service, os.environ["NEXTAUTH_SECRET"], args)
+    users = [load.add_user(i) for i in range(args.users)]
+    warmup_user = load.add_user(1_000_000)
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://aiservice", timeout=args.timeout) as client:
+            with quiet:
+                monitor.start()
+                await load.flow(client, warmup_user)  # starts the extraction pool and lazy clients
+                monitor.reset()
+                load.requests.clear()
+                load.samples.clear()
+                load.errors.clear()
+                load.flow_latencies.clear()
+
+                started = time.perf_counter()
+                await asyncio.gather(*(
+                    load.user(client, user, delay=i * args.ramp_up / max(1, args.users))
+                    for i, user in enumerate(users)
+                ))
+                elapsed = time.perf_counter() - started
+                await monitor.stop()
+    finally:
+        await app_module.orchestrator.close()
+        await llm_gateway.close()
+        file_service.shutdown()
+
+    flows = args.users * args.iterations
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "verbose")},
+        "duration_s": round(elapsed, 2),
+        "flows": {"total": flows, "failed": load.failed_flows, "latency_ms": summarize(load.flow_latencies),
+                  "throughput_per_s": round((flows - load.failed_flows) / elapsed, 3) if elapsed else 0.0},
+        "endpoints": load.endpoint_report(),
+        "event_loop": monitor.report(top=args.top),
+        "backends": {"s3": dict(s3.counts), "fileservice_requests": file_service.requests},
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    flows = report["flows"]
+    print(f"\n=== {report['config']['users']} users x {report['config']['iterations']} flows: "
+          f"{flows['total'] - flows['failed']}/{flows['total']} completed in {report['duration_s']}s "
+          f"({flows['throughput_per_s']} flows/s, flow p50={flows['latency_ms']['p50']:.0f}ms "
+          f"p95={flows['latency_ms']['p95']:.0f}ms) ===")
+    for name, e in report["endpoints"].items():
+        latency = e["latency_ms"]
+        print(f"  {name:<32} n={e['requests']:<4} err={e['errors']:<3} p50={latency['p50']:>8.1f}ms "
+              f"p95={latency['p95']:>8.1f}ms p99={latency['p99']:>8.1f}ms")
+        for sample in e["error_samples"]:
+            print(f"      error: {sample}")
+
+    loop = report["event_loop"]
+    lag = loop["lag_ms"]
+    print(f"\n=== Event loop lag: p50={lag['p50']}ms p95={lag['p95']}ms p99={lag['p99']}ms max={lag['max']}ms; "
+          f"{loop['blocks']} blocks over {loop['block_threshold_ms']}ms, {loop['blocked_ms']:.0f}ms blocked in total ===")
+    if not loop["top_blocking_sites"]:
+        print("  No blocking call sites sampled")
+    for rank, site in enumerate(loop["top_blocking_sites"], 1):
+        lines = ", ".join(str(line) for line in site["lines"])
+        print(f"  {rank:>2}. {site['site']:<60} ~{site['blocked_ms']:>8.0f}ms {site['share']:>6.1%}  (lines {lines})")
+        for leaf in site["leaves"]:
+            print(f"        in {leaf}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="simulated concurrent users")
+    parser.add_argument("--iterations", type=int, default=2, help="analyze -> optimize -> download flows per user")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=0.2, help="seconds a user waits between steps")
+    parser.add_argument("--pages", type=int, default=2, help="resume size in pages")
+    parser.add_argument("--llm-latency", default="fixed:0.15", help="fake LLM latency spec (see services/fake_llm.py)")
+    parser.add_argument("--s3-latency", type=float, default=0.02, help="seconds per S3 round trip")
+    parser.add_argument("--fileservice-latency", type=float, default=0.01, help="seconds per FileService call")
+    parser.add_argument("--monitor-interval", type=float, default=0.01, help="loop heartbeat interval in seconds")
+    parser.add_argument("--block-threshold", type=float, default=0.02, help="lag in seconds that counts as blocked")
+    parser.add_argument("--top", type=int, default=10, help="blocking call sites to report")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="also write the full report to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="keep app output, INFO logs and per-block warnings")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    report = asyncio.run(run_load_test(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
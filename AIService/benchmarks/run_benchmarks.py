@@ -0,0 +1,366 @@
+# AIService/benchmarks/run_benchmarks.py
+"""
+End-to-end benchmark of `orchestrate_initial_analysis` and `orchestrate_resume_optimization`.
+
+Every external dependency is replaced in-process: LLM calls are answered by the gateway's
+replay provider (so limiters, retries and hedging still run, and the response cache, which
+replay mode bypasses, never hides a call), S3 is an in-memory fake behind
+the real `AsyncS3Client` and FileService is an httpx mock transport, each with a configurable
+latency. Text extraction runs for real on synthetic PDFs. For each (concurrency, document size) scenario the runner
+reports per-stage p50/p95/p99 latency, throughput, CPU time, peak RSS and estimated LLM prompt
+tokens, plus per-phase latencies taken from the request traces, and compares them against a
+stored baseline.
+
+Run from AIService/:
+    python -m benchmarks.run_benchmarks                      # compare against the baseline
+    python -m benchmarks.run_benchmarks --concurrency 1,4,16 --pages 1,3,8
+    python -m benchmarks.run_benchmarks --save-baseline      # record a new baseline
+"""
+
+import os
+
+# Must be set before the orchestrator reads its configuration
+os.environ.setdefault("FILES_API_URL", "http://fileservice.bench")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import io
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import contextlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from agents.orchestrator import DocumentAnalysisOrchestrator
+from benchmarks.backends import FakeFileService, FakeS3, wire_orchestrator
+from benchmarks.documents import job_description, resume_pdf
+from benchmarks.measure import RSSSampler, summarize
+from services.fake_llm import FakeLLMProvider
+from services.llm_gateway import llm_gateway, REPLAY
+from services.tracing import start_trace
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "default.json")
+
+# Phases shown in the console report (every span name is kept in the JSON output)
+REPORTED_PHASES = [
+    "resume.fetch", "fileservice.s3-link", "s3.get_object", "extract.text", "analysis.jd",
+    "analysis.resume", "analysis.cross_document", "agent.resume_optimizer", "llm.gemini", "llm.claude",
+]
+
+# Metrics compared against the baseline: (path, higher_is_worse, absolute noise floor)
+COMPARED_METRICS = [
+    (("latency_ms", "p50"), True, 5.0),
+    (("latency_ms", "p95"), True, 5.0),
+    (("latency_ms", "p99"), True, 5.0),
+    (("throughput_rps",), False, 0.05),
+    (("cpu_ms_per_request",), True, 2.0),
+    (("peak_rss_mb",), True, 10.0),
+    (("prompt_tokens_per_request",), True, 50.0),
+]
+
+
+# --- Stages and scenarios ---
+async def run_stage(
+    name: str, jobs: List[Callable[[], Awaitable[Any]]], concurrency: int
+) -> Tuple[Dict[str, Any], List[Any]]:
+    """
+    Runs `jobs` with at most `concurrency` in flight, each in its own trace. Returns the
+    stage metrics and the job results (None for failed jobs). CPU time is this process's
+    only: extraction workers run in separate processes and are not included.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Any] = [None] * len(jobs)
+    latencies: List[float] = []
+    phases: Dict[str, List[float]] = defaultdict(list)
+    phase_counts: Dict[str, int] = defaultdict(int)
+    prompt_tokens: List[int] = []
+    errors: List[str] = []
+
+    async def _one(index: int, job: Callable[[], Awaitable[Any]]) -> None:
+        async with semaphore:
+            trace = start_trace(f"bench.{name}")
+            started = time.perf_counter()
+            try:
+                results[index] = await job()
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+            if trace:
+                trace.root.end()
+                per_request: Dict[str, float] = defaultdict(float)
+                tokens = 0
+                for s in trace.spans:
+                    per_request[s.name] += s.duration_ms
+                    phase_counts[s.name] += 1
+                    tokens += s.attributes.get("prompt_tokens_est", 0)
+                prompt_tokens.append(tokens)
+                for phase, duration in per_request.items():
+                    phases[phase].append(duration)
+
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    with RSSSampler() as rss:
+        await asyncio.gather(*(_one(i, job) for i, job in enumerate(jobs)))
+    wall = time.perf_counter() - wall_started
+    cpu_ms = (time.process_time() - cpu_started) * 1000
+
+    completed = len(latencies)
+    metrics = {
+        "requests": len(jobs),
+        "errors": len(errors),
+        "latency_ms": summarize(latencies),
+        "throughput_rps": round(completed / wall, 3) if wall else 0.0,
+        "wall_s": round(wall, 3),
+        "cpu_ms": round(cpu_ms, 1),
+        "cpu_ms_per_request": round(cpu_ms / completed, 2) if completed else 0.0,
+        "peak_rss_mb": round(rss.peak_mb, 1),
+        # Estimated LLM input tokens sent per request, retries and hedges included
+        "prompt_tokens_per_request": round(sum(prompt_tokens) / completed, 1) if completed else 0.0,
+        "phases_ms": {
+            phase: {**summarize(values), "calls_per_request": round(phase_counts[phase] / completed, 2)}
+            for phase, values in sorted(phases.items())
+        },
+    }
+    if errors:
+        metrics["error_samples"] = sorted(set(errors))[:5]
+    return metrics, results
+
+
+async def run_scenario(concurrency: int, pages: int, requests: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """One scenario on a fresh orchestrator, backends and seeded LLM fake: warm-up, analysis, optimization."""
+    fake = llm_gateway.use_fake(FakeLLMProvider(
+        recordings_path=args.recordings,
+        latency=args.llm_latency,
+        latency_by_model={},
+        error_rate=args.llm_error_rate,
+        rate_limit_rate=args.llm_rate_limit_rate,
+        seed=args.seed,
+    ), mode=REPLAY)
+    s3 = FakeS3(latency=args.s3_latency)
+    file_service = FakeFileService(s3, latency=args.fileservice_latency)
+    orchestrator = DocumentAnalysisOrchestrator()
+    await wire_orchestrator(orchestrator, s3, file_service)
+    llm_gateway.response_cache.memory.clear()
+
+    # Documents are rendered up-front so PDF generation isn't timed. Cold runs give every
+    # request its own resume and JD; --reuse-documents sends the same pair every time.
+    def _request(seed: int) -> Dict[str, Any]:
+        user_id, resume_id = f"user-{seed}", f"resume-{seed}"
+        if (user_id, resume_id) not in file_service.resumes:
+            content, _ = resume_pdf(pages, seed)
+            file_service.add_resume(user_id, resume_id, content)
+        return {
+            "user_id": user_id, "resume_id": resume_id, "job_title": "Software Engineer",
+            "jd_content": job_description(seed), "auth_token": "bench-token", "company_name": "Bench Corp",
+        }
+
+    warmup = [_request(1_000_000 + i) for i in range(args.warmup)]
+    measured = [_request(0 if args.reuse_documents else i) for i in range(requests)]
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with quiet:
+            # Starts the extraction pool and fills lazily-initialized clients outside the measurement
+            for request in warmup:
+                await orchestrator.orchestrate_initial_analysis(**request)
+
+            analysis, analysis_results = await run_stage(
+                "analysis",
+                [lambda r=request: orchestrator.orchestrate_initial_analysis(**r) for request in measured],
+                concurrency,
+            )
+            completed = [result for result in analysis_results if result is not None]
+            optimization, _ = await run_stage(
+                "optimization",
+                [lambda c=context: orchestrator.orchestrate_resume_optimization(c) for context in completed],
+                concurrency,
+            )
+        return {
+            "concurrency": concurrency,
+            "pages": pages,
+            "stages": {"analysis": analysis, "optimization": optimization},
+            "caches": orchestrator.cache_stats(),
+            "backends": {"s3": dict(s3.counts), "fileservice_requests": file_service.requests},
+            "llm": fake.stats(),
+        }
+    finally:
+        await orchestrator.close()
+
+
+def _scenario_key(concurrency: int, pages: int) -> str:
+    return f"c{concurrency}-p{pages}"
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    scenarios: Dict[str, Any] = {}
+    try:
+        for pages in args.pages:
+            for concurrency in args.concurrency:
+                requests = args.requests or max(4 * concurrency, 8)
+                key = _scenario_key(concurrency, pages)
+                print(f"Running {key}: {requests} requests...", file=sys.stderr)
+                scenarios[key] = await run_scenario(concurrency, pages, requests, args)
+    finally:
+        await llm_gateway.close()
+
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "config": _config(args),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scenarios": scenarios,
+    }
+
+
+def _config(args: argparse.Namespace) -> Dict[str, Any]:
+    """The settings that make two runs comparable."""
+    return {
+        "llm_latency": args.llm_latency,
+        "llm_error_rate": args.llm_error_rate,
+        "llm_rate_limit_rate": args.llm_rate_limit_rate,
+        "s3_latency": args.s3_latency,
+        "fileservice_latency": args.fileservice_latency,
+        "reuse_documents": args.reuse_documents,
+        "requests": args.requests,
+        "seed": args.seed,
+    }
+
+
+# --- Reporting ---
+def _lookup(metrics: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    for part in path:
+        if not isinstance(metrics, dict) or part not in metrics:
+            return None
+        metrics = metrics[part]
+    return metrics
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Stage metrics of `report` against `baseline`, for scenarios present in both. A metric
+    regresses when it moves the wrong way by more than `threshold` (relative) and by more
+    than its noise floor (absolute).
+    """
+    rows = []
+    for key, scenario in report["scenarios"].items():
+        base_scenario = baseline.get("scenarios", {}).get(key)
+        if not base_scenario:
+            continue
+        for stage, metrics in scenario["stages"].items():
+            base_metrics = base_scenario["stages"].get(stage, {})
+            for path, higher_is_worse, floor in COMPARED_METRICS:
+                now, before = _lookup(metrics, path), _lookup(base_metrics, path)
+                if now is None or before is None:
+                    continue
+                delta = now - before
+                worse = delta if higher_is_worse else -delta
+                change = delta / before if before else 0.0
+                rows.append({
+                    "scenario": key, "stage": stage, "metric": ".".join(path),
+                    "baseline": before, "current": now, "change": round(change, 4),
+                    "regressed": worse > floor and (before == 0 or worse / before > threshold),
+                })
+    return rows
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    for key, scenario in report["scenarios"].items():
+        print(f"\n=== {key} (concurrency={scenario['concurrency']}, pages={scenario['pages']}) ===")
+        for stage, m in scenario["stages"].items():
+            latency = m["latency_ms"]
+            print(
+                f"  {stage:<13} n={m['requests']:<4} err={m['errors']:<3} "
+                f"p50={latency['p50']:>8.1f}ms p95={latency['p95']:>8.1f}ms p99={latency['p99']:>8.1f}ms  "
+                f"{m['throughput_rps']:>6.2f} req/s  cpu={m['cpu_ms_per_request']:>7.1f}ms/req  rss={m['peak_rss_mb']:.0f}MB  "
+                f"prompt={m.get('prompt_tokens_per_request', 0):.0f}tok/req"
+            )
+            for phase in REPORTED_PHASES:
+                if phase in m["phases_ms"]:
+                    p = m["phases_ms"][phase]
+                    print(f"      {phase:<26} p50={p['p50']:>8.1f}ms p95={p['p95']:>8.1f}ms  x{p['calls_per_request']}")
+            for sample in m.get("error_samples", []):
+                print(f"      error: {sample}")
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+    regressions = [row for row in rows if row["regressed"]]
+    print(f"\n=== Baseline comparison (threshold {threshold:.0%}) ===")
+    for row in rows:
+        marker = "REGRESSION" if row["regressed"] else ""
+        print(
+            f"  {row['scenario']:<10} {row['stage']:<13} {row['metric']:<20} "
+            f"{row['baseline']:>10.2f} -> {row['current']:>10.2f} ({row['change']:+.1%}) {marker}"
+        )
+    print(f"\n{len(regressions)} regression(s) across {len(rows)} compared metrics")
+    return regressions
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8], help="comma-separated in-flight request levels")
+    parser.add_argument("--pages", type=_int_list, default=[1, 4], help="comma-separated resume sizes in pages")
+    parser.add_argument("--requests", type=int, default=None, help="requests per scenario (default: max(4 x concurrency, 8))")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured requests per scenario")
+    parser.add_argument("--reuse-documents", action="store_true", help="send the same resume and JD every time (warm caches)")
+    # Fixed by default so runs are comparable; e.g. lognormal:1.5:0.5 to exercise hedging and tails
+    parser.add_argument("--llm-latency", default="fixed:0.15", help="fake LLM latency spec (see services/fake_llm.py)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--recordings", default=None, help="JSON-lines LLM recordings to replay instead of canned responses")
+    parser.add_argument("--s3-latency", type=float, default=0.02, help="seconds per S3 round trip")
+    parser.add_argument("--fileservice-latency", type=float, default=0.01, help="seconds per FileService call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against / save to")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 when a metric regresses")
+    parser.add_argument("--output", default=None, help="also write the full report to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="keep orchestrator output and INFO logs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    report = asyncio.run(run_benchmarks(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    regressions: List[Dict[str, Any]] = []
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("\nWarning: baseline was recorded with different settings; comparison is indicative only")
+        regressions = print_comparison(compare(report, baseline, args.threshold), args.threshold)
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# AIService/benchmarks/tune_skill_similarity.py
+"""
+Tunes SKILL_NGRAM_THRESHOLD (services/skill_similarity.py) against the LLM's own skill matches.
+
+Reads LLM recordings (the JSON-lines file written with LLM_PROVIDER_MODE=record and
+FAKE_LLM_RECORDINGS) and takes every `map_skills` response as labels: each
+(jd_skill, resume_skill) pair the model returned with enough confidence is a match, and
+pairing a JD skill with a resume skill the same response gave to a different JD skill is
+a non-match. Pairs equal after canonicalization are left out, since they match at any
+threshold. Every other pair goes through the same `SkillIndex.match` the relationship
+mapper runs (word index at SKILL_MAP_LOCAL_THRESHOLD, then the n-gram pass), so pairs the
+word index accepts count at every threshold and partial overlaps it leaves to the LLM
+never count. The threshold with the best F-beta (beta < 1 favours precision: a wrong
+local match is worse than leaving a skill to the LLM) is reported, from the middle of the
+run of thresholds that tie for it.
+
+Without recordings it falls back to a small hand-labelled seed set, which is what the
+default threshold was set from; re-run on real recordings before relying on it.
+
+Run from AIService/:
+    python -m benchmarks.tune_skill_similarity --recordings llm_recordings.jsonl
+    python -m benchmarks.tune_skill_similarity            # seed set only
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agents.relationship_mapper_agent import SKILL_MAP_LOCAL_THRESHOLD
+from services.skill_index import SkillIndex, canonical_skill
+from services.skill_similarity import SKILL_NGRAM_THRESHOLD
+from services.utils import _safe_json
+
+# (jd skill, resume skill, same skill?): spellings only the n-gram pass can resolve, and
+# near-misses either pass could wrongly accept
+SEED_PAIRS: List[Tuple[str, str, bool]] = [
+    ("Spring Boot", "SpringBoot", True), ("TensorFlow 2.x", "Tensorflow", True), ("Next.js", "NextJS", True),
+    ("Vue", "Vue.js", True), ("GitHub Actions", "Github-Actions", True), ("Scikit Learn", "scikit-learn", True),
+    ("PostgreSQL 15", "Postgres", True), ("Elastic Search", "Elasticsearch", True), ("Type Script", "TypeScript", True),
+    ("RESTful APIs", "REST APIs", True), ("Micro-services", "Microservices", True), ("Terraform Cloud", "Terraform", True),
+    ("Java", "JavaScript", False), ("SQL", "NoSQL", False), ("React", "React Native", False), ("Redis", "Redux", False),
+    ("Python", "PyTorch", False), ("MySQL", "PostgreSQL", False), ("Go", "Google Cloud", False), ("C", "C++", False),
+    ("C#", "C++", False), ("Angular", "AngularJS", False), ("Swift", "SwiftUI", False), ("Kotlin", "Kotlin Multiplatform", False),
+    ("Azure", "AWS", False), ("Spark", "Sparkle", False), ("Hadoop", "Hadoop HDFS", True), ("Jenkins", "Jenkins X", True),
+]
+
+
+def recorded_pairs(path: str, min_confidence: float) -> List[Tuple[str, str, bool]]:
+    """Labelled (jd skill, resume skill) pairs from the map_skills responses in a recordings file."""
+    pairs: List[Tuple[str, str, bool]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("task") != "map_skills":
+                continue
+            try:
+                items = _safe_json(entry.get("text") or "")
+            except Exception:
+                continue
+            matches = {}
+            for item in items if isinstance(items, list) else []:
+                if not isinstance(item, dict):
+                    continue
+                jd_skill, resume_skill = (item.get("jd_skill") or "").strip(), (item.get("resume_skill") or "").strip()
+                try:
+                    confidence = float(item.get("confidence", 0.0))
+                except (TypeError, ValueError):
+                    confidence = 0.0
+                if jd_skill and resume_skill and confidence >= min_confidence:
+                    matches[jd_skill] = resume_skill
+            resume_skills = set(matches.values())
+            for jd_skill, resume_skill in matches.items():
+                pairs.append((jd_skill, resume_skill, True))
+                pairs.extend((jd_skill, other, False) for other in resume_skills if other != resume_skill)
+    return pairs
+
+
+def score_pairs(pairs: List[Tuple[str, str, bool]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (score, label, decided by the word index) arrays from `SkillIndex.match` on each pair.
+    Matching with an n-gram threshold of 0 yields the word index's decision plus the n-gram
+    similarity of every skill it left to the n-gram pass; a pair then matches at threshold t
+    exactly when its score reaches t. Word-index matches score 1.0 (any threshold) and
+    skills left to the LLM score -1.0 (none).
+    """
+    scores, by_words = [], []
+    for jd_skill, resume_skill, _ in pairs:
+        matched, _ = SkillIndex([resume_skill]).match([jd_skill], SKILL_MAP_LOCAL_THRESHOLD, 0.0)
+        found = matched[0] if matched else None
+        by_words.append(found is not None and found.method == "tokens")
+        scores.append(-1.0 if found is None else 1.0 if found.method == "tokens" else found.score)
+    labels = np.array([label for _, _, label in pairs], dtype=bool)
+    return np.array(scores), labels, np.array(by_words, dtype=bool)
+
+
+def sweep(scores: np.ndarray, labels: np.ndarray, beta: float, thresholds: np.ndarray) -> List[Dict[str, float]]:
+    # Thresholds x pairs in one comparison
+    predicted = scores[None, :] >= thresholds[:, None]
+    tp = (predicted & labels).sum(axis=1)
+    fp = (predicted & ~labels).sum(axis=1)
+    fn = (~predicted & labels).sum(axis=1)
+    precision = np.where(tp + fp > 0, tp / np.maximum(tp + fp, 1), 1.0)
+    recall = tp / max(int(labels.sum()), 1)
+    b2 = beta * beta
+    f_beta = np.where(precision + recall > 0, (1 + b2) * precision * recall / np.maximum(b2 * precision + recall, 1e-9), 0.0)
+    return [
+        {"threshold": round(float(t), 2), "precision": round(float(p), 3), "recall": round(float(r), 3),
+         "f_beta": round(float(f), 3), "false_matches": int(x), "missed": int(m)}
+        for t, p, r, f, x, m in zip(thresholds, precision, recall, f_beta, fp, fn)
+    ]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", default=os.getenv("FAKE_LLM_RECORDINGS"),
+                        help="LLM recordings JSON-lines file (default: $FAKE_LLM_RECORDINGS; seed set if unset)")
+    parser.add_argument("--min-confidence", type=float, default=0.4, help="LLM confidence that counts as a match")
+    parser.add_argument("--beta", type=float, default=0.5, help="F-beta weighting (below 1 favours precision)")
+    parser.add_argument("--output", default=None, help="also write the sweep to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.recordings and os.path.exists(args.recordings):
+        pairs, source = recorded_pairs(args.recordings, args.min_confidence), args.recordings
+    else:
+        pairs, source = list(SEED_PAIRS), "seed set"
+    pairs = [(jd, r, label) for jd, r, label in pairs if canonical_skill(jd) != canonical_skill(r)]
+    if not pairs or not any(label for _, _, label in pairs):
+        print(f"No usable map_skills matches in {source}")
+        return 1
+
+    scores, labels, by_words = score_pairs(pairs)
+    rows = sweep(scores, labels, args.beta, np.round(np.arange(0.40, 1.0001, 0.02), 2))
+    # Middle of the best-scoring run of thresholds, so the pick isn't at the edge of a plateau
+    top = max(row["f_beta"] for row in rows)
+    tied = [row for row in rows if row["f_beta"] == top]
+    best = tied[len(tied) // 2]
+
+    print(f"\n{len(pairs)} pairs from {source} ({int(labels.sum())} matches, {int((~labels).sum())} non-matches)")
+    print(f"Word index (SKILL_MAP_LOCAL_THRESHOLD={SKILL_MAP_LOCAL_THRESHOLD:.2f}) decides {int(by_words.sum())} at any "
+          f"threshold ({int((by_words & ~labels).sum())} false); {int((scores < 0).sum())} are left to the LLM")
+    print(f"{'threshold':>9} {'precision':>9} {'recall':>7} {'F' + str(args.beta):>6} {'false':>6} {'missed':>6}")
+    for row in rows:
+        marker = " <- best" if row is best else (" (current)" if row["threshold"] == round(SKILL_NGRAM_THRESHOLD, 2) else "")
+        print(f"{row['threshold']:>9.2f} {row['precision']:>9.3f} {row['recall']:>7.3f} {row['f_beta']:>6.3f} "
+              f"{row['false_matches']:>6} {row['missed']:>6}{marker}")
+    print(f"\nSuggested: SKILL_NGRAM_THRESHOLD={best['threshold']:.2f} (current {SKILL_NGRAM_THRESHOLD:.2f})")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"source": source, "pairs": len(pairs), "best": best, "sweep": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,8 @@
 # AIService/main.py
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, Dict, Any, Union
 from jose import jwt, JWTError
@@ -12,7 +12,11 @@ import logging
 import os
 import uuid
 import io
+import json
 from services.analysis_storage import update_analysis_with_enhancement
+from services import tracing, metrics
+from services.llm_gateway import llm_gateway
+from services.loop_monitor import loop_monitor, LOOP_MONITOR_ENABLED
 import asyncio
 
 # Load environment variables
@@ -86,9 +90,27 @@ app = FastAPI(
     description="Analyzes resumes against job descriptions."
 )
 orchestrator = DocumentAnalysisOrchestrator()
+metrics.register_cache_stats(orchestrator.cache_stats)
+metrics.register_pool_stats(orchestrator.text_extractor.stats)
+metrics.register_limit_stats(lambda: llm_gateway.stats()["models"])
+metrics.register_cache_stats(llm_gateway.response_cache.stats)
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+@app.on_event("startup")
+async def start_loop_monitor():
+    """Track event-loop lag and log the call sites that block it."""
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
+@app.on_event("shutdown")
+async def shutdown_orchestrator():
+    """Release the orchestrator's HTTP client, worker pools and LLM connections."""
+    await loop_monitor.stop()
+    await orchestrator.close()
+    await llm_gateway.close()
+    await tracing.exporter.close()
+
 # --- CORS Middleware ---
 app.add_middleware(
     CORSMiddleware,
@@ -96,8 +118,83 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[tracing.REQUEST_ID_HEADER, "Server-Timing"],
 )
 
+# --- Request tracing and metrics ---
+async def _finish_after_stream(body_iterator, on_done):
+    """Runs `on_done` once a (possibly streamed) response body has been fully sent."""
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        on_done()
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Starts a trace per request (reusing the caller's X-Request-ID / traceparent), echoes
+    the request ID, returns a Server-Timing summary of the spans recorded so far and
+    records the request's latency histogram sample.
+    """
+    if request.url.path == "/metrics":
+        return await call_next(request)
+    timer = metrics.RequestTimer(request.method)
+    trace = tracing.start_trace(
+        f"{request.method} {request.url.path}",
+        request_id=request.headers.get(tracing.REQUEST_ID_HEADER),
+        traceparent=request.headers.get(tracing.TRACEPARENT_HEADER),
+    )
+    try:
+        response = await call_next(request)
+    except Exception:
+        timer.finish(request.scope, 500)
+        tracing.finish_trace(trace)
+        raise
+    if trace:
+        trace.root.set_attribute("http.status_code", response.status_code)
+        response.headers[tracing.REQUEST_ID_HEADER] = trace.request_id
+        response.headers["Server-Timing"] = trace.server_timing()
+
+    def _on_done():
+        timer.finish(request.scope, response.status_code)
+        tracing.finish_trace(trace)
+
+    # The body may still be streaming (SSE); finish timing once it's done
+    response.body_iterator = _finish_after_stream(response.body_iterator, _on_done)
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+async def _run_application_analysis(
+    request: JobMatchRequest, user_id: str, token: str, on_event=None
+) -> Dict[str, Any]:
+    """Runs the initial analysis and stores it; shared by the blocking and streaming endpoints."""
+    analysis_results = await orchestrator.orchestrate_initial_analysis(
+        user_id=user_id,
+        resume_id=request.resume_id,
+        job_title=request.job_title,
+        company_name=request.company_name,
+        jd_content=request.job_description_text,
+        auth_token=token,
+        job_url=str(request.job_url) if request.job_url else None,
+        on_event=on_event
+    )
+    
+    # Add request data to results for storage
+    analysis_results["job_title"] = request.job_title
+    analysis_results["company_name"] = request.company_name
+    
+    # Store the analysis
+    storage_summary = await store_analysis_complete(user_id, analysis_results, auth_token=token)
+    
+    # Add the analysis_id to the response
+    analysis_results["analysis_id"] = storage_summary["analysis_id"]
+    return analysis_results
+
 # In AIService/main.py, update the analyze_application endpoint
 @app.post("/analyze-application")
 async def analyze_application(
@@ -111,30 +208,72 @@ async def analyze_application(
     logger.info(f"Received analysis request for user_id: {user_id}, resume_id: {request.resume_id}")
     
     try:
-        analysis_results = await orchestrator.orchestrate_initial_analysis(
-            user_id=user_id,
-            resume_id=request.resume_id,
-            job_title=request.job_title,
-            company_name=request.company_name,
-            jd_content=request.job_description_text,
-            auth_token=token
-        )
-        
-        # Add request data to results for storage
-        analysis_results["job_title"] = request.job_title
-        analysis_results["company_name"] = request.company_name
-        
-        # Store the analysis
-        storage_summary = await store_analysis_complete(user_id, analysis_results, auth_token=token)
-        
-        # Add the analysis_id to the response
-        analysis_results["analysis_id"] = storage_summary["analysis_id"]
-        
+        analysis_results = await _run_application_analysis(request, user_id, token)
         return JSONResponse(status_code=status.HTTP_200_OK, content=analysis_results)
 
     except Exception as e:
         logger.error(f"Error during application analysis for user {user_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+SSE_KEEPALIVE_SECONDS = 15
+
+def _sse_message(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/analyze-application/stream")
+async def analyze_application_stream(
+    request: JobMatchRequest,
+    user_id: str = Depends(get_current_user_id),
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Streaming variant of /analyze-application (Server-Sent Events).
+
+    Emits one event per completed step: resume_/jd_classification, resume_/jd_entities,
+    relationship_map_subtask (one per subtask), relationship_map, match_score,
+    strength_summary and job_match. Ends with 'complete' (the same payload as
+    /analyze-application) or 'error'.
+    """
+    logger.info(f"Received streaming analysis request for user_id: {user_id}, resume_id: {request.resume_id}")
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_event(event: str, data: Dict[str, Any]) -> None:
+        await queue.put((event, data))
+
+    async def run_analysis():
+        try:
+            analysis_results = await _run_application_analysis(request, user_id, token, on_event=on_event)
+            await queue.put(("complete", analysis_results))
+        except Exception as e:
+            logger.error(f"Error during streaming analysis for user {user_id}: {str(e)}", exc_info=True)
+            await queue.put(("error", {"detail": str(e)}))
+        finally:
+            await queue.put(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run_analysis())
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"  # comment line keeps proxies from closing an idle stream
+                    continue
+                if item is None:
+                    break
+                event, data = item
+                yield _sse_message(event, data)
+        finally:
+            # Client went away: stop the analysis
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
     
     
 @app.post("/optimize-resume")
@@ -0,0 +1,130 @@
+# AIService/services/adaptive_limiter.py
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = "success"
+OVERLOAD = "overload"  # 429 / 5xx / timeout: the provider is telling us to slow down
+IGNORE = "ignore"      # failures that say nothing about capacity (bad request, auth, parsing)
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit that adapts to provider feedback (additive increase, multiplicative
+    decrease). Each success while the limiter is busy adds ~1 slot per `limit` successes,
+    i.e. about one slot per round trip; an overload signal multiplies the limit by
+    `decrease`. Overloads from calls started before the last cut are ignored, so one
+    burst of 429s counts as a single congestion event.
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        name: str = "",
+    ):
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max(max_limit, min_limit))
+        self.limit = min(max(float(initial), self.min_limit), self.max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.name = name
+        self.in_flight = 0
+        self.overloads = 0
+        self._last_decrease = float("-inf")
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self) -> float:
+        """Waits for a slot; returns the start stamp to hand back to `release`."""
+        while not self._has_capacity():
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # We were woken but won't take the slot; pass the wake-up on
+                    self._wake()
+                raise
+        self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, outcome: str = SUCCESS, started: Optional[float] = None) -> None:
+        busy = self.in_flight * 2 >= self.limit
+        self.in_flight -= 1
+        if outcome == OVERLOAD:
+            if started is None or started >= self._last_decrease:
+                previous = self.limit
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+                self._last_decrease = time.monotonic()
+                self.overloads += 1
+                logger.info(f"Concurrency limit for {self.name or 'limiter'} cut {previous:.1f} -> {self.limit:.1f}")
+        elif outcome == SUCCESS and busy:
+            # Only grow when we're using the limit; an idle limiter learns nothing
+            self.limit = min(self.max_limit, self.limit + self.increase / max(self.limit, 1.0))
+        self._wake()
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "overloads": self.overloads,
+        }
+
+
+class TokenBucket:
+    """
+    Requests-per-minute quota. Holds up to `capacity` tokens (default: five seconds of
+    quota) and refills continuously; `acquire` waits for a token instead of letting the
+    call run into a provider 429.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate * 5)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def drain(self) -> None:
+        """Empties the bucket after a 429, so the next calls wait for fresh quota."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {"rpm": round(self.rate * 60, 1), "tokens": round(self.tokens, 2)}
@@ -12,6 +12,8 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
+from services.tracing import span, propagation_headers
+
 logger = logging.getLogger(__name__)
 
 s3_client = boto3.client('s3', region_name=os.getenv("AWS_REGION", "us-east-2"))
@@ -38,18 +40,19 @@ async def store_analysis_complete(
         compressed_data = gzip.compress(json_str.encode('utf-8'))
         
         # Upload to S3
-        s3_client.put_object(
-            Bucket=S3_BUCKET,
-            Key=s3_key,
-            Body=compressed_data,
-            ContentType='application/json',
-            ContentEncoding='gzip',
-            Metadata={
-                'user_id': user_id,
-                'analysis_id': analysis_id,
-                'created_at': datetime.utcnow().isoformat()
-            }
-        )
+        with span("s3.put_object", bucket=S3_BUCKET, key=s3_key, bytes=len(compressed_data)):
+            s3_client.put_object(
+                Bucket=S3_BUCKET,
+                Key=s3_key,
+                Body=compressed_data,
+                ContentType='application/json',
+                ContentEncoding='gzip',
+                Metadata={
+                    'user_id': user_id,
+                    'analysis_id': analysis_id,
+                    'created_at': datetime.utcnow().isoformat()
+                }
+            )
         
         # 2. Create summary for DynamoDB
         summary = {
@@ -71,14 +74,16 @@ async def store_analysis_complete(
         async with httpx.AsyncClient() as client:
             # You'll need the auth token passed from the main endpoint
             headers = {
-                "Authorization": f"Bearer {auth_token}"  # Pass this from main.py
+                "Authorization": f"Bearer {auth_token}",  # Pass this from main.py
+                **propagation_headers()
             }
 
-            response = await client.post(
-                f"{FILES_API_URL}/analyses",
-                headers=headers,
-                json=summary
-            )
+            with span("fileservice.store_analysis"):
+                response = await client.post(
+                    f"{FILES_API_URL}/analyses",
+                    headers=headers,
+                    json=summary
+                )
 
             if response.status_code != 200:
                 logger.error(f"Failed to store analysis summary in DynamoDB: {response.text}")
@@ -98,10 +103,11 @@ async def retrieve_full_analysis(user_id: str, analysis_id: str) -> Dict[str, An
         s3_key = f"users/{user_id}/analysis/{analysis_id}/full.json.gz"
         
         # Get object from S3
-        response = s3_client.get_object(Bucket=S3_BUCKET, Key=s3_key)
+        with span("s3.get_object", bucket=S3_BUCKET, key=s3_key):
+            response = s3_client.get_object(Bucket=S3_BUCKET, Key=s3_key)
+            compressed_data = response['Body'].read()
         
         # Decompress and parse
-        compressed_data = response['Body'].read()
         json_str = gzip.decompress(compressed_data).decode('utf-8')
         
         return json.loads(json_str)
@@ -143,7 +149,8 @@ async def update_analysis_with_enhancement(
         async with httpx.AsyncClient(timeout=30.0) as client:  # Add timeout
             headers = {
                 "Authorization": f"Bearer {auth_token}",
-                "Content-Type": "application/json"  # Explicit content type
+                "Content-Type": "application/json",  # Explicit content type
+                **propagation_headers()
             }
 
             # Validate input
@@ -160,11 +167,12 @@ async def update_analysis_with_enhancement(
 
             logger.info(f"Updating analysis {analysis_id} with enhancement score: {match_after_enhancement}%")
 
-            response = await client.patch(
-                f"{FILES_API_URL}/analyses/{analysis_id}",
-                headers=headers,
-                json=update_data
-            )
+            with span("fileservice.update_analysis"):
+                response = await client.patch(
+                    f"{FILES_API_URL}/analyses/{analysis_id}",
+                    headers=headers,
+                    json=update_data
+                )
 
             # More detailed error handling
             if response.status_code == 404:
@@ -209,13 +217,15 @@ async def get_resume_parsed_json(
         async with httpx.AsyncClient(timeout=30.0) as client:
             headers = {
                 "Authorization": f"Bearer {auth_token}",
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
+                **propagation_headers()
             }
 
-            response = await client.get(
-                f"{FILES_API_URL}/resumes/{resume_id}/parsed-json",
-                headers=headers
-            )
+            with span("fileservice.resume_parsed_json"):
+                response = await client.get(
+                    f"{FILES_API_URL}/resumes/{resume_id}/parsed-json",
+                    headers=headers
+                )
 
             if response.status_code == 404:
                 logger.error(f"Resume {resume_id} or parsed JSON not found for user {user_id}")
@@ -256,13 +266,15 @@ async def get_full_analysis(
         async with httpx.AsyncClient(timeout=30.0) as client:
             headers = {
                 "Authorization": f"Bearer {auth_token}",
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
+                **propagation_headers()
             }
 
-            response = await client.get(
-                f"{FILES_API_URL}/analyses/{analysis_id}",
-                headers=headers
-            )
+            with span("fileservice.get_analysis"):
+                response = await client.get(
+                    f"{FILES_API_URL}/analyses/{analysis_id}",
+                    headers=headers
+                )
 
             if response.status_code == 404:
                 logger.error(f"Analysis {analysis_id} not found for user {user_id}")
@@ -0,0 +1,104 @@
+# AIService/services/artifact_store.py
+
+import os
+import copy
+import gzip
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from services.cache import LRUCache
+from services.s3_async import AsyncS3Client
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+ARTIFACT_STORE_ENABLED = os.getenv("ARTIFACT_STORE_ENABLED", "true").lower() == "true"
+ARTIFACT_BUCKET = os.getenv("ARTIFACT_BUCKET") or os.getenv("S3_BUCKET", "awsbucket288518840771-files")
+ARTIFACT_PREFIX = os.getenv("ARTIFACT_PREFIX", "artifacts")
+ARTIFACT_CACHE_MAX_ENTRIES = int(os.getenv("ARTIFACT_CACHE_MAX_ENTRIES", "512"))
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a document's text, used to address its artifacts."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def version_hash(version: str) -> str:
+    return hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for per-document agent results.
+
+    Artifacts are JSON payloads keyed by (kind, content hash, pipeline version).
+    They are kept in an LRU memory tier and persisted gzip-compressed to S3 under
+    `{ARTIFACT_PREFIX}/{kind}/{content_hash}/{version_hash}.json.gz`, so they survive
+    restarts and are shared between pods. A version change (agent prompt or model
+    bump) simply addresses a different object.
+    """
+
+    def __init__(
+        self,
+        s3: AsyncS3Client,
+        kind: str,
+        bucket: str = ARTIFACT_BUCKET,
+        prefix: str = ARTIFACT_PREFIX,
+        max_entries: int = ARTIFACT_CACHE_MAX_ENTRIES,
+        enabled: bool = ARTIFACT_STORE_ENABLED,
+    ):
+        self.s3 = s3
+        self.kind = kind
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.enabled = enabled
+        self.memory = LRUCache(max_entries, name=f"{kind}_artifacts")
+
+    def _s3_key(self, doc_hash: str, version: str) -> str:
+        return f"{self.prefix}/{self.kind}/{doc_hash}/{version_hash(version)}.json.gz"
+
+    async def get(self, doc_hash: str, version: str) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the stored artifact, or None on a miss (or any storage error)."""
+        if not self.enabled:
+            return None
+        key = self._s3_key(doc_hash, version)
+        payload = self.memory.get(key)
+        if payload is None:
+            try:
+                raw = await self.s3.download(self.bucket, key)
+                payload = json.loads(gzip.decompress(raw).decode("utf-8"))
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code not in ("NoSuchKey", "404"):
+                    logger.warning(f"Artifact lookup failed for s3://{self.bucket}/{key}: {e}")
+                return None
+            except Exception as e:
+                logger.warning(f"Artifact lookup failed for s3://{self.bucket}/{key}: {e}")
+                return None
+            self.memory.set(key, payload)
+        return copy.deepcopy(payload)
+
+    async def put(self, doc_hash: str, version: str, payload: Dict[str, Any]) -> None:
+        """Stores an artifact in memory and S3. Storage errors are logged, never raised."""
+        if not self.enabled:
+            return
+        key = self._s3_key(doc_hash, version)
+        self.memory.set(key, copy.deepcopy(payload))
+        try:
+            body = gzip.compress(json.dumps(payload).encode("utf-8"))
+            await self.s3.upload(
+                self.bucket, key, body,
+                ContentType="application/json",
+                ContentEncoding="gzip",
+                Metadata={"version": version[:1024], "created_at": datetime.utcnow().isoformat()},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to persist artifact s3://{self.bucket}/{key}: {e}")
@@ -0,0 +1,270 @@
+# AIService/services/fake_llm.py
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.api_core import exceptions as google_exceptions
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables (used when LLM_PROVIDER_MODE is "record" or "replay") ---
+# JSON-lines file of recorded responses; written in record mode, read in replay mode
+FAKE_LLM_RECORDINGS = os.getenv("FAKE_LLM_RECORDINGS")
+# fixed:S | uniform:A:B | lognormal:MEDIAN:SIGMA | recorded (the recorded latency, else lognormal:1.0:0.5)
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "recorded")
+# Per-model latency overrides, e.g. '{"gemini-2.5-pro": "lognormal:6:0.6"}'
+FAKE_LLM_LATENCY_BY_MODEL: Dict[str, str] = json.loads(os.getenv("FAKE_LLM_LATENCY_BY_MODEL", "{}"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))            # 503s
+FAKE_LLM_RATE_LIMIT_RATE = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))  # 429s
+FAKE_LLM_TRUNCATE_RATE = float(os.getenv("FAKE_LLM_TRUNCATE_RATE", "0"))      # cut off at max tokens
+FAKE_LLM_NON_JSON_RATE = float(os.getenv("FAKE_LLM_NON_JSON_RATE", "0"))      # prose instead of JSON
+FAKE_LLM_SEED = os.getenv("FAKE_LLM_SEED")
+
+DEFAULT_LATENCY = "lognormal:1.0:0.5"
+
+# Representative outputs per gateway task label, used when no recording matches
+CANNED_RESPONSES: Dict[str, Any] = {
+    "classify": {
+        "primary_classification": "Resume", "confidence": 0.94,
+        "reasoning": "Contains contact details, work experience, education and a skills section.",
+    },
+    "layout_sections": {
+        "Summary": "Backend engineer with 6 years of experience building distributed Python services.",
+        "Work Experience": "Senior Software Engineer, Acme Corp (2021-Present)\n- Led migration of billing to event-driven services\n- Cut p95 API latency by 40%",
+        "Skills": "Python, FastAPI, PostgreSQL, AWS, Docker, Kubernetes, Kafka",
+        "Education": "B.S. Computer Science, State University, 2018",
+    },
+    "extract_entities": {
+        "companies": ["Acme Corp", "Globex"], "dates": ["2018", "2021-Present"],
+        "skills": ["Python", "FastAPI", "PostgreSQL", "AWS", "Docker", "Kubernetes", "Kafka"],
+        "job_titles": ["Senior Software Engineer", "Software Engineer"],
+        "technologies": ["Redis", "Terraform", "GitHub Actions"],
+        "education_degrees": ["B.S. Computer Science"], "universities": ["State University"],
+        "achievements": ["Cut p95 API latency by 40%"], "requirements": [],
+    },
+    "map_skills": [
+        {"jd_skill": "Python", "resume_skill": "Python", "confidence": 0.98, "reasoning": "Exact match"},
+        {"jd_skill": "AWS", "resume_skill": "AWS", "confidence": 0.95, "reasoning": "Exact match"},
+        {"jd_skill": "Container orchestration", "resume_skill": "Kubernetes", "confidence": 0.85, "reasoning": "Kubernetes is container orchestration"},
+    ],
+    "map_experience": [
+        {"jd_responsibility": "Design and operate scalable backend services",
+         "resume_experience": "Led migration of billing to event-driven services", "confidence": 0.82,
+         "reasoning": "Directly relevant backend architecture work"},
+    ],
+    "identify_gaps": [
+        {"gap": "GraphQL", "importance": "preferred", "suggestion": "Mention any GraphQL API work"},
+    ],
+    "identify_strong_points": [
+        "Measurable latency improvements on production systems",
+        "Broad AWS and container experience",
+    ],
+    "calculate_match_score": {"match_percentage": 78},
+    "generate_strength_summary": {
+        "strength_summary": "A seasoned backend engineer with proven impact on latency and reliability, "
+                            "strongly aligned with the role's Python and AWS requirements.",
+    },
+    "optimize_resume": {
+        "suggestions": [
+            {"type": "quantify", "target_section": "EXPERIENCE", "original_text_snippet": "Led migration of billing",
+             "suggested_text": "Led migration of billing to event-driven services processing 2M events/day",
+             "reasoning": "The JD emphasizes scale.", "priority": "high",
+             "quantification_prompt": "How many events per day did the system process?"},
+            {"type": "add", "target_section": "SKILLS", "original_text_snippet": "",
+             "suggested_text": "GraphQL", "reasoning": "Preferred qualification in the JD.", "priority": "medium"},
+        ],
+        "overall_feedback": "Strong alignment; quantify impact and surface preferred skills.",
+        "match_after_enhancement": 86,
+    },
+}
+CANNED_RESPONSES["json_repair"] = CANNED_RESPONSES["optimize_resume"]
+CANNED_RESPONSES["analyze_document"] = {
+    **CANNED_RESPONSES["classify"],
+    "section_headers": ["SUMMARY", "EXPERIENCE", "SKILLS", "EDUCATION"],
+    "entities": CANNED_RESPONSES["extract_entities"],
+}
+
+
+class FakeProviderError(Exception):
+    """Provider-style HTTP error for the Anthropic side (429/503 injection)."""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"{status_code} {message}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = type("FakeResponse", (), {"headers": headers})()
+
+
+class _Candidate:
+    def __init__(self, finish_reason: int):
+        self.finish_reason = finish_reason
+
+
+class FakeGeminiResponse:
+    def __init__(self, text: str, finish_reason: int = 1):
+        self.text = text
+        self.candidates = [_Candidate(finish_reason)]  # 1 == STOP, 2 == MAX_TOKENS
+
+
+class _TextBlock:
+    type = "text"
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeClaudeResponse:
+    def __init__(self, text: str, stop_reason: str = "end_turn"):
+        self.content = [_TextBlock(text)]
+        self.stop_reason = stop_reason
+
+
+def parse_latency(spec: str) -> Tuple[str, List[float]]:
+    kind, _, args = (spec or DEFAULT_LATENCY).partition(":")
+    values = [float(v) for v in args.split(":") if v]
+    expected = {"fixed": 1, "uniform": 2, "lognormal": 2, "recorded": 0}
+    if kind not in expected or len(values) != expected[kind]:
+        raise ValueError(f"Bad latency spec {spec!r}; use fixed:S, uniform:A:B, lognormal:MEDIAN:SIGMA or recorded")
+    return kind, values
+
+
+class FakeLLMProvider:
+    """
+    Offline stand-in for Gemini and Anthropic, plugged into the LLM gateway.
+
+    In record mode the gateway calls the real providers and `record` appends each
+    response (text and latency, keyed like the response cache) to a JSON-lines file.
+    In replay mode the gateway calls `gemini`/`claude` here instead: they return the
+    recorded text for the same request, or a canned response for the task, after a
+    sampled latency, and inject 503s, 429s, truncated and non-JSON outputs at the
+    configured rates. Replayed calls still go through the gateway's limiters, retries
+    and tracing, so those overheads are measured as in production.
+    """
+
+    def __init__(
+        self,
+        recordings_path: Optional[str] = FAKE_LLM_RECORDINGS,
+        latency: str = FAKE_LLM_LATENCY,
+        latency_by_model: Optional[Dict[str, str]] = None,
+        error_rate: float = FAKE_LLM_ERROR_RATE,
+        rate_limit_rate: float = FAKE_LLM_RATE_LIMIT_RATE,
+        truncate_rate: float = FAKE_LLM_TRUNCATE_RATE,
+        non_json_rate: float = FAKE_LLM_NON_JSON_RATE,
+        seed: Optional[int] = int(FAKE_LLM_SEED) if FAKE_LLM_SEED else None,
+        canned: Optional[Dict[str, Any]] = None,
+    ):
+        self.recordings_path = recordings_path
+        self.latency = parse_latency(latency)
+        self.latency_by_model = {
+            m: parse_latency(spec) for m, spec in (FAKE_LLM_LATENCY_BY_MODEL if latency_by_model is None else latency_by_model).items()
+        }
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.truncate_rate = truncate_rate
+        self.non_json_rate = non_json_rate
+        self.canned = dict(CANNED_RESPONSES if canned is None else canned)
+        self.random = random.Random(seed)
+        self.recordings: Dict[str, Dict[str, Any]] = {}
+        self.counts = {"calls": 0, "replayed": 0, "canned": 0, "errors": 0, "rate_limited": 0,
+                       "truncated": 0, "non_json": 0, "recorded": 0}
+        self._write_lock = threading.Lock()
+        if recordings_path and os.path.exists(recordings_path):
+            self.load(recordings_path)
+
+    # --- Recordings ---
+    def load(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.recordings[entry["key"]] = entry
+        logger.info(f"Loaded {len(self.recordings)} LLM recordings from {path}")
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        with self._write_lock, open(self.recordings_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    async def record(self, provider: str, model: str, key: str, task: Optional[str], text: Optional[str], latency_ms: float) -> None:
+        """Stores a live response so it can be replayed; incomplete responses are skipped."""
+        if not text:
+            return
+        entry = {
+            "key": key, "provider": provider, "model": model, "task": task, "text": text,
+            "latency_ms": round(latency_ms, 1), "recorded_at": datetime.utcnow().isoformat(),
+        }
+        self.recordings[key] = entry
+        self.counts["recorded"] += 1
+        if self.recordings_path:
+            await asyncio.to_thread(self._append, entry)
+
+    # --- Replay ---
+    def _sample_latency(self, model: str, recorded_ms: Optional[float]) -> float:
+        kind, args = self.latency_by_model.get(model, self.latency)
+        if kind == "recorded":
+            if recorded_ms is not None:
+                return recorded_ms / 1000
+            kind, args = parse_latency(DEFAULT_LATENCY)
+        if kind == "fixed":
+            return args[0]
+        if kind == "uniform":
+            return self.random.uniform(args[0], args[1])
+        return self.random.lognormvariate(0, args[1]) * args[0]  # median * e^N(0, sigma)
+
+    def _lookup(self, key: str, task: Optional[str]) -> Tuple[str, Optional[float]]:
+        entry = self.recordings.get(key)
+        if entry is not None:
+            self.counts["replayed"] += 1
+            return entry["text"], entry.get("latency_ms")
+        self.counts["canned"] += 1
+        canned = self.canned.get(task or "", {})
+        return (canned if isinstance(canned, str) else json.dumps(canned)), None
+
+    async def _respond(self, provider: str, model: str, key: str, task: Optional[str]) -> Tuple[str, bool]:
+        """Sleeps for the sampled latency and returns (text, truncated), or raises an injected error."""
+        self.counts["calls"] += 1
+        text, recorded_ms = self._lookup(key, task)
+        latency = self._sample_latency(model, recorded_ms)
+
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            self.counts["rate_limited"] += 1
+            await asyncio.sleep(min(latency, 0.05))  # throttling is answered fast
+            if provider == "gemini":
+                raise google_exceptions.TooManyRequests("Resource has been exhausted (injected)")
+            raise FakeProviderError(429, "rate_limit_error (injected)", retry_after=1)
+        await asyncio.sleep(latency)
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.counts["errors"] += 1
+            if provider == "gemini":
+                raise google_exceptions.ServiceUnavailable("The model is overloaded (injected)")
+            raise FakeProviderError(503, "overloaded_error (injected)")
+
+        roll = self.random.random()
+        if roll < self.truncate_rate:
+            self.counts["truncated"] += 1
+            return text[: max(1, len(text) // 2)], True
+        if roll < self.truncate_rate + self.non_json_rate:
+            self.counts["non_json"] += 1
+            return f"Sure! Here is the analysis you asked for:\n{text}\nLet me know if you need anything else.", False
+        return text, False
+
+    async def gemini(self, model: str, key: str, task: Optional[str]) -> FakeGeminiResponse:
+        text, truncated = await self._respond("gemini", model, key, task)
+        return FakeGeminiResponse(text, finish_reason=2 if truncated else 1)
+
+    async def claude(self, model: str, key: str, task: Optional[str]) -> FakeClaudeResponse:
+        text, truncated = await self._respond("claude", model, key, task)
+        return FakeClaudeResponse(text, stop_reason="max_tokens" if truncated else "end_turn")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"recordings": len(self.recordings), **self.counts}
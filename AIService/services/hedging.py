@@ -0,0 +1,91 @@
+# AIService/services/hedging.py
+
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "true").lower() == "true"
+# Per-task overrides of the agents' hedge deadlines in seconds, e.g. '{"identify_gaps": 6}'
+LLM_HEDGE_AFTER: Dict[str, float] = json.loads(os.getenv("LLM_HEDGE_AFTER", "{}"))
+
+
+def hedge_after(task: str, default: Optional[float]) -> Optional[float]:
+    """Seconds to wait on the primary model before hedging `task`; None disables hedging."""
+    if not LLM_HEDGING_ENABLED:
+        return None
+    return LLM_HEDGE_AFTER.get(task, default)
+
+
+def _is_not_none(result: Any) -> bool:
+    return result is not None
+
+
+async def hedged(
+    primary: Callable[[], Awaitable[Any]],
+    alternate: Optional[Callable[[], Awaitable[Any]]],
+    after: Optional[float],
+    *,
+    is_valid: Callable[[Any], bool] = _is_not_none,
+    task: Optional[str] = None,
+) -> Any:
+    """
+    Runs `primary`; if it hasn't produced a valid result within `after` seconds (or fails
+    or returns something invalid sooner), also starts `alternate` and returns whichever
+    valid result lands first, cancelling the other. When neither is valid, the primary's
+    result wins (the alternate's if the primary raised); if both raised, the last error
+    is re-raised.
+    """
+    if alternate is None or after is None:
+        return await primary()
+
+    with span("llm.hedge", task=task or "unknown", hedge_after=after) as s:
+        labels: Dict[asyncio.Task, str] = {asyncio.create_task(primary()): "primary"}
+        pending = set(labels)
+        hedge_started = False
+        invalid: Dict[str, Any] = {}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                if hedge_started:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    done, pending = await asyncio.wait(pending, timeout=after)
+                for finished in done:
+                    if finished.exception() is not None:
+                        error = finished.exception()
+                        logger.debug(f"Hedged {task} {labels[finished]} failed: {error}")
+                        continue
+                    result = finished.result()
+                    if is_valid(result):
+                        s.set_attribute("hedged", hedge_started)
+                        s.set_attribute("winner", labels[finished])
+                        return result
+                    invalid[labels[finished]] = result
+                if not hedge_started:
+                    # Primary is slow, failed or returned junk: bring in the alternate model
+                    hedge_started = True
+                    backup = asyncio.create_task(alternate())
+                    labels[backup] = "alternate"
+                    pending.add(backup)
+        finally:
+            for leftover in pending:
+                leftover.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        s.set_attribute("hedged", hedge_started)
+        s.set_attribute("winner", "none")
+        for label in ("primary", "alternate"):
+            if label in invalid:
+                return invalid[label]
+        raise error
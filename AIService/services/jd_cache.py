@@ -0,0 +1,201 @@
+# AIService/services/jd_cache.py
+
+import os
+import re
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from services.artifact_store import ArtifactStore
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+JD_CACHE_MAX_FINGERPRINTS = int(os.getenv("JD_CACHE_MAX_FINGERPRINTS", "20000"))
+# Max differing SimHash bits for two postings to count as the same text
+JD_NEAR_DUP_DISTANCE = int(os.getenv("JD_NEAR_DUP_DISTANCE", "3"))
+# Looser bound when the job URL matches (the posting may have been lightly edited)
+JD_URL_MATCH_DISTANCE = int(os.getenv("JD_URL_MATCH_DISTANCE", "10"))
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4  # 4 x 16-bit bands: any pair within 3 bits shares at least one band
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+_TRACKING_PARAMS = {"ref", "refid", "trackingid", "source", "src", "gh_src", "lipi", "trk", "position", "pagenum"}
+
+
+def normalize_jd_text(text: str) -> str:
+    """Case/whitespace/punctuation-insensitive form of a posting, used for hashing."""
+    t = unicodedata.normalize("NFKC", text or "").lower()
+    t = re.sub(r"[^\w+#]+", " ", t)
+    return re.sub(r"\s+", " ", t).strip()
+
+
+def normalize_job_url(url: Optional[str]) -> Optional[str]:
+    """Drops fragments and tracking parameters so the same posting maps to one URL."""
+    if not url:
+        return None
+    parts = urlsplit(str(url).strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=False)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(normalized_text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles of already-normalized text."""
+    words = normalized_text.split()
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    counts = [0] * SIMHASH_BITS
+    for shingle in set(shingles):
+        h = _hash64(shingle)
+        for bit in range(SIMHASH_BITS):
+            counts[bit] += 1 if (h >> bit) & 1 else -1
+    fingerprint = 0
+    for bit, count in enumerate(counts):
+        if count > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class JDCache:
+    """
+    Global cache of JD analysis artifacts (classification, sections, entities).
+
+    Lookups try, in order:
+    1. the exact normalized-text hash (memory, then S3 via the artifact store),
+    2. the normalized job URL, accepted if the stored text is a close SimHash match,
+    3. a SimHash near-duplicate of the text among fingerprints seen by this process.
+
+    Postings are not user data, so entries are shared across all users.
+    """
+
+    def __init__(
+        self,
+        store: ArtifactStore,
+        url_store: ArtifactStore,
+        max_fingerprints: int = JD_CACHE_MAX_FINGERPRINTS,
+        near_dup_distance: int = JD_NEAR_DUP_DISTANCE,
+        url_match_distance: int = JD_URL_MATCH_DISTANCE,
+    ):
+        self.store = store
+        self.url_store = url_store
+        self.max_fingerprints = max_fingerprints
+        self.near_dup_distance = near_dup_distance
+        self.url_match_distance = url_match_distance
+        self._fingerprints: "OrderedDict[str, int]" = OrderedDict()
+        self._bands: List[Dict[int, Set[str]]] = [dict() for _ in range(SIMHASH_BANDS)]
+        self.hits = {"exact": 0, "url": 0, "near_duplicate": 0}
+        self.misses = 0
+
+    @staticmethod
+    def key_for(text: str) -> str:
+        return hashlib.sha256(normalize_jd_text(text).encode("utf-8")).hexdigest()
+
+    # --- Near-duplicate index ---
+    @staticmethod
+    def _band_values(fingerprint: int) -> List[int]:
+        return [(fingerprint >> (i * _BAND_BITS)) & _BAND_MASK for i in range(SIMHASH_BANDS)]
+
+    def _index(self, doc_hash: str, fingerprint: int) -> None:
+        if doc_hash in self._fingerprints:
+            self._fingerprints.move_to_end(doc_hash)
+            return
+        self._fingerprints[doc_hash] = fingerprint
+        for band, value in zip(self._bands, self._band_values(fingerprint)):
+            band.setdefault(value, set()).add(doc_hash)
+        while len(self._fingerprints) > self.max_fingerprints:
+            old_hash, old_fp = self._fingerprints.popitem(last=False)
+            for band, value in zip(self._bands, self._band_values(old_fp)):
+                bucket = band.get(value)
+                if bucket:
+                    bucket.discard(old_hash)
+                    if not bucket:
+                        del band[value]
+
+    def _nearest(self, fingerprint: int) -> Optional[str]:
+        candidates: Set[str] = set()
+        for band, value in zip(self._bands, self._band_values(fingerprint)):
+            candidates |= band.get(value, set())
+        best, best_distance = None, self.near_dup_distance + 1
+        for doc_hash in candidates:
+            distance = hamming(fingerprint, self._fingerprints[doc_hash])
+            if distance < best_distance:
+                best, best_distance = doc_hash, distance
+        return best
+
+    # --- Public API ---
+    async def lookup(self, text: str, version: str, job_url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        normalized = normalize_jd_text(text)
+        doc_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+        payload = await self.store.get(doc_hash, version)
+        if payload:
+            self.hits["exact"] += 1
+            return payload
+
+        fingerprint = simhash(normalized)
+
+        url = normalize_job_url(job_url)
+        if url:
+            pointer = await self.url_store.get(hashlib.sha256(url.encode("utf-8")).hexdigest(), version)
+            if pointer and hamming(fingerprint, int(pointer.get("simhash", 0))) <= self.url_match_distance:
+                payload = await self.store.get(pointer["doc_hash"], version)
+                if payload:
+                    self.hits["url"] += 1
+                    return payload
+
+        near = self._nearest(fingerprint)
+        if near:
+            payload = await self.store.get(near, version)
+            if payload:
+                self.hits["near_duplicate"] += 1
+                return payload
+
+        self.misses += 1
+        return None
+
+    async def put(self, text: str, version: str, payload: Dict[str, Any], job_url: Optional[str] = None) -> None:
+        normalized = normalize_jd_text(text)
+        doc_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        fingerprint = simhash(normalized)
+
+        await self.store.put(doc_hash, version, payload)
+        self._index(doc_hash, fingerprint)
+
+        url = normalize_job_url(job_url)
+        if url:
+            await self.url_store.put(
+                hashlib.sha256(url.encode("utf-8")).hexdigest(), version,
+                {"doc_hash": doc_hash, "simhash": fingerprint, "url": url},
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = sum(self.hits.values()) + self.misses
+        return {
+            "fingerprints": len(self._fingerprints),
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_ratio": round(sum(self.hits.values()) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,172 @@
+# AIService/services/llm_cache.py
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from services.cache import LRUCache, SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+# Optional SQLite tier that survives restarts; disabled when unset
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Bump to invalidate every cached response at once (e.g. after a provider-side model update)
+LLM_CACHE_VERSION = os.getenv("LLM_CACHE_VERSION", "1")
+
+
+def _normalize(content: Any) -> Any:
+    """Unicode/trailing-whitespace-insensitive form of a prompt, so cosmetic edits don't miss."""
+    if isinstance(content, str):
+        text = unicodedata.normalize("NFC", content)
+        return "\n".join(line.rstrip() for line in text.strip().splitlines())
+    if isinstance(content, (list, tuple)):
+        return [_normalize(part) for part in content]
+    if isinstance(content, dict):
+        return {k: _normalize(v) for k, v in content.items()}
+    return content
+
+
+class CachedGeminiResponse:
+    """Stands in for a Gemini response on a cache hit; exposes what the agents read."""
+
+    cached = True
+
+    def __init__(self, text: str):
+        self.text = text
+        self.candidates: List[Any] = []
+
+
+class _TextBlock:
+    type = "text"
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class CachedClaudeResponse:
+    """Stands in for an Anthropic message on a cache hit."""
+
+    cached = True
+    stop_reason = "end_turn"
+
+    def __init__(self, text: str):
+        self.content = [_TextBlock(text)]
+
+
+def strict_json(text: str) -> Any:
+    """
+    `text` parsed as one JSON value, allowing only surrounding whitespace and a code fence;
+    raises ValueError for anything else, such as JSON wrapped in prose.
+    """
+    payload = text.strip()
+    if payload.startswith("```"):
+        payload = payload[3:]
+        if payload.lower().startswith("json"):
+            payload = payload[4:]
+        if payload.rstrip().endswith("```"):
+            payload = payload.rstrip()[:-3]
+    return json.loads(payload)
+
+
+def gemini_text(response: Any) -> Optional[str]:
+    """Text of a completed Gemini response; None if it was blocked or truncated."""
+    try:
+        candidates = getattr(response, "candidates", None)
+        if candidates and getattr(candidates[0], "finish_reason", 1) != 1:  # 1 == STOP
+            return None
+        return response.text or None
+    except Exception:
+        return None
+
+
+def claude_text(response: Any) -> Optional[str]:
+    """Text of a completed Anthropic message; None if it hit max_tokens or has no text."""
+    if getattr(response, "stop_reason", None) not in ("end_turn", "stop_sequence"):
+        return None
+    text = "".join(getattr(block, "text", "") for block in response.content if getattr(block, "type", "text") == "text")
+    return text or None
+
+
+class LLMResponseCache:
+    """
+    Cache of deterministic (temperature 0) LLM responses, keyed by a hash of the provider,
+    model, normalized prompt, generation parameters and prompt version. Only the response
+    text is stored. Text lives in an LRU memory tier, optionally backed by a SQLite tier
+    with TTL and size-based eviction that survives restarts.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = LLM_CACHE_ENABLED,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl: float = LLM_CACHE_TTL,
+        path: Optional[str] = LLM_CACHE_PATH,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+    ):
+        self.enabled = enabled
+        self.memory = LRUCache(max_entries, ttl=ttl, name="llm_response")
+        self.disk: Optional[SQLiteCache] = None
+        if enabled and path:
+            try:
+                self.disk = SQLiteCache(path, max_bytes=max_bytes, ttl=ttl, name="llm_response_disk")
+            except Exception as e:
+                logger.warning(f"LLM response cache disk tier disabled ({path}): {e}")
+        self.disk_hits = 0
+
+    @staticmethod
+    def key(provider: str, model: str, prompt: Any, params: Dict[str, Any], prompt_version: Optional[str] = None) -> str:
+        material = {
+            "cache_version": LLM_CACHE_VERSION,
+            "prompt_version": prompt_version,
+            "provider": provider,
+            "model": model,
+            "prompt": _normalize(prompt),
+            "params": params,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        text = self.memory.get(key)
+        if text is None and self.disk:
+            text = await asyncio.to_thread(self.disk.get, key)
+            if text is not None:
+                self.disk_hits += 1
+                self.memory.set(key, text)
+        return text
+
+    async def put(self, key: str, text: str) -> None:
+        if not self.enabled or not text:
+            return
+        self.memory.set(key, text)
+        if self.disk:
+            await asyncio.to_thread(self.disk.set, key, text)
+
+    def close(self) -> None:
+        if self.disk:
+            self.disk.close()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counts per tier, in the shape `metrics.register_cache_stats` expects."""
+        memory = self.memory.stats()
+        # A memory miss served from disk is still a hit for the cache as a whole
+        hits, misses = memory["hits"] + self.disk_hits, memory["misses"] - self.disk_hits
+        lookups = hits + misses
+        stats = {"llm_response": {"entries": memory["entries"], "hits": hits, "misses": misses,
+                                  "hit_ratio": round(hits / lookups, 4) if lookups else 0.0}}
+        if self.disk:
+            stats["llm_response_disk"] = {**self.disk.stats(), "hits": self.disk_hits, "misses": misses}
+        return stats
@@ -0,0 +1,417 @@
+# AIService/services/llm_gateway.py
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import anthropic
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from services import metrics
+from services.tracing import span
+from services.prompt_builder import estimate_tokens
+from services.adaptive_limiter import AIMDLimiter, TokenBucket, SUCCESS, OVERLOAD, IGNORE
+from services.llm_cache import (
+    LLMResponseCache, CachedGeminiResponse, CachedClaudeResponse, gemini_text, claude_text, strict_json,
+)
+from services.fake_llm import FakeLLMProvider
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "32"))
+ANTHROPIC_MAX_CONCURRENCY = int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "16"))
+# Optional per-model caps, e.g. '{"gemini-2.5-pro": 4, "claude-4-sonnet-20250514": 8}'
+LLM_MODEL_CONCURRENCY: Dict[str, int] = json.loads(os.getenv("LLM_MODEL_CONCURRENCY", "{}"))
+# Per-model concurrency adapts (AIMD) between the min and the cap above; off = fixed cap
+LLM_ADAPTIVE_CONCURRENCY = os.getenv("LLM_ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+LLM_AIMD_INITIAL_LIMIT = float(os.getenv("LLM_AIMD_INITIAL_LIMIT", "8"))
+LLM_AIMD_MIN_LIMIT = float(os.getenv("LLM_AIMD_MIN_LIMIT", "1"))
+LLM_AIMD_DECREASE = float(os.getenv("LLM_AIMD_DECREASE", "0.5"))
+# Requests-per-minute quotas: per provider (0 = unlimited) and optional per-model overrides
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "0"))
+ANTHROPIC_RPM = float(os.getenv("ANTHROPIC_RPM", "0"))
+LLM_MODEL_RPM: Dict[str, float] = json.loads(os.getenv("LLM_MODEL_RPM", "{}"))
+# live: real providers | record: real providers, responses saved for replay | replay: offline fake provider
+LLM_PROVIDER_MODE = os.getenv("LLM_PROVIDER_MODE", "live").lower()
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.25"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "4"))
+
+GEMINI = "gemini"
+ANTHROPIC = "claude"
+
+LIVE, RECORD, REPLAY = "live", "record", "replay"
+
+# Status codes worth another attempt: timeouts, conflicts, rate limits and server errors
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+# Of those, the ones that mean the provider is over capacity
+_OVERLOAD_STATUS = {429, 500, 502, 503, 504, 529}
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code
+    if isinstance(error, google_exceptions.GoogleAPICallError):
+        return error.code
+    status = getattr(error, "status_code", None)  # e.g. the fake provider's errors
+    return status if isinstance(status, int) else None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, anthropic.APIConnectionError)):
+        return True
+    return _status_code(error) in _RETRYABLE_STATUS
+
+
+def _outcome(error: BaseException) -> str:
+    """How a failure should move the adaptive limit."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return OVERLOAD
+    return OVERLOAD if _status_code(error) in _OVERLOAD_STATUS else IGNORE
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header, when the provider sent one."""
+    response = getattr(error, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _usage(provider: str, response: Any) -> Optional[tuple]:
+    """(input, output) tokens as reported by the provider, or None if the response has no usage data."""
+    if provider == GEMINI:
+        usage = getattr(response, "usage_metadata", None)
+        prompt, completion = getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None)
+    else:
+        usage = getattr(response, "usage", None)
+        prompt, completion = getattr(usage, "input_tokens", None), getattr(usage, "output_tokens", None)
+    if isinstance(prompt, int) and isinstance(completion, int):
+        return prompt, completion
+    return None
+
+
+def _raw_text(provider: str, response: Any) -> str:
+    """Whatever text a response has, complete or not (for size estimates)."""
+    try:
+        if provider == GEMINI:
+            return response.text or ""
+        return "".join(getattr(block, "text", "") for block in response.content)
+    except Exception:
+        return ""
+
+
+def _is_json_container(value: Any) -> bool:
+    return isinstance(value, (dict, list))
+
+
+def _worth_caching(text: Optional[str], validate: Optional[Callable[[Any], bool]]) -> bool:
+    """Whether a completed response's text is JSON the caller would accept, so a bad reply is never replayed."""
+    if not text:
+        return False
+    try:
+        return bool((validate or _is_json_container)(strict_json(text)))
+    except Exception:
+        return False
+
+
+def _record_tokens(provider: str, model: str, task: Optional[str], response: Any, prompt_estimate: int) -> None:
+    usage = _usage(provider, response)
+    if usage is None:
+        usage = (prompt_estimate, estimate_tokens(_raw_text(provider, response)))
+    metrics.observe_llm_tokens(provider, model, task or "unknown", *usage)
+
+
+class LLMGateway:
+    """
+    Single entry point for Gemini and Anthropic calls.
+
+    Owns one configured client per provider (Gemini model handles are cached per model
+    name; Anthropic shares one pooled HTTP client), bounds in-flight calls per provider
+    with a semaphore and per model with an AIMD limiter fed by 429/5xx/timeout feedback,
+    paces calls against requests-per-minute quotas, applies a uniform timeout and retries
+    transient failures with full-jitter exponential backoff (or the provider's
+    Retry-After). Every call is traced as `llm.<provider>` with the model and the
+    caller's `task` label.
+
+    Deterministic (temperature 0) calls are answered from `response_cache` when the same
+    prompt was seen before; hits return a stand-in response exposing the same text
+    attributes as the SDK objects. Only responses that parse as JSON and pass the caller's
+    `validate` check are stored, and the cache is bypassed in "replay" mode so the fake
+    provider's fault injection applies to every call.
+
+    `provider_mode` "record" saves live responses to the fake provider's recordings and
+    "replay" sends every call to the fake provider instead of the network (see
+    services/fake_llm.py); `use_fake` switches modes at runtime.
+    """
+
+    def __init__(
+        self,
+        google_api_key: Optional[str] = None,
+        anthropic_api_key: Optional[str] = None,
+        gemini_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        anthropic_concurrency: int = ANTHROPIC_MAX_CONCURRENCY,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        timeout: float = LLM_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        adaptive: bool = LLM_ADAPTIVE_CONCURRENCY,
+        provider_rpm: Optional[Dict[str, float]] = None,
+        model_rpm: Optional[Dict[str, float]] = None,
+        response_cache: Optional[LLMResponseCache] = None,
+        provider_mode: str = LLM_PROVIDER_MODE,
+        fake: Optional[FakeLLMProvider] = None,
+    ):
+        google_api_key = google_api_key or os.getenv("GOOGLE_API_KEY")
+        anthropic_api_key = anthropic_api_key or os.getenv("ANTHROPIC_API_KEY")
+        if provider_mode not in (LIVE, RECORD, REPLAY):
+            raise ValueError(f"Unknown LLM provider mode {provider_mode!r}")
+        self.provider_mode = provider_mode
+        self.fake = fake if fake is not None else (FakeLLMProvider() if provider_mode != LIVE else None)
+
+        self._gemini_configured = bool(google_api_key)
+        if self._gemini_configured:
+            genai.configure(api_key=google_api_key)
+        elif provider_mode != REPLAY:
+            logger.warning("GOOGLE_API_KEY not found; Gemini calls are disabled.")
+
+        self.anthropic_client: Optional[anthropic.AsyncAnthropic] = None
+        if anthropic_api_key:
+            # One shared client keeps its connection pool warm; retries are handled here,
+            # uniformly across providers, so the SDK's own retries are off
+            self.anthropic_client = anthropic.AsyncAnthropic(api_key=anthropic_api_key, max_retries=0, timeout=timeout)
+        elif provider_mode != REPLAY:
+            logger.warning("ANTHROPIC_API_KEY not found; Claude calls are disabled.")
+
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._provider_limits = {GEMINI: gemini_concurrency, ANTHROPIC: anthropic_concurrency}
+        self._provider_semaphores = {provider: asyncio.Semaphore(limit) for provider, limit in self._provider_limits.items()}
+        self._model_limits = dict(LLM_MODEL_CONCURRENCY if model_concurrency is None else model_concurrency)
+        self.adaptive = adaptive
+        self._limiters: Dict[str, AIMDLimiter] = {}
+        self._provider_rpm = provider_rpm if provider_rpm is not None else {GEMINI: GEMINI_RPM, ANTHROPIC: ANTHROPIC_RPM}
+        self._model_rpm = dict(LLM_MODEL_RPM if model_rpm is None else model_rpm)
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._gemini_models: Dict[str, Any] = {}
+        self.response_cache = response_cache if response_cache is not None else LLMResponseCache()
+
+    @property
+    def gemini_available(self) -> bool:
+        return self._gemini_configured or self.provider_mode == REPLAY
+
+    @property
+    def anthropic_available(self) -> bool:
+        return self.anthropic_client is not None or self.provider_mode == REPLAY
+
+    def use_fake(self, fake: Optional[FakeLLMProvider] = None, mode: str = REPLAY) -> FakeLLMProvider:
+        """Routes calls to `fake` (replay) or records live calls into it (record); returns it."""
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Fake provider mode must be {RECORD!r} or {REPLAY!r}")
+        self.fake = fake or self.fake or FakeLLMProvider()
+        self.provider_mode = mode
+        return self.fake
+
+    def use_live(self) -> None:
+        self.provider_mode = LIVE
+
+    def gemini_model(self, model_name: str):
+        """Cached GenerativeModel handle for `model_name`."""
+        model = self._gemini_models.get(model_name)
+        if model is None:
+            model = self._gemini_models[model_name] = genai.GenerativeModel(model_name)
+        return model
+
+    def _limiter(self, provider: str, model: str) -> AIMDLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            cap = self._model_limits.get(model, self._provider_limits[provider])
+            if self.adaptive:
+                limiter = AIMDLimiter(
+                    initial=LLM_AIMD_INITIAL_LIMIT, min_limit=LLM_AIMD_MIN_LIMIT, max_limit=cap,
+                    decrease=LLM_AIMD_DECREASE, name=model,
+                )
+            else:
+                # A limiter pinned at the cap behaves like a plain semaphore
+                limiter = AIMDLimiter(initial=cap, min_limit=cap, max_limit=cap, name=model)
+            self._limiters[model] = limiter
+        return limiter
+
+    def _bucket(self, provider: str, model: str) -> Optional[TokenBucket]:
+        if model not in self._buckets:
+            rpm = self._model_rpm.get(model, self._provider_rpm.get(provider, 0))
+            self._buckets[model] = TokenBucket(rpm) if rpm and rpm > 0 else None
+        return self._buckets[model]
+
+    def _backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+        retry_after = _retry_after(error) if error is not None else None
+        return max(delay, min(retry_after, LLM_RETRY_MAX_DELAY * 4)) if retry_after else delay
+
+    async def _call(
+        self, provider: str, model: str, make_request, task: Optional[str],
+        timeout: Optional[float], retries: Optional[int], prompt_tokens: int = 0,
+    ) -> Any:
+        retries = self.max_retries if retries is None else retries
+        timeout = self.timeout if timeout is None else timeout
+        limiter = self._limiter(provider, model)
+        bucket = self._bucket(provider, model)
+        for attempt in range(retries + 1):
+            queued_at = time.perf_counter()
+            started = await limiter.acquire()
+            outcome = IGNORE
+            try:
+                if bucket is not None:
+                    await bucket.acquire()
+                async with self._provider_semaphores[provider]:
+                    queue_ms = (time.perf_counter() - queued_at) * 1000
+                    with span(f"llm.{provider}", model=model, task=task or "unknown", attempt=attempt,
+                              queue_ms=round(queue_ms, 1), concurrency_limit=round(limiter.limit, 1),
+                              prompt_tokens_est=prompt_tokens):
+                        response = await asyncio.wait_for(make_request(), timeout=timeout)
+                outcome = SUCCESS
+                return response
+            except Exception as e:
+                outcome = _outcome(e)
+                if outcome == OVERLOAD and bucket is not None and _status_code(e) == 429:
+                    bucket.drain()
+                if attempt >= retries or not _is_retryable(e):
+                    raise
+                logger.warning(f"{provider} {model} ({task}) attempt {attempt + 1} failed, retrying: {e}")
+                error = e
+            finally:
+                limiter.release(outcome, started)
+            # Back off outside the limits so waiting callers can use the slot
+            await asyncio.sleep(self._backoff(attempt, error))
+
+    async def gemini(
+        self,
+        model: str,
+        contents: Union[str, List[Any]],
+        *,
+        generation_config: Optional[Dict[str, Any]] = None,
+        safety_settings: Optional[List[Dict[str, str]]] = None,
+        task: Optional[str] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        prompt_version: Optional[str] = None,
+        use_cache: bool = True,
+        validate: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Calls `generate_content_async` on a cached Gemini model; returns the raw response.
+        `validate` checks the parsed JSON before the response is cached (default: any object or array).
+        """
+        if not self.gemini_available:
+            raise RuntimeError("Gemini client not initialized. Check GOOGLE_API_KEY.")
+
+        key = self.response_cache.key(
+            GEMINI, model, contents,
+            {"generation_config": generation_config, "safety_settings": safety_settings}, prompt_version,
+        )
+        cacheable = use_cache and self.provider_mode != REPLAY and (generation_config or {}).get("temperature") == 0
+        if cacheable:
+            text = await self.response_cache.get(key)
+            if text is not None:
+                return CachedGeminiResponse(text)
+
+        if self.provider_mode == REPLAY:
+            def _request():
+                return self.fake.gemini(model, key, task)
+        else:
+            handle = self.gemini_model(model)
+
+            def _request():
+                return handle.generate_content_async(
+                    contents, generation_config=generation_config, safety_settings=safety_settings
+                )
+
+        started = time.perf_counter()
+        prompt_tokens = estimate_tokens(contents)
+        response = await self._call(GEMINI, model, _request, task, timeout, retries, prompt_tokens)
+        _record_tokens(GEMINI, model, task, response, prompt_tokens)
+        if self.provider_mode == RECORD:
+            await self.fake.record(GEMINI, model, key, task, gemini_text(response), (time.perf_counter() - started) * 1000)
+        text = gemini_text(response)
+        if cacheable and _worth_caching(text, validate):
+            await self.response_cache.put(key, text)
+        return response
+
+    async def claude(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        max_tokens: int,
+        temperature: float = 0.0,
+        task: Optional[str] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        prompt_version: Optional[str] = None,
+        use_cache: bool = True,
+        validate: Optional[Callable[[Any], bool]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Calls Anthropic `messages.create`; returns the raw response. `validate` is as for `gemini`."""
+        if not self.anthropic_available:
+            raise RuntimeError("Anthropic client not initialized. Check ANTHROPIC_API_KEY.")
+
+        key = self.response_cache.key(
+            ANTHROPIC, model, messages, {"max_tokens": max_tokens, "temperature": temperature, **kwargs}, prompt_version,
+        )
+        cacheable = use_cache and self.provider_mode != REPLAY and temperature == 0
+        if cacheable:
+            text = await self.response_cache.get(key)
+            if text is not None:
+                return CachedClaudeResponse(text)
+
+        if self.provider_mode == REPLAY:
+            def _request():
+                return self.fake.claude(model, key, task)
+        else:
+            def _request():
+                return self.anthropic_client.messages.create(
+                    model=model, max_tokens=max_tokens, temperature=temperature, messages=messages, **kwargs
+                )
+
+        started = time.perf_counter()
+        prompt_tokens = estimate_tokens(messages)
+        response = await self._call(ANTHROPIC, model, _request, task, timeout, retries, prompt_tokens)
+        _record_tokens(ANTHROPIC, model, task, response, prompt_tokens)
+        if self.provider_mode == RECORD:
+            await self.fake.record(ANTHROPIC, model, key, task, claude_text(response), (time.perf_counter() - started) * 1000)
+        text = claude_text(response)
+        if cacheable and _worth_caching(text, validate):
+            await self.response_cache.put(key, text)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Free provider slots plus each model's adaptive limit and quota, for debugging saturation."""
+        return {
+            "provider_mode": self.provider_mode,
+            "providers": {p: {"limit": self._provider_limits[p], "available": s._value}
+                          for p, s in self._provider_semaphores.items()},
+            "models": {
+                m: {**limiter.stats(), **({"quota": self._buckets[m].stats()} if self._buckets.get(m) else {})}
+                for m, limiter in self._limiters.items()
+            },
+        }
+
+    async def close(self) -> None:
+        if self.anthropic_client is not None:
+            await self.anthropic_client.close()
+        self.response_cache.close()
+
+
+llm_gateway = LLMGateway()
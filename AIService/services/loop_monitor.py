@@ -0,0 +1,210 @@
+# AIService/services/loop_monitor.py
+
+import os
+import sys
+import time
+import sysconfig
+import asyncio
+import logging
+import threading
+import traceback
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+# How often the heartbeat task wakes up; lag is how late it wakes
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.05"))
+# A heartbeat later than this counts as the loop being blocked, and gets its stack sampled
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))
+
+# Frames from these files are the plumbing around a blocking call, not its cause
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIPPED_FILES = (os.path.abspath(__file__),)
+_STDLIB = sysconfig.get_paths()["stdlib"]
+
+
+def _relative(path: str) -> str:
+    """Short form of a frame's file: relative to the service, site-packages or the stdlib."""
+    if path.startswith(_APP_ROOT):
+        return os.path.relpath(path, _APP_ROOT)
+    if "site-packages" + os.sep in path:
+        return path.split("site-packages" + os.sep, 1)[1]
+    if path.startswith(_STDLIB):
+        return os.path.relpath(path, _STDLIB)
+    return path
+
+
+def _is_app_frame(filename: str, ignored: Tuple[str, ...] = ()) -> bool:
+    if filename.startswith("<"):  # <frozen ...>, <string>
+        return False
+    path = os.path.abspath(filename)
+    return (path.startswith(_APP_ROOT) and path not in _SKIPPED_FILES and "site-packages" not in path
+            and not path.startswith(ignored))
+
+
+def attribute_stack(frame, ignored: Tuple[str, ...] = ()) -> Tuple[str, int, str]:
+    """
+    (call site, line, leaf) for a sampled frame. The call site is the innermost function in
+    this service's own code (what to fix); the leaf is the innermost frame overall (what it
+    was doing, e.g. botocore or json). Frames under `ignored` paths (e.g. test doubles)
+    are never reported as the call site.
+    """
+    stack = traceback.StackSummary.extract(traceback.walk_stack(frame), lookup_lines=False)  # innermost first
+    if not stack:
+        return "unknown", 0, "unknown"
+    leaf = stack[0]
+    leaf_label = f"{_relative(leaf.filename)}:{leaf.lineno} in {leaf.name}"
+    site = next((entry for entry in stack if _is_app_frame(entry.filename, ignored)), leaf)
+    return f"{_relative(site.filename)} in {site.name}", site.lineno, leaf_label
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag and attributes blocking to call sites.
+
+    A heartbeat task sleeps for `interval` and records how late it wakes up. A watchdog
+    thread checks that heartbeat; while it is more than `block_threshold` overdue, the
+    loop is stuck in synchronous code, so the watchdog samples the loop thread's stack
+    every `sample_interval` and charges that time to the innermost frame in our code.
+    The result is a profile of where the loop was blocked, not just that it was.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        block_threshold: float = LOOP_BLOCK_THRESHOLD,
+        sample_interval: Optional[float] = None,
+        history: int = 10000,
+        ignored_paths: Tuple[str, ...] = (),
+    ):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.sample_interval = sample_interval or max(0.005, block_threshold / 4)
+        self.ignored_paths = tuple(os.path.abspath(p) for p in ignored_paths)
+        self.lags: Deque[float] = deque(maxlen=history)
+        self.blocks = 0
+        self.blocked_seconds = 0.0
+        self.site_samples: Counter = Counter()
+        self.site_lines: Dict[str, Counter] = {}
+        self.site_leaves: Dict[str, Counter] = {}
+        self._current_block: Counter = Counter()
+        self._lock = threading.Lock()
+        self._last_tick = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Starts monitoring the running loop (call from inside it)."""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    def reset(self) -> None:
+        """Clears collected lag and blocking data (e.g. after a warm-up)."""
+        with self._lock:
+            self.lags.clear()
+            self.blocks = 0
+            self.blocked_seconds = 0.0
+            self.site_samples.clear()
+            self.site_lines.clear()
+            self.site_leaves.clear()
+            self._current_block.clear()
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_tick = time.monotonic()
+            metrics.EVENT_LOOP_LAG.observe(lag)
+            with self._lock:
+                self.lags.append(lag)
+                if lag < self.block_threshold:
+                    continue
+                self.blocks += 1
+                self.blocked_seconds += lag
+                culprit = self._current_block.most_common(1)
+                self._current_block.clear()
+            metrics.EVENT_LOOP_BLOCKED.inc(lag)
+            site = culprit[0][0] if culprit else "unknown (no stack sampled)"
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms at {site}")
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            overdue = time.monotonic() - self._last_tick - self.interval
+            if overdue < self.block_threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            site, line, leaf = attribute_stack(frame, self.ignored_paths)
+            del frame
+            with self._lock:
+                self.site_samples[site] += 1
+                self.site_lines.setdefault(site, Counter())[line] += 1
+                self.site_leaves.setdefault(site, Counter())[leaf] += 1
+                self._current_block[site] += 1
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        """Lag percentiles, blocking totals and the call sites the loop was most often blocked in."""
+        with self._lock:
+            lags = sorted(self.lags)
+            samples = sum(self.site_samples.values())
+            sites: List[Dict[str, Any]] = []
+            for site, count in self.site_samples.most_common(top):
+                sites.append({
+                    "site": site,
+                    "samples": count,
+                    "blocked_ms": round(count * self.sample_interval * 1000, 1),
+                    "share": round(count / samples, 3) if samples else 0.0,
+                    "lines": [line for line, _ in self.site_lines[site].most_common(3)],
+                    "leaves": [leaf for leaf, _ in self.site_leaves[site].most_common(3)],
+                })
+
+        def _pct(q: float) -> float:
+            return round(lags[min(len(lags) - 1, int(len(lags) * q))] * 1000, 1) if lags else 0.0
+
+        return {
+            "lag_ms": {"p50": _pct(0.50), "p95": _pct(0.95), "p99": _pct(0.99), "max": _pct(1.0)},
+            "heartbeats": len(lags),
+            "blocks": self.blocks,
+            "blocked_ms": round(self.blocked_seconds * 1000, 1),
+            "block_threshold_ms": round(self.block_threshold * 1000, 1),
+            "top_blocking_sites": sites,
+        }
+
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,215 @@
+# AIService/services/metrics.py
+
+import time
+import logging
+from typing import Any, Callable, Dict, Iterable, List
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+# LLM-bound requests take seconds, so buckets reach well past the usual web defaults
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90, 120)
+# Shared with FileService (services/metrics.py) so both services' HTTP histograms aggregate; keep identical
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90, 120)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+# --- HTTP ---
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=HTTP_LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served", ["method"])
+HTTP_REQUEST_ERRORS = Counter(
+    "http_request_errors_total", "HTTP requests that ended in a 5xx or an unhandled exception", ["method", "route"]
+)
+
+# --- Agents ---
+AGENT_DURATION = Histogram(
+    "agent_duration_seconds", "Agent run latency", ["agent", "outcome"], buckets=LATENCY_BUCKETS
+)
+AGENT_ERRORS = Counter("agent_errors_total", "Failed agent runs", ["agent"])
+CLASSIFIER_DECISIONS = Counter(
+    "classifier_decisions_total", "Document classifications by what decided them (declared, local, llm or fallback)",
+    ["source"],
+)
+LAYOUT_DECISIONS = Counter(
+    "layout_decisions_total", "Document section splits by what produced them (extraction, rules, llm or fallback)", ["source"]
+)
+SKILL_MAP_DECISIONS = Counter(
+    "skill_map_decisions_total", "JD skills mapped to the resume by what matched them (index, llm or fallback)",
+    ["source"],
+)
+DOCUMENT_FAST_PATH = Counter(
+    "document_fast_path_total", "Short documents analyzed in a single call (used) or sent to the multi-agent path (fallback)",
+    ["outcome"],
+)
+
+# --- LLM providers ---
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds", "LLM provider call latency", ["provider", "model", "task", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_REQUEST_ERRORS = Counter("llm_request_errors_total", "Failed LLM provider calls", ["provider", "model"])
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens", "Input tokens per LLM provider call (provider-reported, else estimated)",
+    ["provider", "model", "task"], buckets=TOKEN_BUCKETS,
+)
+LLM_COMPLETION_TOKENS = Histogram(
+    "llm_completion_tokens", "Output tokens per LLM provider call (provider-reported, else estimated)",
+    ["provider", "model", "task"], buckets=TOKEN_BUCKETS,
+)
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total", "Hedged LLM tasks by which attempt won (primary, alternate or none)", ["task", "winner"]
+)
+
+# --- Other dependencies (S3, FileService, text extraction) ---
+DEPENDENCY_REQUEST_DURATION = Histogram(
+    "dependency_request_duration_seconds", "Latency of calls to S3, FileService and the extraction pool",
+    ["dependency", "operation", "outcome"], buckets=LATENCY_BUCKETS,
+)
+
+# --- Event loop ---
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop's heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+EVENT_LOOP_BLOCKED = Counter(
+    "event_loop_blocked_seconds_total", "Time the event loop spent blocked past the monitor's threshold"
+)
+
+_DEPENDENCY_PREFIXES = {"s3": "s3", "fileservice": "fileservice", "extract": "extraction"}
+
+
+def observe_agent(agent: str, seconds: float, success: bool) -> None:
+    AGENT_DURATION.labels(agent, "success" if success else "error").observe(seconds)
+    if not success:
+        AGENT_ERRORS.labels(agent).inc()
+
+
+def observe_llm_tokens(provider: str, model: str, task: str, prompt_tokens: int, completion_tokens: int) -> None:
+    LLM_PROMPT_TOKENS.labels(provider, model, task).observe(prompt_tokens)
+    LLM_COMPLETION_TOKENS.labels(provider, model, task).observe(completion_tokens)
+
+
+def _observe_span(span: tracing.Span) -> None:
+    """Turns provider and dependency spans into histogram samples."""
+    category, _, operation = span.name.partition(".")
+    outcome = "error" if span.status == "error" else "success"
+    if span.error == "cancelled":
+        # e.g. the losing side of a hedged request; not a provider failure
+        outcome = "cancelled"
+    seconds = span.duration_ms / 1000
+    if category == "llm" and operation == "hedge":
+        if span.attributes.get("hedged"):
+            LLM_HEDGES.labels(str(span.attributes.get("task", "unknown")), str(span.attributes.get("winner", "none"))).inc()
+    elif category == "llm":
+        model = str(span.attributes.get("model", "unknown"))
+        task = str(span.attributes.get("task", "unknown"))
+        LLM_REQUEST_DURATION.labels(operation, model, task, outcome).observe(seconds)
+        if outcome == "error":
+            LLM_REQUEST_ERRORS.labels(operation, model).inc()
+    elif category in _DEPENDENCY_PREFIXES:
+        DEPENDENCY_REQUEST_DURATION.labels(_DEPENDENCY_PREFIXES[category], operation, outcome).observe(seconds)
+
+
+tracing.add_span_listener(_observe_span)
+
+
+# --- Cache / pool gauges, read at scrape time ---
+class _StatsCollector:
+    """Exposes cache hit/miss counters, the extraction pool's queue and LLM limits from `stats()` snapshots."""
+
+    def __init__(self):
+        self.cache_sources: List[Callable[[], Dict[str, Dict[str, Any]]]] = []
+        self.pool_sources: List[Callable[[], Dict[str, Any]]] = []
+        self.limit_sources: List[Callable[[], Dict[str, Dict[str, Any]]]] = []
+
+    def collect(self) -> Iterable:
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Cache hit ratio since start", labels=["cache"])
+        for source in self.cache_sources:
+            try:
+                caches = source()
+            except Exception as e:
+                logger.warning(f"Cache stats source failed: {e}")
+                continue
+            for name, stats in caches.items():
+                hit_count, miss_count = stats.get("hits", 0), stats.get("misses", 0)
+                hits.add_metric([name], hit_count)
+                misses.add_metric([name], miss_count)
+                lookups = hit_count + miss_count
+                ratio.add_metric([name], hit_count / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+        queue_depth = GaugeMetricFamily("extraction_queue_depth", "Extraction jobs waiting for a worker")
+        in_flight = GaugeMetricFamily("extraction_in_flight", "Extraction jobs in progress")
+        for source in self.pool_sources:
+            stats = source()
+            queue_depth.add_metric([], stats.get("queue_depth", 0))
+            in_flight.add_metric([], stats.get("in_flight", 0))
+        yield queue_depth
+        yield in_flight
+
+        limit = GaugeMetricFamily("llm_concurrency_limit", "Current adaptive concurrency limit per model", labels=["model"])
+        llm_in_flight = GaugeMetricFamily("llm_in_flight", "LLM calls holding a model slot", labels=["model"])
+        waiting = GaugeMetricFamily("llm_waiting", "LLM calls queued for a model slot", labels=["model"])
+        for source in self.limit_sources:
+            for model, stats in source().items():
+                limit.add_metric([model], stats.get("limit", 0))
+                llm_in_flight.add_metric([model], stats.get("in_flight", 0))
+                waiting.add_metric([model], stats.get("waiting", 0))
+        yield limit
+        yield llm_in_flight
+        yield waiting
+
+
+_stats_collector = _StatsCollector()
+REGISTRY.register(_stats_collector)
+
+
+def register_cache_stats(source: Callable[[], Dict[str, Dict[str, Any]]]) -> None:
+    """`source` returns {cache name: {"hits": n, "misses": n, ...}} when scraped."""
+    _stats_collector.cache_sources.append(source)
+
+
+def register_pool_stats(source: Callable[[], Dict[str, Any]]) -> None:
+    _stats_collector.pool_sources.append(source)
+
+
+def register_limit_stats(source: Callable[[], Dict[str, Dict[str, Any]]]) -> None:
+    """`source` returns {model: {"limit": n, "in_flight": n, "waiting": n}} when scraped."""
+    _stats_collector.limit_sources.append(source)
+
+
+# --- HTTP helpers ---
+def route_label(scope: Dict[str, Any]) -> str:
+    """The matched route template (e.g. /analyze-application), so label cardinality stays bounded."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestTimer:
+    """Tracks one HTTP request: in-flight gauge on entry, latency/error samples on `finish`."""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.start = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.labels(method).inc()
+
+    def finish(self, scope: Dict[str, Any], status_code: int) -> None:
+        HTTP_REQUESTS_IN_FLIGHT.labels(self.method).dec()
+        route = route_label(scope)
+        HTTP_REQUEST_DURATION.labels(self.method, route, str(status_code)).observe(time.perf_counter() - self.start)
+        if status_code >= 500:
+            HTTP_REQUEST_ERRORS.labels(self.method, route).inc()
+
+
+def render() -> bytes:
+    return generate_latest(REGISTRY)
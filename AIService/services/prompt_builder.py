@@ -0,0 +1,52 @@
+# AIService/services/prompt_builder.py
+
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token for English prose and compact JSON; good enough for budgeting and routing, not billing
+CHARS_PER_TOKEN = 4
+
+
+def compact_json(value: Any) -> str:
+    """
+    JSON for a prompt: no indentation or spaces after separators, and non-ASCII text left
+    as-is, since `\\uXXXX` escapes cost several tokens per character. Models read it as
+    well as pretty-printed JSON, which spends a large share of its tokens on whitespace.
+    """
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _has_value(value: Any) -> bool:
+    return value is not None and value != "" and value != [] and value != {}
+
+
+def project(data: Optional[Dict[str, Any]], fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    The part of `data` a prompt needs: only `fields` (every key when None), in that order,
+    without empty values. Missing keys are skipped rather than sent as empty lists.
+    """
+    data = data or {}
+    keys = data.keys() if fields is None else fields
+    return {key: data[key] for key in keys if key in data and _has_value(data[key])}
+
+
+def prompt_text(contents: Union[str, List[Any], None]) -> str:
+    """The text of a prompt given as a string, a list of strings/parts, or chat messages."""
+    if contents is None:
+        return ""
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, dict):
+        # A chat message ({"role", "content"}) or a content block ({"type": "text", "text"})
+        return prompt_text(contents.get("content", contents.get("text", "")))
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(prompt_text(part) for part in contents)
+    return str(contents)
+
+
+def estimate_tokens(contents: Union[str, List[Any], None]) -> int:
+    """Estimated input tokens of a prompt (see `prompt_text` for the accepted shapes)."""
+    return len(prompt_text(contents)) // CHARS_PER_TOKEN
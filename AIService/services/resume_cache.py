@@ -0,0 +1,89 @@
+# AIService/services/resume_cache.py
+
+import os
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from services.cache import LRUCache, DiskCache
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "512"))
+# FileService metadata (bucket/key/mime type) is reused for this long before we ask again
+RESUME_METADATA_TTL = float(os.getenv("RESUME_METADATA_TTL", "300"))
+# Optional on-disk tier for extracted text; disabled when unset
+RESUME_CACHE_DIR = os.getenv("RESUME_CACHE_DIR")
+
+
+class ResumeCache:
+    """
+    Two caches for the resume side of an analysis:
+
+    - FileService `s3-link` responses, keyed by (user_id, resume_id) with a short TTL.
+      The key includes the authenticated user_id, so an entry can only be served back
+      to the user FileService already authorized it for.
+    - Extracted resume text, keyed by (user_id, resume_id) and tagged with the S3 ETag
+      it was extracted from. Callers revalidate the ETag with a conditional GET, so a
+      re-uploaded resume is never served stale.
+
+    Text lives in an LRU memory tier, optionally backed by a JSON-file disk tier.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESUME_CACHE_MAX_ENTRIES,
+        metadata_ttl: float = RESUME_METADATA_TTL,
+        cache_dir: Optional[str] = RESUME_CACHE_DIR,
+    ):
+        self.details = LRUCache(max_entries, ttl=metadata_ttl, name="resume_metadata")
+        self.texts = LRUCache(max_entries, name="resume_text")
+        self.disk = DiskCache(cache_dir, name="resume_text_disk") if cache_dir else None
+
+    @staticmethod
+    def _key(user_id: str, resume_id: str) -> str:
+        return f"{user_id}/{resume_id}"
+
+    # --- FileService metadata ---
+    def get_details(self, user_id: str, resume_id: str) -> Optional[Dict[str, Any]]:
+        return self.details.get(self._key(user_id, resume_id))
+
+    def put_details(self, user_id: str, resume_id: str, details: Dict[str, Any]) -> None:
+        self.details.set(self._key(user_id, resume_id), details)
+
+    # --- Extracted text ---
+    async def get_text(self, user_id: str, resume_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached {'etag', 'mime_type', 'text', 'sections'} entry, or None."""
+        key = self._key(user_id, resume_id)
+        entry = self.texts.get(key)
+        if entry is None and self.disk:
+            entry = await asyncio.to_thread(self.disk.get, key)
+            if entry:
+                self.texts.set(key, entry)
+        return entry
+
+    async def put_text(
+        self, user_id: str, resume_id: str, etag: Optional[str], mime_type: str, text: str,
+        sections: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if not etag:
+            return  # without an ETag we can't revalidate, so don't cache
+        key = self._key(user_id, resume_id)
+        entry = {"etag": etag, "mime_type": mime_type, "text": text, "sections": sections}
+        self.texts.set(key, entry)
+        if self.disk:
+            await asyncio.to_thread(self.disk.set, key, entry)
+
+    async def invalidate(self, user_id: str, resume_id: str) -> None:
+        key = self._key(user_id, resume_id)
+        self.details.pop(key)
+        self.texts.pop(key)
+        if self.disk:
+            await asyncio.to_thread(self.disk.pop, key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"metadata": self.details.stats(), "text": self.texts.stats(), "disk_tier": bool(self.disk)}
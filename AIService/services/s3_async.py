@@ -0,0 +1,128 @@
+# AIService/services/s3_async.py
+
+import os
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables (environment-driven, like the rest of the service config) ---
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "16"))
+S3_CONNECT_TIMEOUT = float(os.getenv("S3_CONNECT_TIMEOUT", "5"))
+S3_READ_TIMEOUT = float(os.getenv("S3_READ_TIMEOUT", "20"))
+S3_DOWNLOAD_TIMEOUT = float(os.getenv("S3_DOWNLOAD_TIMEOUT", "30"))
+S3_CHUNK_SIZE = int(os.getenv("S3_CHUNK_SIZE", str(256 * 1024)))
+
+
+def _is_not_modified(error: ClientError) -> bool:
+    """S3 answers a satisfied If-None-Match with HTTP 304, surfaced by botocore as a ClientError."""
+    code = str(error.response.get("Error", {}).get("Code", ""))
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code in ("304", "NotModified") or status == 304
+
+
+class AsyncS3Client:
+    """
+    Async facade over a single pooled boto3 S3 client.
+
+    boto3 is synchronous, so every call runs on a dedicated thread pool sized to the
+    client's connection pool. A semaphore bounds in-flight requests and an overall
+    timeout keeps a slow S3 response from holding up the caller indefinitely.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = S3_MAX_CONCURRENCY,
+        connect_timeout: float = S3_CONNECT_TIMEOUT,
+        read_timeout: float = S3_READ_TIMEOUT,
+        default_timeout: float = S3_DOWNLOAD_TIMEOUT,
+        chunk_size: int = S3_CHUNK_SIZE,
+        region_name: Optional[str] = None,
+    ):
+        self.default_timeout = default_timeout
+        self.chunk_size = chunk_size
+        self._client = boto3.client(
+            "s3",
+            region_name=region_name or os.getenv("AWS_REGION"),
+            config=Config(
+                max_pool_connections=max_concurrency,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+                retries={"max_attempts": 3, "mode": "standard"},
+            ),
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="s3-io")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def client(self):
+        """The underlying boto3 client (for sync-only helpers such as presigned URLs)."""
+        return self._client
+
+    async def _run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Runs a blocking call on the S3 thread pool, bounded by the semaphore and a timeout."""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs)),
+                timeout=timeout if timeout is not None else self.default_timeout,
+            )
+
+    def _read_object(self, bucket: str, key: str, if_none_match: Optional[str] = None) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Streams an object body in fixed-size chunks (runs on the worker thread).
+        With `if_none_match`, returns (None, etag) when the object is unchanged.
+        """
+        params = {"Bucket": bucket, "Key": key}
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+        try:
+            response = self._client.get_object(**params)
+        except ClientError as e:
+            if if_none_match and _is_not_modified(e):
+                return None, if_none_match
+            raise
+        body = response["Body"]
+        try:
+            return b"".join(body.iter_chunks(chunk_size=self.chunk_size)), response.get("ETag")
+        finally:
+            body.close()
+
+    async def download(self, bucket: str, key: str, timeout: Optional[float] = None) -> bytes:
+        """Downloads an object's bytes without blocking the event loop."""
+        with span("s3.get_object", bucket=bucket, key=key) as s:
+            content, _ = await self._run(self._read_object, bucket, key, timeout=timeout)
+            s.set_attribute("bytes", len(content))
+        return content
+
+    async def download_if_changed(
+        self, bucket: str, key: str, etag: Optional[str] = None, timeout: Optional[float] = None
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Conditional GET: returns (None, etag) if the object still matches `etag`,
+        otherwise (content, new_etag).
+        """
+        with span("s3.get_object", bucket=bucket, key=key, conditional=bool(etag)) as s:
+            content, new_etag = await self._run(self._read_object, bucket, key, etag, timeout=timeout)
+            s.set_attribute("not_modified", content is None)
+        return content, new_etag
+
+    async def upload(self, bucket: str, key: str, body: bytes, timeout: Optional[float] = None, **extra: Any) -> None:
+        """Uploads bytes to S3; `extra` is passed through to put_object (ContentType, Metadata, ...)."""
+        with span("s3.put_object", bucket=bucket, key=key, bytes=len(body)):
+            await self._run(self._client.put_object, Bucket=bucket, Key=key, Body=body, timeout=timeout, **extra)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
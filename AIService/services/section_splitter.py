@@ -0,0 +1,184 @@
+# AIService/services/section_splitter.py
+
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Header spellings seen in resumes and job descriptions, mapped to the canonical section title.
+# Keys are normalized: lowercase, single spaces, no trailing colon, "&" spelled "and".
+_CANONICAL_HEADERS: Dict[str, Tuple[str, ...]] = {
+    # Resumes
+    "Summary": ("summary", "professional summary", "career summary", "executive summary", "profile",
+                "professional profile", "objective", "career objective", "about me", "about"),
+    "Work Experience": ("experience", "work experience", "professional experience", "relevant experience",
+                        "employment", "employment history", "work history", "career history",
+                        "professional background"),
+    "Education": ("education", "academic background", "education and training", "academics",
+                  "education and certifications"),
+    "Skills": ("skills", "technical skills", "core skills", "key skills", "core competencies", "competencies",
+               "technologies", "tech stack", "tools and technologies", "skills and tools", "technical proficiencies",
+               "areas of expertise", "expertise"),
+    "Projects": ("projects", "personal projects", "selected projects", "key projects", "side projects",
+                 "academic projects"),
+    "Certifications": ("certifications", "certificates", "licenses and certifications", "licenses",
+                       "certifications and licenses"),
+    "Awards": ("awards", "honors", "honors and awards", "awards and honors", "achievements", "accomplishments",
+               "key achievements"),
+    "Publications": ("publications", "patents", "publications and patents", "research"),
+    "Volunteering": ("volunteer experience", "volunteering", "community involvement", "leadership and activities",
+                     "activities", "leadership"),
+    "Languages": ("languages", "spoken languages"),
+    "Interests": ("interests", "hobbies", "hobbies and interests"),
+    "References": ("references",),
+    # Job descriptions
+    "About the Role": ("about the role", "about the job", "about the position", "the role", "your role",
+                       "role overview", "position overview", "overview", "job summary", "position summary"),
+    "Responsibilities": ("responsibilities", "key responsibilities", "job responsibilities", "what you'll do",
+                         "what you will do", "duties", "your responsibilities", "in this role you will"),
+    "Qualifications": ("qualifications", "requirements", "minimum qualifications", "basic qualifications",
+                       "required qualifications", "what you'll bring", "what you bring", "who you are",
+                       "must haves", "must have", "what we're looking for", "what we are looking for"),
+    "Preferred Qualifications": ("preferred qualifications", "nice to have", "nice to haves", "bonus points",
+                                 "preferred skills", "desired qualifications", "pluses"),
+    "Benefits": ("benefits", "perks", "perks and benefits", "what we offer", "compensation",
+                 "compensation and benefits", "salary and benefits"),
+    "About the Company": ("about us", "about the company", "who we are", "why join us", "our company",
+                          "company overview"),
+}
+_HEADER_INDEX: Dict[str, str] = {
+    spelling: canonical for canonical, spellings in _CANONICAL_HEADERS.items() for spelling in spellings
+}
+
+PREAMBLE_SECTION = "Contact Information"
+# Sections made of entries whose own headings (employer, school, project names) are often ALL CAPS
+_ENTRY_SECTIONS = frozenset(("Work Experience", "Education", "Projects", "Volunteering", "Publications"))
+
+_MAX_HEADER_CHARS = 40
+_MAX_HEADER_WORDS = 5
+_BULLET_CHARS = "-•*▪◦–·>"
+_NORMALIZE_RE = re.compile(r"[\s_]+")
+
+
+def _normalize(line: str) -> str:
+    header = line.strip().strip(_BULLET_CHARS + "#|=~ ").rstrip(":").strip().lower().replace("&", "and")
+    return _NORMALIZE_RE.sub(" ", header)
+
+
+def canonical_header(line: str) -> Optional[str]:
+    """The canonical section title if `line` is a known header spelling, else None."""
+    if len(line) > 2 * _MAX_HEADER_CHARS:
+        return None
+    return _HEADER_INDEX.get(_normalize(line))
+
+
+def _looks_like_header(line: str) -> bool:
+    """Line-shape cues for a header that isn't in the dictionary: short, ALL CAPS or colon-terminated, no digits."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > _MAX_HEADER_CHARS or len(stripped.split()) > _MAX_HEADER_WORDS:
+        return False
+    if stripped[0] in _BULLET_CHARS or any(ch.isdigit() for ch in stripped) or "@" in stripped:
+        return False
+    if stripped[-1] in ".,;" or "|" in stripped:
+        return False
+    letters = [ch for ch in stripped if ch.isalpha()]
+    if len(letters) < 3:
+        return False
+    return stripped.isupper() or (stripped.endswith(":") and stripped[0].isupper())
+
+
+@dataclass
+class SectionSplit:
+    """Sections in document order plus how much the split can be trusted."""
+    sections: Dict[str, str]
+    confidence: float
+    known_headers: int = 0
+    shape_headers: int = 0
+    headers: List[str] = field(default_factory=list)
+
+
+def split_sections(text: str) -> SectionSplit:
+    """
+    Splits a resume or job description into sections on header lines, without an LLM.
+
+    Headers are recognized from the dictionary above (any casing, optional trailing colon or
+    decoration) and, once the first known header has been seen, from line shape alone: short
+    ALL-CAPS or colon-terminated lines that follow some section content. Inside entry sections
+    (experience, education, projects) shape-only lines are kept as content, since they are
+    usually employer or school names. Text before the first header (name, contact details, a
+    job title) becomes PREAMBLE_SECTION. Repeated headers are merged in order.
+
+    Confidence rewards several dictionary headers covering most of the text and is pulled
+    down by a large preamble or many unrecognized headers, which mark layouts (tables, two
+    columns, creative templates) the rules are likely to get wrong.
+    """
+    lines = (text or "").splitlines()
+    total_chars = sum(len(line.strip()) for line in lines)
+    if not total_chars:
+        return SectionSplit(sections={}, confidence=0.0)
+
+    sections: Dict[str, List[str]] = {PREAMBLE_SECTION: []}
+    current = PREAMBLE_SECTION
+    headers: List[str] = []
+    known = shape = 0
+    known_chars = preamble_chars = 0
+    has_content = False  # whether the current section has any text yet
+    for line in lines:
+        canonical = canonical_header(line)
+        if canonical:
+            known += 1
+        elif known and has_content and current not in _ENTRY_SECTIONS and _looks_like_header(line):
+            canonical = line.strip().rstrip(":").strip().title()
+            shape += 1
+        if canonical:
+            current = canonical
+            headers.append(canonical)
+            sections.setdefault(current, [])
+            has_content = False
+            continue
+        sections[current].append(line)
+        has_content = has_content or bool(line.strip())
+        if current in _CANONICAL_HEADERS:
+            known_chars += len(line.strip())
+        elif current == PREAMBLE_SECTION:
+            preamble_chars += len(line.strip())
+
+    result = {name: "\n".join(body).strip() for name, body in sections.items()}
+    result = {name: body for name, body in result.items() if body}
+
+    preamble_share = preamble_chars / total_chars
+    coverage = known_chars / total_chars
+    confidence = 0.5 * min(1.0, known / 3) + 0.5 * coverage
+    if preamble_share > 0.25:
+        confidence *= 1.0 - preamble_share
+    if shape > known:
+        confidence *= known / shape
+    return SectionSplit(
+        sections=result, confidence=round(confidence, 3), known_headers=known, shape_headers=shape, headers=headers
+    )
+
+
+def split_on_headers(text: str, header_lines: List[str]) -> Dict[str, str]:
+    """
+    Splits `text` at the lines matching `header_lines` (header text as it appears in the
+    document, e.g. as named by an LLM; compared case-insensitively, ignoring colons and
+    decoration). Sections get canonical titles where the header is a known spelling.
+    Returns {} if none of the headers occur in the text.
+    """
+    wanted = {_normalize(h) for h in header_lines or [] if isinstance(h, str) and h.strip()}
+    sections: Dict[str, List[str]] = {PREAMBLE_SECTION: []}
+    current, matched = PREAMBLE_SECTION, 0
+    for line in (text or "").splitlines():
+        normalized = _normalize(line) if len(line) <= 2 * _MAX_HEADER_CHARS else ""
+        if normalized and normalized in wanted:
+            current = canonical_header(line) or line.strip().rstrip(":").strip().title()
+            sections.setdefault(current, [])
+            matched += 1
+            continue
+        sections[current].append(line)
+    if not matched:
+        return {}
+    result = {name: "\n".join(body).strip() for name, body in sections.items()}
+    return {name: body for name, body in result.items() if body}
@@ -0,0 +1,203 @@
+# AIService/services/skill_index.py
+
+import re
+import logging
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from services.skill_similarity import SKILL_NGRAM_THRESHOLD, similarity_matrix, without_versions
+
+logger = logging.getLogger(__name__)
+
+# Abbreviations and spellings mapped to one canonical form; applied to whole skills and to single words
+_SYNONYMS = {
+    "js": "javascript",
+    "py": "python",
+    "ts": "typescript",
+    "postgres": "postgresql",
+    "aws": "amazon web services",
+    "gcp": "google cloud platform",
+    "k8s": "kubernetes",
+    "golang": "go",
+    "ml": "machine learning",
+    "llm": "large language model",
+    "llms": "large language model",
+    "nlp": "natural language processing",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+}
+
+# Words that say nothing about which skill is meant ("experience with AWS", "strong SQL skills")
+_STOPWORDS = frozenset((
+    "a", "an", "and", "or", "of", "with", "in", "on", "the", "to", "for", "using", "experience", "knowledge",
+    "proficiency", "proficient", "familiarity", "understanding", "skills", "skill", "strong", "solid",
+))
+
+# Multi-word expansions, longest first; each counts as one word when comparing skills by their words,
+# so "aws lambda" overlaps "aws" in one word rather than in three
+_PHRASES = sorted({tuple(v.split()) for v in _SYNONYMS.values() if " " in v}, key=len, reverse=True)
+
+_NORMALIZE_RE = re.compile(r"[^a-z0-9+.# ]+")
+
+EXACT_CONFIDENCE = 0.95
+
+
+def _norm(s: str) -> str:
+    s = unicodedata.normalize("NFKC", (s or "").strip().lower())
+    return " ".join(t.rstrip(".") for t in _NORMALIZE_RE.sub(" ", s).split() if t.rstrip("."))
+
+
+def canonical_skill(skill: str) -> str:
+    """Normalized form of a skill with synonyms expanded, so spellings of one skill compare equal."""
+    n = _norm(skill)
+    if n in _SYNONYMS:
+        return _SYNONYMS[n]
+    return " ".join(_SYNONYMS.get(t, t) for t in n.split())
+
+
+def _tokens(canonical: str) -> FrozenSet[str]:
+    words = without_versions(canonical.split())
+    grouped: List[str] = []
+    i = 0
+    while i < len(words):
+        phrase = next((p for p in _PHRASES if tuple(words[i:i + len(p)]) == p), None)
+        grouped.append(" ".join(phrase) if phrase else words[i])
+        i += len(phrase) if phrase else 1
+    meaningful = [w for w in grouped if w not in _STOPWORDS]
+    return frozenset(meaningful or grouped)
+
+
+@dataclass
+class SkillMatch:
+    jd_skill: str
+    resume_skill: str
+    # 1.0 when equal after canonicalization; else the Jaccard overlap of their words ("tokens")
+    # or the cosine similarity of their character n-grams ("ngrams")
+    score: float
+    method: str = "tokens"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The relationship map's matched-skill shape."""
+        if self.score >= 1.0:
+            return {"jd_skill": self.jd_skill, "resume_skill": self.resume_skill, "confidence": EXACT_CONFIDENCE,
+                    "reasoning": "Exact match (after normalization/synonyms)"}
+        if self.method == "ngrams":
+            return {"jd_skill": self.jd_skill, "resume_skill": self.resume_skill,
+                    "confidence": round(min(0.85, self.score), 2),
+                    "reasoning": "Near-identical skill name (character n-gram similarity)"}
+        return {"jd_skill": self.jd_skill, "resume_skill": self.resume_skill,
+                "confidence": round(min(0.85, 0.5 + self.score), 2),
+                "reasoning": "Matched via token overlap/synonyms"}
+
+
+class SkillIndex:
+    """
+    A resume's skills indexed for matching JD skills against them.
+
+    Each resume skill is canonicalized and tokenized once; an exact-form map resolves
+    equal skills directly and an inverted index (word -> resume skills containing it)
+    finds the candidates for a partial match, so a JD skill is only compared with resume
+    skills that share a word with it. Candidates are scored by Jaccard overlap of words, a
+    multi-word synonym expansion ("aws" -> "amazon web services") counting as one word.
+    JD skills that share no word with any resume skill are compared with every resume skill
+    at once by character n-gram similarity (`skill_similarity`), which catches spellings
+    that split words differently ("SpringBoot" / "Spring Boot", "Vue" / "Vue.js").
+    """
+
+    def __init__(self, resume_skills: Iterable[str]):
+        self.skills: List[str] = []
+        self._canonical: List[str] = []
+        self._token_sets: List[FrozenSet[str]] = []
+        self._exact: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for skill in resume_skills or []:
+            if not isinstance(skill, str):
+                continue
+            canonical = canonical_skill(skill)
+            if not canonical or canonical in self._exact:
+                continue
+            position = len(self.skills)
+            tokens = _tokens(canonical)
+            self.skills.append(skill.strip())
+            self._canonical.append(canonical)
+            self._token_sets.append(tokens)
+            self._exact[canonical] = position
+            for token in tokens:
+                self._postings[token].append(position)
+
+    def best(self, jd_skill: str, covering: bool = False) -> Optional[SkillMatch]:
+        """
+        The closest resume skill to `jd_skill`, or None if none shares a word with it. With
+        `covering`, only resume skills containing every meaningful word of the JD skill count,
+        so a short resume skill never absorbs a longer JD phrase ("SQL" for "SQL Server").
+        """
+        canonical = canonical_skill(jd_skill)
+        if not canonical:
+            return None
+        position = self._exact.get(canonical)
+        if position is not None:
+            return SkillMatch(jd_skill, self.skills[position], 1.0)
+
+        tokens = _tokens(canonical)
+        shared: Dict[int, int] = defaultdict(int)
+        for token in tokens:
+            for position in self._postings.get(token, ()):
+                shared[position] += 1
+        best_position, best_score = None, 0.0
+        for position, overlap in shared.items():
+            if covering and overlap < len(tokens):
+                continue
+            score = overlap / (len(tokens) + len(self._token_sets[position]) - overlap)
+            if score > best_score or (score == best_score and best_position is not None and position < best_position):
+                best_position, best_score = position, score
+        if best_position is None:
+            return None
+        return SkillMatch(jd_skill, self.skills[best_position], round(best_score, 3))
+
+    def similar(self, jd_skills: List[str], threshold: float = SKILL_NGRAM_THRESHOLD) -> List[Optional[SkillMatch]]:
+        """For each JD skill, the resume skill most similar by character n-grams if it reaches `threshold`."""
+        if not jd_skills or not self.skills:
+            return [None] * len(jd_skills or [])
+        scores = similarity_matrix([canonical_skill(s) for s in jd_skills], self._canonical)
+        best = scores.argmax(axis=1)
+        return [
+            SkillMatch(jd_skill, self.skills[column], round(float(scores[row, column]), 3), "ngrams")
+            if scores[row, column] >= threshold else None
+            for row, (jd_skill, column) in enumerate(zip(jd_skills, best))
+        ]
+
+    def match(
+        self, jd_skills: Iterable[str], threshold: float, ngram_threshold: Optional[float] = SKILL_NGRAM_THRESHOLD,
+    ) -> Tuple[List[SkillMatch], List[str]]:
+        """
+        (matches in JD order, the JD skills left unresolved). A JD skill matches when a resume
+        skill containing all of its words overlaps it by at least `threshold`. A JD skill that
+        shares no word with any resume skill matches when its n-gram similarity reaches
+        `ngram_threshold` (None skips the n-gram pass); one that only partly overlaps a resume
+        skill ("React Native" / "React") is left unresolved.
+        """
+        found: List[Optional[SkillMatch]] = []
+        skills: List[str] = []
+        pending: List[int] = []
+        for jd_skill in jd_skills or []:
+            if not isinstance(jd_skill, str) or not jd_skill.strip():
+                continue
+            best = self.best(jd_skill, covering=True)
+            if best is not None and best.score >= threshold:
+                found.append(best)
+            else:
+                found.append(None)
+                if self.best(jd_skill) is None:
+                    pending.append(len(skills))
+            skills.append(jd_skill)
+
+        if pending and ngram_threshold is not None:
+            for i, similar in zip(pending, self.similar([skills[i] for i in pending], ngram_threshold)):
+                found[i] = similar
+        matched = [m for m in found if m is not None]
+        unresolved = [skill for skill, m in zip(skills, found) if m is None]
+        return matched, unresolved
@@ -0,0 +1,71 @@
+# AIService/services/skill_similarity.py
+
+import os
+import re
+import logging
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+# Cosine similarity of character n-grams at which two skill names count as the same skill.
+# Tune with `python -m benchmarks.tune_skill_similarity` on recorded map_skills outputs.
+SKILL_NGRAM_THRESHOLD = float(os.getenv("SKILL_NGRAM_THRESHOLD", "0.88"))
+
+NGRAM_SIZE = 3
+# Version numbers ("Postgres 14", "Python 3.11", "v2") don't change which skill is meant
+_VERSION_RE = re.compile(r"^v?\d+(\.(\d+|x))*\+?$")
+
+
+def without_versions(words: List[str]) -> List[str]:
+    """`words` without version numbers, unless that would leave nothing ("3.11" alone stays)."""
+    kept = [w for w in words if not _VERSION_RE.match(w)]
+    return kept or words
+
+
+def _surface(skill: str) -> str:
+    """
+    A canonical skill name reduced to what identifies it: no spaces, dots or version
+    numbers, so "spring boot 3" and "springboot", or "next.js" and "nextjs", are equal.
+    """
+    return "".join(without_versions(skill.split())).replace(".", "")
+
+
+def _ngrams(skill: str) -> List[str]:
+    surface = f"^{_surface(skill)}$"
+    if len(surface) <= NGRAM_SIZE:
+        return [surface]
+    return [surface[i:i + NGRAM_SIZE] for i in range(len(surface) - NGRAM_SIZE + 1)]
+
+
+def _vectors(grams: List[List[str]], vocabulary: Dict[str, int]) -> np.ndarray:
+    """L2-normalized n-gram count rows over `vocabulary`, filled from (row, column) index arrays in one scatter."""
+    rows = np.repeat(np.arange(len(grams)), [len(g) for g in grams])
+    cols = np.fromiter((vocabulary[gram] for g in grams for gram in g), dtype=np.int64, count=len(rows))
+    matrix = np.zeros((len(grams), len(vocabulary)), dtype=np.float32)
+    np.add.at(matrix, (rows, cols), 1.0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def similarity_matrix(jd_skills: Sequence[str], resume_skills: Sequence[str]) -> np.ndarray:
+    """
+    Cosine similarity of every JD skill (rows) to every resume skill (columns) over
+    character trigrams, for names already in canonical form (`skill_index.canonical_skill`:
+    lowercase, synonyms expanded). Both sides share a vocabulary of only the trigrams that
+    occur, so the vectors stay small, and the whole matrix is a single matrix product.
+    """
+    if not jd_skills or not resume_skills:
+        return np.zeros((len(jd_skills or []), len(resume_skills or [])), dtype=np.float32)
+    jd_grams = [_ngrams(s) for s in jd_skills]
+    resume_grams = [_ngrams(s) for s in resume_skills]
+    vocabulary: Dict[str, int] = {}
+    for grams in jd_grams + resume_grams:
+        for gram in grams:
+            vocabulary.setdefault(gram, len(vocabulary))
+    return _vectors(jd_grams, vocabulary) @ _vectors(resume_grams, vocabulary).T
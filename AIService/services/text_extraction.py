@@ -0,0 +1,370 @@
+# AIService/services/text_extraction.py
+
+import os
+import io
+import time
+import asyncio
+import logging
+import multiprocessing
+from collections import Counter
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+import docx
+import fitz  # PyMuPDF
+
+from services.section_splitter import PREAMBLE_SECTION, canonical_header
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages handled by a single worker task; longer PDFs are fanned out across the pool
+EXTRACTION_PAGES_PER_TASK = int(os.getenv("EXTRACTION_PAGES_PER_TASK", "8"))
+# "layout" rebuilds headings, bullets and reading order from PDF font metadata and returns a
+# section map with the text; "plain" is PyMuPDF's flat text
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "layout").lower()
+
+# Layout mode: span flag bit PyMuPDF sets for bold text, and glyphs that open a bullet point
+_BOLD_FLAG = 16
+_BULLET_GLYPHS = frozenset("•●○◦▪▫■□‣⁃∙·–-*➢➤►▶✓✔\uf0b7\uf0a7")
+# Headings that aren't dictionary spellings must be set at least this much larger than body text
+_HEADING_SIZE_RATIO = 1.1
+_MAX_HEADING_WORDS = 6
+
+
+@dataclass
+class ExtractedDocument:
+    """Extracted text plus, in layout mode, the sections its headings delimit (None if none were found)."""
+    text: str
+    sections: Optional[Dict[str, str]] = None
+    mode: str = "plain"
+
+# (text, font size, bold, bullet, left x, (page, block)) for one line of a PDF, in reading order
+LayoutLine = Tuple[str, float, bool, bool, float, Tuple[int, int]]
+
+
+def _is_pdf(mime_type: str) -> bool:
+    return "pdf" in (mime_type or "")
+
+
+def _is_docx(mime_type: str) -> bool:
+    mime_type = mime_type or ""
+    return "wordprocessingml" in mime_type or mime_type.endswith("msword")
+
+
+# --- Worker functions (module-level so they can be pickled into the process pool) ---
+
+def _extract_pdf_pages(file_content: bytes, start: int, stop: Optional[int]) -> Tuple[str, int]:
+    """Extracts text for pages [start, stop) and returns it with the document's page count."""
+    try:
+        pdf_document = fitz.open(stream=io.BytesIO(file_content), filetype="pdf")
+    except Exception as e:
+        logger.error(f"Failed to extract text from PDF: {e}")
+        raise ValueError("Could not extract text from the provided PDF file.")
+    try:
+        page_count = pdf_document.page_count
+        stop = page_count if stop is None else min(stop, page_count)
+        text = "".join(pdf_document[i].get_text() for i in range(start, stop))
+        return text, page_count
+    except Exception as e:
+        logger.error(f"Failed to extract text from PDF: {e}")
+        raise ValueError("Could not extract text from the provided PDF file.")
+    finally:
+        pdf_document.close()
+
+
+def _reading_order(blocks: List[Dict[str, Any]], page_width: float) -> List[Dict[str, Any]]:
+    """
+    Text blocks top to bottom, left to right. When a page has two real columns (each holding
+    a good share of the text, not just right-aligned dates), the full-width blocks above them
+    come first, then the left column, the right column and anything spanning below.
+    """
+    def _key(block):
+        return round(block["bbox"][1]), block["bbox"][0]
+
+    def _chars(block):
+        return sum(len(span["text"].strip()) for line in block["lines"] for span in line["spans"])
+
+    middle = page_width / 2
+    left = [b for b in blocks if b["bbox"][2] <= middle + 5]
+    # A narrow block inside the +/-5pt band (a centered page number, a divider) fits both; keep it in one
+    left_ids = {id(b) for b in left}
+    right = [b for b in blocks if b["bbox"][0] >= middle - 5 and id(b) not in left_ids]
+    total = sum(_chars(b) for b in blocks) or 1
+    if not (sum(_chars(b) for b in left) > 0.25 * total and sum(_chars(b) for b in right) > 0.25 * total):
+        return sorted(blocks, key=_key)
+
+    in_columns = left_ids | {id(b) for b in right}
+    columns_top = min(b["bbox"][1] for b in left + right)
+    spanning = [b for b in blocks if id(b) not in in_columns]
+    above = [b for b in spanning if b["bbox"][1] < columns_top]
+    below = [b for b in spanning if b["bbox"][1] >= columns_top]
+    return sorted(above, key=_key) + sorted(left, key=_key) + sorted(right, key=_key) + sorted(below, key=_key)
+
+
+def _extract_pdf_layout_pages(file_content: bytes, start: int, stop: Optional[int]) -> Tuple[List[LayoutLine], int]:
+    """Like _extract_pdf_pages, but returns per-line font metadata (see LayoutLine) from get_text("dict")."""
+    try:
+        pdf_document = fitz.open(stream=io.BytesIO(file_content), filetype="pdf")
+    except Exception as e:
+        logger.error(f"Failed to extract text from PDF: {e}")
+        raise ValueError("Could not extract text from the provided PDF file.")
+    try:
+        page_count = pdf_document.page_count
+        stop = page_count if stop is None else min(stop, page_count)
+        lines: List[LayoutLine] = []
+        for page_number in range(start, stop):
+            page = pdf_document[page_number]
+            blocks = [b for b in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"] if b.get("type") == 0]
+            for block_number, block in enumerate(_reading_order(blocks, page.rect.width)):
+                for line in block["lines"]:
+                    spans = [s for s in line["spans"] if s["text"].strip()]
+                    if not spans:
+                        continue
+                    text = " ".join("".join(s["text"] for s in line["spans"]).split())
+                    first = spans[0]["text"].strip()
+                    bullet = first in _BULLET_GLYPHS or (first[:1] in _BULLET_GLYPHS and first[1:2].isspace())
+                    if bullet:
+                        text = text[1:].strip()
+                    main = max(spans, key=lambda s: len(s["text"].strip()))
+                    bold = bool(main["flags"] & _BOLD_FLAG) or "bold" in main["font"].lower()
+                    lines.append((
+                        text, round(main["size"], 1), bold, bullet, round(line["bbox"][0], 1), (page_number, block_number)
+                    ))
+        return lines, page_count
+    except Exception as e:
+        logger.error(f"Failed to extract text from PDF: {e}")
+        raise ValueError("Could not extract text from the provided PDF file.")
+    finally:
+        pdf_document.close()
+
+
+def _assemble_layout(lines: List[LayoutLine]) -> ExtractedDocument:
+    """
+    Rebuilds text and sections from layout lines. Body text is the most common font size; a
+    heading style is the (size, bold, ALL CAPS) of dictionary headers that stand out from it
+    by size, weight or case. Dictionary headers in a heading style start sections, and so do
+    other short lines in one, if that style is larger than body text or ALL CAPS. Bullets
+    become "- ", and lines wrapped from a bullet (indented past its glyph) are joined to it.
+    """
+    if not lines:
+        return ExtractedDocument(text="", sections=None, mode="layout")
+
+    def _style(text: str, size: float, bold: bool) -> Tuple[float, bool, bool]:
+        return round(size * 2) / 2, bold, text.isupper()
+
+    sizes = Counter()
+    for text, size, *_ in lines:
+        sizes[round(size * 2) / 2] += len(text)
+    body = sizes.most_common(1)[0][0]
+    heading_styles = {
+        _style(text, size, bold) for text, size, bold, bullet, *_ in lines
+        if not bullet and canonical_header(text) and (size >= body * _HEADING_SIZE_RATIO or bold or text.isupper())
+    }
+
+    out: List[str] = []
+    sections: Dict[str, List[str]] = {PREAMBLE_SECTION: []}
+    current = PREAMBLE_SECTION
+    known_headings = 0
+    bullet_x: Optional[float] = None  # left edge of the open bullet's glyph; wrapped lines sit right of it
+    glyph_x: Optional[float] = None   # a bullet glyph set on a line of its own; its text is the next line
+    for text, size, bold, bullet, x0, _ in lines:
+        if bullet and not text:
+            glyph_x = x0
+            continue
+        if glyph_x is not None:
+            bullet, x0, glyph_x = True, glyph_x, None
+
+        style = _style(text, size, bold)
+        heading = None
+        if not bullet and style in heading_styles and len(text.split()) <= _MAX_HEADING_WORDS:
+            heading = canonical_header(text)
+            if heading:
+                known_headings += 1
+            elif (style[0] >= body * _HEADING_SIZE_RATIO or style[2]) and not text.endswith("."):
+                heading = text.rstrip(":").strip().title()
+        if heading:
+            if out:
+                out.append("")
+            out.append(text)
+            current = heading
+            sections.setdefault(current, [])
+            bullet_x = None
+            continue
+
+        if not bullet and bullet_x is not None and x0 > bullet_x + 1:
+            out[-1] = f"{out[-1]} {text}"
+            sections[current][-1] = out[-1]
+            continue
+        bullet_x = x0 if bullet else None
+        text = f"- {text}" if bullet else text
+        out.append(text)
+        sections[current].append(text)
+
+    merged = {name: "\n".join(body_lines).strip() for name, body_lines in sections.items()}
+    merged = {name: body_text for name, body_text in merged.items() if body_text}
+    return ExtractedDocument(
+        text="\n".join(out) + "\n", sections=merged if known_headings >= 2 else None, mode="layout"
+    )
+
+
+def _extract_docx(file_content: bytes) -> str:
+    try:
+        doc = docx.Document(io.BytesIO(file_content))
+        return "\n".join([para.text for para in doc.paragraphs])
+    except Exception as e:
+        logger.error(f"Failed to extract text from DOCX: {e}")
+        raise ValueError("Could not extract text from the provided DOCX file.")
+
+
+def _decode_plain_text(file_content: bytes) -> str:
+    # Try assuming it's plain UTF-8 text
+    try:
+        return file_content.decode('utf-8')
+    except UnicodeDecodeError:
+        logger.warning("Could not decode content as UTF-8. Returning raw str().")
+        return str(file_content)
+
+
+def extract_text(file_content: bytes, mime_type: str) -> str:
+    """
+    Extracts plain text from file content (bytes) based on its MIME type.
+    Supports PDF and DOCX. Runs synchronously in the calling thread.
+    """
+    if _is_pdf(mime_type):
+        text, _ = _extract_pdf_pages(file_content, 0, None)
+        return text
+    if _is_docx(mime_type):
+        return _extract_docx(file_content)
+    return _decode_plain_text(file_content)
+
+
+class TextExtractionService:
+    """
+    Awaitable text extraction backed by a bounded process pool.
+
+    PDF parsing and DOCX parsing are CPU-bound, so they run in worker processes
+    instead of on the event loop. Long PDFs are split into page ranges that are
+    extracted in parallel and stitched back together in order; in layout mode the
+    workers return per-line font metadata and headings are resolved across the
+    whole document here.
+    """
+
+    def __init__(self, max_workers: int = EXTRACTION_WORKERS, pages_per_task: int = EXTRACTION_PAGES_PER_TASK):
+        self.max_workers = max(1, max_workers)
+        self.pages_per_task = max(1, pages_per_task)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # --- Metrics ---
+        self._queued = 0        # worker tasks submitted but not finished
+        self._in_flight = 0     # extract() calls currently running
+        self._completed = 0
+        self._failed = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+        self._last_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so importing the module never spawns processes.
+        # 'spawn' avoids forking a process that already holds the S3/HTTP thread pools.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _submit(self, fn, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        self._queued += 1
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # A crashed worker poisons the whole pool; rebuild it and run this call in a thread
+            if self._executor is executor:
+                logger.error("Text extraction process pool is broken; recreating it.")
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            return await loop.run_in_executor(None, fn, *args)
+        finally:
+            self._queued -= 1
+
+    async def _extract_pdf(self, file_content: bytes, worker=_extract_pdf_pages) -> List[Any]:
+        """Runs a page-range `worker` over the whole PDF and returns its per-range results in page order."""
+        # The first task extracts the leading pages and reports the page count,
+        # so short PDFs cost a single round-trip to the pool.
+        first, page_count = await self._submit(worker, file_content, 0, self.pages_per_task)
+        if page_count <= self.pages_per_task:
+            return [first]
+
+        ranges = [
+            (start, start + self.pages_per_task)
+            for start in range(self.pages_per_task, page_count, self.pages_per_task)
+        ]
+        rest = await asyncio.gather(*[
+            self._submit(worker, file_content, start, stop) for start, stop in ranges
+        ])
+        return [first] + [part for part, _ in rest]
+
+    async def extract_document(self, file_content: bytes, mime_type: str, mode: Optional[str] = None) -> ExtractedDocument:
+        """
+        Extracts a PDF, DOCX or UTF-8 payload off the event loop. In "layout" mode (the
+        EXTRACTION_MODE default) PDFs also get a section map rebuilt from their headings.
+        """
+        mode = mode or EXTRACTION_MODE
+        start_time = time.perf_counter()
+        self._in_flight += 1
+        try:
+            with span("extract.text", mime_type=mime_type, bytes=len(file_content), mode=mode):
+                if _is_pdf(mime_type) and mode == "layout":
+                    parts = await self._extract_pdf(file_content, _extract_pdf_layout_pages)
+                    document = _assemble_layout([line for part in parts for line in part])
+                elif _is_pdf(mime_type):
+                    document = ExtractedDocument(text="".join(await self._extract_pdf(file_content)))
+                elif _is_docx(mime_type):
+                    document = ExtractedDocument(text=await self._submit(_extract_docx, file_content))
+                else:
+                    document = ExtractedDocument(text=_decode_plain_text(file_content))
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+        elapsed = time.perf_counter() - start_time
+        self._completed += 1
+        self._total_seconds += elapsed
+        self._last_seconds = elapsed
+        self._max_seconds = max(self._max_seconds, elapsed)
+        sections = f", {len(document.sections)} sections" if document.sections else ""
+        logger.info(f"Extracted {len(document.text)} chars ({mime_type}, {document.mode}{sections}) in {elapsed * 1000:.1f}ms")
+        return document
+
+    async def extract(self, file_content: bytes, mime_type: str) -> str:
+        """Extracts plain text from a PDF, DOCX or UTF-8 payload off the event loop."""
+        return (await self.extract_document(file_content, mime_type)).text
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and extraction timing counters for monitoring."""
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self._queued,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_ms": round(1000 * self._total_seconds / self._completed, 2) if self._completed else 0.0,
+            "max_ms": round(1000 * self._max_seconds, 2),
+            "last_ms": round(1000 * self._last_seconds, 2),
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,272 @@
+# AIService/services/tracing.py
+
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import logging
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# --- Tunables ---
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "ai-service")
+# Finished traces are appended here as one OTLP/JSON document per line; disabled when unset
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+# OTLP/HTTP collector base URL (e.g. http://otel-collector:4318); traces are POSTed to /v1/traces
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+OTLP_TIMEOUT = float(os.getenv("OTLP_EXPORT_TIMEOUT", "5"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+TRACEPARENT_HEADER = "traceparent"
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "status", "error")
+
+    def __init__(self, trace_id: str, name: str, parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        """Marks the span failed; for call sites that handle the exception themselves."""
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error or ""} if self.status == "error" else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Trace:
+    """
+    All spans recorded while serving one request. The request ID is taken from the
+    caller's X-Request-ID header when present, so one ID follows a request across services.
+    """
+
+    def __init__(self, name: str, request_id: Optional[str] = None, traceparent: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex
+        parent_id = None
+        match = _TRACEPARENT_RE.match((traceparent or "").strip().lower())
+        if match:
+            self.trace_id, parent_id = match.group(1), match.group(2)
+        else:
+            self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.root = Span(self.trace_id, name, parent_id=parent_id, attributes={"request.id": self.request_id})
+
+    def server_timing(self) -> str:
+        """
+        `Server-Timing` header value: total request time plus the summed duration and
+        count of each span name. Spans that ran concurrently are summed, so a category
+        can exceed `total`.
+        """
+        totals: "OrderedDict[str, List[float]]" = OrderedDict()
+        for span in self.spans:
+            entry = totals.setdefault(span.name, [0.0, 0])
+            entry[0] += span.duration_ms
+            entry[1] += 1
+        metrics = [f"total;dur={self.root.duration_ms:.1f}"]
+        for name, (duration, count) in totals.items():
+            metric = re.sub(r"[^A-Za-z0-9_.\-]", "_", name)
+            metrics.append(f'{metric};dur={duration:.1f};desc="{count}x"')
+        return ", ".join(metrics)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": "elevv.tracing"},
+                    "spans": [self.root.to_otlp()] + [span.to_otlp() for span in list(self.spans)],
+                }],
+            }]
+        }
+
+
+# --- Context helpers ---
+def start_trace(name: str, request_id: Optional[str] = None, traceparent: Optional[str] = None) -> Optional[Trace]:
+    """Starts a trace for the current request context; returns None when tracing is disabled."""
+    if not TRACING_ENABLED:
+        return None
+    trace = Trace(name, request_id=request_id, traceparent=traceparent)
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+def propagation_headers() -> Dict[str, str]:
+    """Headers that carry the current request ID and span to a downstream service."""
+    trace = _current_trace.get()
+    if trace is None:
+        return {}
+    parent = _current_span.get() or trace.root
+    return {
+        REQUEST_ID_HEADER: trace.request_id,
+        TRACEPARENT_HEADER: f"00-{trace.trace_id}-{parent.span_id}-01",
+    }
+
+
+_span_listeners: List[Callable[[Span], None]] = []
+
+
+def add_span_listener(listener: Callable[[Span], None]) -> None:
+    """Registers a callback run for every finished span, traced request or not (e.g. metrics)."""
+    _span_listeners.append(listener)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Times the enclosed block as a child of the current span. Works across `await`s and
+    is inherited by tasks created inside the block. Outside a traced request the span is
+    still timed and passed to listeners, but not recorded anywhere.
+    """
+    trace = _current_trace.get()
+    parent = (_current_span.get() or trace.root) if trace else None
+    current = Span(trace.trace_id if trace else "0" * 32, name,
+                   parent_id=parent.span_id if parent else None, attributes=attributes)
+    token = _current_span.set(current) if trace else None
+    try:
+        yield current
+    except asyncio.CancelledError:
+        current.status, current.error = "error", "cancelled"
+        raise
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        current.end()
+        if trace:
+            _current_span.reset(token)
+            trace.spans.append(current)
+        for listener in _span_listeners:
+            try:
+                listener(current)
+            except Exception as e:
+                logger.warning(f"Span listener failed for {name}: {e}")
+
+
+# --- Export ---
+class TraceExporter:
+    """Writes finished traces to a JSON-lines file and/or an OTLP/HTTP collector."""
+
+    def __init__(self, path: Optional[str] = TRACE_EXPORT_PATH, otlp_endpoint: Optional[str] = OTLP_ENDPOINT):
+        self.path = path
+        self.otlp_url = f"{otlp_endpoint.rstrip('/')}/v1/traces" if otlp_endpoint else None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path or self.otlp_url)
+
+    def _append(self, line: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def export(self, trace: Trace) -> None:
+        """Exports a finished trace. Failures are logged, never raised."""
+        if not self.enabled:
+            return
+        payload = trace.to_otlp()
+        if self.path:
+            try:
+                await asyncio.to_thread(self._append, json.dumps(payload))
+            except OSError as e:
+                logger.warning(f"Failed to write trace {trace.request_id} to {self.path}: {e}")
+        if self.otlp_url:
+            if self._client is None:
+                self._client = httpx.AsyncClient(timeout=OTLP_TIMEOUT)
+            try:
+                response = await self._client.post(self.otlp_url, json=payload)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.warning(f"Failed to export trace {trace.request_id} to {self.otlp_url}: {e}")
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+exporter = TraceExporter()
+_export_tasks: set = set()
+
+
+def finish_trace(trace: Optional[Trace]) -> None:
+    """Ends the root span, logs a one-line summary and exports the trace in the background."""
+    if trace is None:
+        return
+    trace.root.end()
+    logger.info(f"request_id={trace.request_id} {trace.root.name} took {trace.root.duration_ms:.1f}ms ({len(trace.spans)} spans)")
+    if exporter.enabled:
+        task = asyncio.get_running_loop().create_task(exporter.export(trace))
+        _export_tasks.add(task)
+        task.add_done_callback(_export_tasks.discard)
@@ -1,4 +1,6 @@
 import re, json
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, List
 
 def _strip_code_fences(s: str) -> str:
     if not s:
@@ -34,4 +36,27 @@ def _safe_json(s: str):
     payload = _extract_json_payload(s)
     if not payload:
         return []
-    return json.loads(payload)
\ No newline at end of file
+    return json.loads(payload)
+
+async def gather_bounded(func: Callable[[Any], Awaitable[Any]], items: Iterable[Any], limit: int) -> List[Any]:
+    """
+    Awaits func(item) for every item with at most `limit` running at once and returns the
+    results in input order. If one fails, the others are cancelled and the error is raised.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [await func(item) for item in items]
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(item):
+        async with semaphore:
+            return await func(item)
+
+    tasks = [asyncio.ensure_future(_run(item)) for item in items]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -3,6 +3,8 @@ from fastapi import FastAPI, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
+from services import tracing, metrics
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,9 +18,28 @@ app = FastAPI(
 # Add request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logger.info(f"Received {request.method} request to {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"Response status: {response.status_code}")
+    if request.url.path == "/metrics":
+        return await call_next(request)
+    # Reuse the caller's request ID (AIService forwards its own) so both services' logs and traces line up
+    trace = tracing.start_trace(
+        f"{request.method} {request.url.path}",
+        request_id=request.headers.get(tracing.REQUEST_ID_HEADER),
+        traceparent=request.headers.get(tracing.TRACEPARENT_HEADER),
+    )
+    request_id = tracing.current_request_id()
+    logger.info(f"Received {request.method} request to {request.url.path} (request_id={request_id})")
+    timer = metrics.RequestTimer(request.method)
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        timer.finish(request.scope, status_code)
+        tracing.finish_trace(trace)
+    logger.info(f"Response status: {response.status_code} (request_id={request_id})")
+    if trace:
+        response.headers[tracing.REQUEST_ID_HEADER] = trace.request_id
+        response.headers["Server-Timing"] = trace.server_timing()
     return response
 
 # CORS middleware
@@ -31,6 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[tracing.REQUEST_ID_HEADER, "Server-Timing"],
 )
 
 # Catch-all OPTIONS handler (fallback)
@@ -46,6 +68,11 @@ async def options_handler(full_path: str):
         }
     )
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": "FileService is running"}
@@ -16,6 +16,7 @@ from database.resume_operations import get_resumes_for_user, _get_resume_table #
 
 # Import S3 utility, config, and DB operations
 from services.s3_utils import generate_presigned_url
+from services.tracing import span
 import config
 from database.user_operations import update_user_profile, get_user_profile
 from database.resume_operations import save_resume_metadata, get_resume_metadata, update_resume_status
@@ -150,7 +151,8 @@ async def get_resume_s3_link(
             raise HTTPException(status_code=403, detail="Forbidden")
         
         # Get the specific resume metadata
-        resume_metadata = await get_resume_metadata(user_id, resume_id)
+        with span("dynamodb.get_resume_metadata", resume_id=resume_id):
+            resume_metadata = await get_resume_metadata(user_id, resume_id)
         
         if not resume_metadata:
             raise HTTPException(status_code=404, detail="Resume not found")
@@ -0,0 +1,43 @@
+# file-service/services/metrics.py
+
+import time
+from typing import Any, Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Same metric names and buckets as AIService (services/metrics.py, HTTP_LATENCY_BUCKETS) so dashboards
+# and histogram_quantile can aggregate both services; keep the two tuples identical
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90, 120)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=HTTP_LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served", ["method"])
+HTTP_REQUEST_ERRORS = Counter(
+    "http_request_errors_total", "HTTP requests that ended in a 5xx or an unhandled exception", ["method", "route"]
+)
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """The matched route template (e.g. /users/{user_id}/resume/{resume_id}/s3-link)."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestTimer:
+    def __init__(self, method: str):
+        self.method = method
+        self.start = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.labels(method).inc()
+
+    def finish(self, scope: Dict[str, Any], status_code: int) -> None:
+        HTTP_REQUESTS_IN_FLIGHT.labels(self.method).dec()
+        route = route_label(scope)
+        HTTP_REQUEST_DURATION.labels(self.method, route, str(status_code)).observe(time.perf_counter() - self.start)
+        if status_code >= 500:
+            HTTP_REQUEST_ERRORS.labels(self.method, route).inc()
+
+
+def render() -> bytes:
+    return generate_latest()
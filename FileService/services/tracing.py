@@ -0,0 +1,168 @@
+# file-service/services/tracing.py
+
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import logging
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Same request-ID / traceparent conventions as AIService, so one ID covers both services
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "file-service")
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")  # JSON-lines file of OTLP/JSON traces
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")  # OTLP/HTTP collector base URL
+OTLP_TIMEOUT = float(os.getenv("OTLP_EXPORT_TIMEOUT", "5"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+TRACEPARENT_HEADER = "traceparent"
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Span:
+    def __init__(self, trace_id: str, name: str, parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class Trace:
+    def __init__(self, name: str, request_id: Optional[str] = None, traceparent: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex
+        match = _TRACEPARENT_RE.match((traceparent or "").strip().lower())
+        self.trace_id = match.group(1) if match else uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.root = Span(self.trace_id, name, parent_id=match.group(2) if match else None,
+                         attributes={"request.id": self.request_id})
+
+    def server_timing(self) -> str:
+        totals: "OrderedDict[str, List[float]]" = OrderedDict()
+        for s in self.spans:
+            entry = totals.setdefault(s.name, [0.0, 0])
+            entry[0] += s.duration_ms
+            entry[1] += 1
+        metrics = [f"total;dur={self.root.duration_ms:.1f}"]
+        metrics += [f'{re.sub(r"[^A-Za-z0-9_.-]", "_", name)};dur={dur:.1f};desc="{count}x"'
+                    for name, (dur, count) in totals.items()]
+        return ", ".join(metrics)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "elevv.tracing"},
+                            "spans": [self.root.to_otlp()] + [s.to_otlp() for s in self.spans]}],
+        }]}
+
+
+def start_trace(name: str, request_id: Optional[str] = None, traceparent: Optional[str] = None) -> Optional[Trace]:
+    if not TRACING_ENABLED:
+        return None
+    trace = Trace(name, request_id=request_id, traceparent=traceparent)
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    return trace
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Times the enclosed block as a child of the current span (no-op outside a request)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get() or trace.root
+    current = Span(trace.trace_id, name, parent_id=parent.span_id, attributes=attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.spans.append(current)
+
+
+def _export(trace: Trace) -> None:
+    payload = trace.to_otlp()
+    if TRACE_EXPORT_PATH:
+        try:
+            with open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload) + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write trace {trace.request_id}: {e}")
+    if OTLP_ENDPOINT:
+        try:
+            requests.post(f"{OTLP_ENDPOINT.rstrip('/')}/v1/traces", json=payload, timeout=OTLP_TIMEOUT).raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Failed to export trace {trace.request_id}: {e}")
+
+
+_export_tasks: set = set()
+
+
+def finish_trace(trace: Optional[Trace]) -> None:
+    """Ends the root span and exports the trace off the request path."""
+    if trace is None:
+        return
+    trace.root.end_ns = time.time_ns()
+    if TRACE_EXPORT_PATH or OTLP_ENDPOINT:
+        task = asyncio.get_running_loop().create_task(asyncio.to_thread(_export, trace))
+        _export_tasks.add(task)
+        task.add_done_callback(_export_tasks.discard)